@@ -0,0 +1,63 @@
+"""Benchmark of the calendar properties of time arrays
+
+Description:
+------------
+
+Compares the calendar properties of time arrays, computed from the Julian dates with integer arithmetic, to the
+earlier implementation building a datetime for each epoch. Both give identical values. Run from the root of the
+repository, optionally giving the number of epochs:
+
+    python benchmarks/time_calendar.py 200000
+"""
+# Standard library imports
+import sys
+import time as timer
+
+# Third party imports
+import numpy as np
+
+# Midgard imports
+from midgard.data import time
+
+PROPERTIES = ("year", "month", "day", "hour", "minute", "second", "doy", "sec_of_day")
+
+
+def calendar_from_datetime(t):
+    """Calendar properties derived from one datetime per epoch, like earlier versions of TimeArray"""
+    datetimes = t.datetime
+    return dict(
+        year=np.array([d.year for d in datetimes]),
+        month=np.array([d.month for d in datetimes]),
+        day=np.array([d.day for d in datetimes]),
+        hour=np.array([d.hour for d in datetimes]),
+        minute=np.array([d.minute for d in datetimes]),
+        second=np.array([d.second for d in datetimes]),
+        doy=np.array([d.timetuple().tm_yday for d in datetimes]),
+        sec_of_day=np.array([d.hour * 60 * 60 + d.minute * 60 + d.second for d in datetimes]),
+    )
+
+
+def calendar_from_jds(t):
+    """Calendar properties of TimeArray"""
+    return {name: getattr(t, name) for name in PROPERTIES}
+
+
+def main(num_epochs: int) -> None:
+    rng = np.random.default_rng(2024)
+    jd = 2_451_545.0 + rng.uniform(-20 * 365.25, 20 * 365.25, num_epochs)
+
+    results = dict()
+    for name, func in (("datetime", calendar_from_datetime), ("jd1/jd2", calendar_from_jds)):
+        t = time.Time(jd, scale="utc", fmt="jd")  # New array, so that no conversions are cached
+        start = timer.perf_counter()
+        results[name] = func(t)
+        print(f"{name:>10}: {timer.perf_counter() - start:8.3f} s for all properties of {num_epochs} epochs")
+
+    for prop in PROPERTIES:
+        if not np.array_equal(results["datetime"][prop], results["jd1/jd2"][prop]):
+            raise SystemExit(f"Property {prop} differs between implementations")
+    print("All properties are identical")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
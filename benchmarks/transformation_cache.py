@@ -0,0 +1,78 @@
+"""Benchmark of caching conversions between TRS and geodetic coordinates
+
+Description:
+------------
+
+Compares the opt-in identity cache of trs2llh, see `nputil.IdentityCache`, to the earlier cache wrapping the
+positions in a HashArray and an lru_cache, which serializes the whole array on every call. Run from the root of the
+repository, optionally giving the number of positions:
+
+    python benchmarks/transformation_cache.py 2000000
+"""
+# Standard library imports
+from functools import lru_cache
+import sys
+import time as timer
+
+# Third party imports
+import numpy as np
+
+# Midgard imports
+from midgard.math import nputil
+from midgard.math import transformation
+from midgard.math.ellipsoid import GRS80
+
+
+@lru_cache()
+def _trs2llh_lru_cache(trs: nputil.HashArray, ellipsoid) -> np.ndarray:
+    return transformation.trs2llh(np.asarray(trs).view(np.ndarray), ellipsoid)
+
+
+def trs2llh_lru_cache(trs: np.ndarray) -> np.ndarray:
+    """Conversion cached like in earlier versions of trs2llh"""
+    return _trs2llh_lru_cache(nputil.HashArray(trs), GRS80)
+
+
+def trs2llh_identity_cache(trs: np.ndarray) -> np.ndarray:
+    """Conversion cached on the identity of the array"""
+    return transformation.trs2llh(trs, cache=True)
+
+
+def best_of(func, arrays) -> float:
+    """Shortest time in seconds used by func for any of the arrays"""
+    times = list()
+    for arr in arrays:
+        start = timer.perf_counter()
+        func(arr)
+        times.append(timer.perf_counter() - start)
+    return min(times)
+
+
+def read_only(arr: np.ndarray) -> np.ndarray:
+    """Make an array read-only, which is needed for it to be cached on identity"""
+    arr.flags.writeable = False
+    return arr
+
+
+def main(num_positions: int) -> None:
+    rng = np.random.default_rng(2024)
+    trs = rng.normal(size=(num_positions, 3))
+    trs *= 6.4e6 / np.linalg.norm(trs, axis=1)[:, None]
+    read_only(trs)
+
+    print(f"Converting {num_positions} positions from TRS to LLH")
+    print(f"{'no cache':>16}: {best_of(transformation.trs2llh, [trs] * 3):10.6f} s")
+    for name, func in (("lru_cache", trs2llh_lru_cache), ("identity cache", trs2llh_identity_cache)):
+        # Positions with new values are not cached by either cache
+        misses = [read_only(trs + offset) for offset in (1.0, 2.0, 3.0)]
+        miss = best_of(func, misses)
+        func(trs)
+        hit = best_of(func, [trs] * 3)
+        print(f"{name:>16}: {miss:10.6f} s on cache miss, {hit:10.6f} s on cache hit")
+
+    if not np.array_equal(trs2llh_lru_cache(trs), trs2llh_identity_cache(trs)):
+        raise SystemExit("Cached conversions differ")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000)
@@ -0,0 +1,192 @@
+"""Simple utilities used by Dataset when converting to and from Apache Arrow tables
+
+Each field of a dataset is stored as one Arrow column, with nested fields in collections named like
+"collection.field". The fieldtype, unit and other attributes needed to recreate a field are stored as metadata on
+the column, while meta and vars of the dataset are stored as metadata on the schema. Metadata values are encoded
+the same way as HDF5 attributes, see _h5utils.encode_h5attr().
+
+Columns are created as follows:
+
+    float:     float64, or fixed size lists of float64 for multi-dimensional fields. Not copied.
+    bool:      bool, or fixed size lists of bool. Arrow packs booleans into bits, so the values are copied.
+    text:      string, or fixed size lists of string. Converted from numpy's UTF-32 to UTF-8.
+    time:      struct with a timestamp (microseconds in the time scale of the field) for use by other tools,
+               together with jd1 and jd2 (not copied) used to recreate the time exactly.
+    position:  fixed size lists of three float64. Not copied. Attributes like `time` and `other` are not stored.
+    posvel:    fixed size lists of six float64. Not copied.
+    sigma:     struct with the values and their sigmas, each stored like float fields.
+    position_delta, posvel_delta:
+               struct with the delta values and the values of the reference position, each stored like positions.
+
+Other field types, like time_delta, can not be converted.
+"""
+
+# Standard library imports
+from typing import Any, Dict, List, Optional, Tuple
+
+# Third party imports
+import numpy as np
+import pyarrow as pa
+
+# Midgard imports
+from midgard.data import _h5utils
+from midgard.data._time import TimeArray, _days2us
+from midgard.data.position import Position, PositionDelta, PosVel, PosVelDelta
+from midgard.dev import log
+from midgard.math import ellipsoid
+
+# Keys in the schema metadata holding meta and vars of the dataset
+META = b"midgard.meta"
+VARS = b"midgard.vars"
+
+# Julian date of the Unix epoch, 1970-01-01 00:00
+_JD_UNIX_EPOCH = 2_440_587.5
+
+# Factories recreating positions from values, see from_column()
+_POSITION_FACTORIES = {"position": Position, "posvel": PosVel}
+
+# Factories recreating position deltas and their reference positions from values, see from_column()
+_DELTA_FACTORIES = {"position_delta": (PositionDelta, Position), "posvel_delta": (PosVelDelta, PosVel)}
+
+
+def to_columns(field: "FieldType", prefix: str = "", strict: bool = True) -> List[Tuple["pa.Field", "pa.Array"]]:
+    """Convert a field to Arrow columns, one column per field with collections split into their nested fields
+
+    Args:
+        field:   Field in a dataset or a collection.
+        prefix:  Name of the collection containing the field, including a trailing period.
+        strict:  Raise a TypeError for fields that can not be converted, instead of skipping them with a warning.
+
+    Returns:
+        List of Arrow fields describing the columns together with the values of the columns.
+    """
+    name = f"{prefix}{field.name}"
+    if field.fieldtype == "collection":
+        return [c for f in field.data._fields.values() for c in to_columns(f, prefix=f"{name}.", strict=strict)]
+
+    metadata = dict(fieldtype=field.fieldtype, write_level=field.write_level.name)
+    if field.fieldtype in ("float", "bool", "text"):
+        values = _fixed_size_list(np.asarray(field.data), metadata)
+        if field._unit is not None:
+            metadata["unit"] = field._unit
+    elif field.fieldtype == "time":
+        time = field.data
+        metadata.update(scale=time.scale, fmt=time.fmt)
+        timestamp = _days2us(time.jd1 - _JD_UNIX_EPOCH) + _days2us(time.jd2)
+        values = pa.StructArray.from_arrays(
+            [pa.array(timestamp, type=pa.timestamp("us")), pa.array(time.jd1), pa.array(time.jd2)],
+            names=["timestamp", "jd1", "jd2"],
+        )
+    elif field.fieldtype in _POSITION_FACTORIES:
+        metadata.update(system=field.data.system, ellipsoid=field.data.ellipsoid.name)
+        values = _fixed_size_list(np.asarray(field.data.val), metadata)
+    elif field.fieldtype == "sigma":
+        sigma = np.broadcast_to(field.data.sigma, field.data.shape)
+        values = pa.StructArray.from_arrays(
+            [_fixed_size_list(np.asarray(field.data), metadata), _fixed_size_list(sigma, dict())],
+            names=["value", "sigma"],
+        )
+        if field._unit is not None:
+            metadata["unit"] = field._unit
+    elif field.fieldtype in _DELTA_FACTORIES:
+        ref_pos = field.data.ref_pos
+        metadata.update(system=field.data.system, ref_system=ref_pos.system, ellipsoid=ref_pos.ellipsoid.name)
+        values = pa.StructArray.from_arrays(
+            [
+                _fixed_size_list(np.asarray(field.data.val), metadata),
+                _fixed_size_list(np.asarray(ref_pos.val), dict()),
+            ],
+            names=["val", "ref_pos"],
+        )
+    elif strict:
+        raise TypeError(f"Field {name!r} of type {field.fieldtype!r} can not be converted to Arrow")
+    else:
+        log.warn(f"Skipping field {name!r} of type {field.fieldtype!r}, which can not be converted to Arrow")
+        return []
+
+    encoded = {k: str(_h5utils.encode_h5attr(v)) for k, v in metadata.items()}
+    return [(pa.field(name, values.type, metadata=encoded), values)]
+
+
+def from_column(field: "pa.Field", column: "pa.ChunkedArray") -> Tuple[str, Any, Dict[str, Any]]:
+    """Convert an Arrow column created by to_columns() back to values of a field
+
+    Args:
+        field:   Arrow field describing the column.
+        column:  Values of the column.
+
+    Returns:
+        Fieldtype, values and arguments for adding the field to a dataset.
+    """
+    metadata = {k.decode(): _h5utils.decode_h5attr(v.decode()) for k, v in (field.metadata or {}).items()}
+    if "fieldtype" not in metadata:
+        raise ValueError(f"Column {field.name!r} was not created by Dataset.to_arrow()")
+
+    fieldtype = metadata["fieldtype"]
+    field_args = dict(write_level=metadata["write_level"], unit=metadata.get("unit"))
+    values = column.combine_chunks() if isinstance(column, pa.ChunkedArray) else column
+    if fieldtype in ("float", "bool", "text"):
+        return fieldtype, _to_numpy(values, metadata), field_args
+    if fieldtype == "time":
+        jd1 = _to_numpy(values.field("jd1"), metadata)
+        jd2 = _to_numpy(values.field("jd2"), metadata)
+        return fieldtype, TimeArray._cls_scale(metadata["scale"]).from_jds(jd1, jd2, metadata["fmt"]), field_args
+    if fieldtype in _POSITION_FACTORIES:
+        val = _to_numpy(values, metadata)
+        factory = _POSITION_FACTORIES[fieldtype]
+        pos = factory(val, system=metadata["system"], ellipsoid=ellipsoid.get(metadata["ellipsoid"]))
+        return fieldtype, pos, dict(field_args, unit=None)
+    if fieldtype == "sigma":
+        sigma = _to_numpy(values.field("sigma"), metadata)
+        return fieldtype, _to_numpy(values.field("value"), metadata), dict(field_args, sigma=sigma)
+    if fieldtype in _DELTA_FACTORIES:
+        delta_factory, ref_factory = _DELTA_FACTORIES[fieldtype]
+        ref_val = _to_numpy(values.field("ref_pos"), metadata)
+        ref_pos = ref_factory(ref_val, system=metadata["ref_system"], ellipsoid=ellipsoid.get(metadata["ellipsoid"]))
+        delta = delta_factory(_to_numpy(values.field("val"), metadata), system=metadata["system"], ref_pos=ref_pos)
+        return fieldtype, delta, dict(field_args, unit=None)
+
+    raise TypeError(f"Column {field.name!r} of type {fieldtype!r} can not be converted from Arrow")
+
+
+def encode_metadata(value: Any) -> bytes:
+    """Encode meta or vars of a dataset as schema metadata"""
+    return str(_h5utils.encode_h5attr(dict(value))).encode("utf-8")
+
+
+def decode_metadata(metadata: Optional[Dict[bytes, bytes]], key: bytes) -> Dict[str, Any]:
+    """Decode meta or vars of a dataset stored by encode_metadata()"""
+    if not metadata or key not in metadata:
+        return dict()
+    return _h5utils.decode_h5attr(metadata[key].decode("utf-8"))
+
+
+def _fixed_size_list(data: np.ndarray, metadata: Dict[str, Any]) -> "pa.Array":
+    """Convert an array to Arrow, storing all values of each row in a fixed size list
+
+    The shape of each row is added to the metadata. Contiguous float arrays are not copied.
+    """
+    if data.dtype.kind == "U":
+        values = pa.array(data.reshape(-1), type=pa.string())
+    else:
+        values = pa.array(np.ascontiguousarray(data).reshape(-1))
+    if data.ndim == 1:
+        return values
+
+    metadata["shape"] = tuple(data.shape[1:])
+    return pa.FixedSizeListArray.from_arrays(values, int(np.prod(data.shape[1:])))
+
+
+def _to_numpy(values: "pa.Array", metadata: Dict[str, Any]) -> np.ndarray:
+    """Convert an Arrow array created by _fixed_size_list() back to numpy
+
+    Float arrays without nulls are read-only views of the Arrow buffers.
+    """
+    shape = tuple(metadata.get("shape", ()))
+    if shape:
+        values = values.flatten()
+    if pa.types.is_string(values.type) or pa.types.is_large_string(values.type):
+        data = np.asarray(values.to_pylist(), dtype=str)
+    else:
+        data = values.to_numpy(zero_copy_only=False)
+    return data.reshape(-1, *shape)
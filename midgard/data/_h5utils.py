@@ -4,46 +4,540 @@
 
 # Standard library imports
 import ast
-import copy
+import json
 import re
-from typing import Any, Dict, List, Tuple, Set
+from typing import Any, Callable, Dict, KeysView, List, Optional, Tuple, Set, Union
 
 # Third party imports
+import h5py
 import numpy as np
 
+# HDF5 filters used by each codec available when writing datasets, see create_dataset()
+CODECS: Dict[str, Dict[str, Any]] = {
+    "none": dict(),
+    "lzf": dict(compression="lzf", shuffle=True),
+    "gzip": dict(compression="gzip", compression_opts=4, shuffle=True),
+}
+
+# Storage options of files that do not record any, matching the defaults of Dataset.write
+_DEFAULT_STORAGE = dict(codec="none", field_codecs=dict(), chunk_rows=None, dictionary_text=False, resizable=False)
+
+# Key in the memo of Dataset.read holding the rows to read, see read_rows()
+ROWS = "__rows__"
+
+# Key in the memo of Dataset.read telling whether to memory map values, see read_rows()
+MMAP = "__mmap__"
+
+# Key in the memo of Dataset.write holding the storage options of each field, see field_storage_options()
+STORAGE = "__storage__"
+
+# Group holding values too large to be stored as attributes, see write_attr()
+LARGE_ATTRS = "__attrs__"
+
+# Largest encoded value stored as an attribute. HDF5 attributes are limited to 64 kB
+_MAX_ATTR_SIZE = 16_384
+
+# Tagged JSON objects used for types that JSON does not support, see _to_json()
+_JSON_TAGS: Dict[str, Callable[[List[Any]], Any]] = {
+    "__tuple__": tuple,
+    "__set__": set,
+    "__dict__": dict,
+}
+
+# Number of rows read at a time when reading rows given by indices
+_READ_BLOCK_ROWS = 65_536
+
+# Views of memory mapped values selecting a smaller fraction of the mapped rows can be copied, see release_mapping()
+_MMAP_MIN_FRACTION = 0.1
+
+
+def storage_options(
+    codec: str,
+    field_codecs: Optional[Dict[str, str]],
+    chunk_rows: Optional[int],
+    dictionary_text: Optional[bool] = None,
+    resizable: bool = False,
+) -> Dict[str, Any]:
+    """Validate options for how data are stored in a HDF5 file
+
+    The options are recorded as an attribute on the HDF5 file by `write_storage_options`, and are resolved for each
+    field by `field_storage_options` when writing. Reading the file does not depend on the options, as HDF5 records
+    the filters of each dataset.
+
+    Args:
+        codec:            Name of codec used for all fields, see CODECS.
+        field_codecs:     Names of codecs used for individual fields or types of fields, overriding codec.
+        chunk_rows:       Number of rows in each chunk of compressed datasets, None to let h5py choose.
+        dictionary_text:  Whether to store text fields as distinct strings and integer codes, see dictionary_text().
+                          None to dictionary encode text fields stored with a codec other than "none".
+        resizable:        Whether to store uncompressed fields in chunked datasets, so that rows can be appended.
+
+    Returns:
+        Dictionary with storage options.
+    """
+    field_codecs = dict() if field_codecs is None else dict(field_codecs)
+    for name in [codec, *field_codecs.values()]:
+        if name not in CODECS:
+            raise ValueError(f"Codec {name!r} unknown. Use one of {', '.join(CODECS)}")
+    if chunk_rows is not None and chunk_rows < 1:
+        raise ValueError(f"Number of rows in each chunk must be positive, not {chunk_rows}")
+
+    return dict(
+        codec=codec,
+        field_codecs=field_codecs,
+        chunk_rows=chunk_rows,
+        dictionary_text=None if dictionary_text is None else bool(dictionary_text),
+        resizable=bool(resizable),
+    )
+
+
+def write_storage_options(h5_file: "h5py.File", options: Dict[str, Any]) -> None:
+    """Record storage options on a HDF5 file, see storage_options()"""
+    h5_file.attrs["storage"] = encode_h5attr(options)
+
+
+def read_storage_options(h5_group: "h5py.Group") -> Dict[str, Any]:
+    """Storage options recorded on the file of a HDF5 group"""
+    attr = h5_group.file.attrs.get("storage")
+    return {**_DEFAULT_STORAGE, **(dict() if attr is None else decode_h5attr(attr))}
+
+
+def field_storage_options(options: Dict[str, Any], field_types: Dict[str, str]) -> Dict[str, Any]:
+    """Resolve storage options for each field, to be stored in the memo of Dataset.write under STORAGE
+
+    Codecs given for a field name take precedence over codecs given for the type of the field, which take precedence
+    over the codec of all fields. When dictionary_text is not given, text fields are dictionary encoded if they are
+    stored with a codec.
+
+    Args:
+        options:      Storage options, see storage_options().
+        field_types:  Type of each field, with nested fields named like "collection.field".
+
+    Returns:
+        Storage options with the codec of each field in field_codecs.
+    """
+    codecs = options["field_codecs"]
+    field_codecs = {n: codecs.get(n, codecs.get(t, options["codec"])) for n, t in field_types.items()}
+    return {**options, "field_codecs": field_codecs}
+
+
+def _field_options(h5_group: "h5py.Group", memo: Dict[Any, Any]) -> Tuple[str, Dict[str, Any]]:
+    """Codec and storage options of the field in a HDF5 group
+
+    The options are taken from the memo, or read from the file if the memo does not hold them.
+    """
+    if STORAGE not in memo:
+        memo[STORAGE] = read_storage_options(h5_group)
+    options = memo[STORAGE]
+    return options["field_codecs"].get(h5_group.attrs.get("fieldname"), options["codec"]), options
+
+
+def dictionary_text(h5_group: "h5py.Group", memo: Dict[Any, Any]) -> bool:
+    """Whether the text field in a HDF5 group is dictionary encoded according to the storage options
+
+    Dictionary encoded text is stored as each distinct string once, together with integer codes. Files using it can
+    not be read by Midgard versions without dictionary encoding.
+
+    Args:
+        h5_group:  HDF5 group of a field, with a fieldname attribute.
+        memo:      Memo of Dataset.write, see field_storage_options().
+    """
+    codec, options = _field_options(h5_group, memo)
+    return codec != "none" if options["dictionary_text"] is None else options["dictionary_text"]
+
+
+def create_dataset(h5_group: "h5py.Group", name: str, data: np.ndarray, memo: Dict[Any, Any]) -> "h5py.Dataset":
+    """Create a HDF5 dataset, chunked and compressed according to the storage options of the field
+
+    Compressed datasets, and uncompressed datasets in files with the resizable option, are chunked and can be
+    resized to append rows. Other datasets are stored contiguously, so that they can be memory mapped.
+
+    Args:
+        h5_group:  HDF5 group of a field, with a fieldname attribute.
+        name:      Name of HDF5 dataset.
+        data:      Values stored in the dataset.
+        memo:      Memo of Dataset.write, see field_storage_options().
+
+    Returns:
+        The new HDF5 dataset.
+    """
+    data = np.asarray(data)
+    codec, options = _field_options(h5_group, memo)
+    if (codec == "none" and not options["resizable"]) or data.size == 0:
+        return h5_group.create_dataset(name, data=data)
+
+    chunk_rows = options["chunk_rows"]
+    chunks = True if chunk_rows is None else (min(chunk_rows, len(data)), *data.shape[1:])
+    maxshape = (None, *data.shape[1:])  # Allow appending rows, see append_rows()
+    return h5_group.create_dataset(name, data=data, chunks=chunks, maxshape=maxshape, **CODECS[codec])
+
+
+def append_rows(h5_group: "h5py.Group", new_group: "h5py.Group", num_rows: int) -> bool:
+    """Append rows stored in one HDF5 group to the corresponding datasets in another, in place
+
+    The groups must have the same structure and attributes. Rows can only be appended to resizable datasets, i.e.
+    datasets written with a chunked codec or the resizable option. Dictionary encoded text is appended by merging
+    the categories.
+
+    The new rows are written after the first num_rows rows, replacing any rows after them. The appending stops as
+    soon as something can not be appended, leaving h5_group partly appended. Only read the first num_rows rows until
+    the appended rows are committed by updating the number of rows, see Dataset.write(mode="a").
+
+    Args:
+        h5_group:   HDF5 group in the file being appended to.
+        new_group:  HDF5 group with the same structure, containing the rows to append.
+        num_rows:   Number of rows already stored in h5_group.
+
+    Returns:
+        True if all rows were appended, False if the rows can not be appended in place.
+    """
+    if set(h5_group) != set(new_group) or not _equal_attrs(h5_group.attrs, new_group.attrs):
+        return False
+
+    codes = None
+    if new_group.attrs.get("encoding") == "dictionary":
+        codes = _merge_categories(h5_group["__categories__"], new_group["__categories__"])
+        if codes is None:
+            return False
+
+    for name, new_item in new_group.items():
+        item = h5_group[name]
+        if isinstance(new_item, h5py.Group):
+            if not append_rows(item, new_item, num_rows):
+                return False
+            continue
+        if name == "__categories__":
+            continue
+
+        values = new_item[...] if codes is None else codes[new_item[...]]
+        if not _can_append(item, values) or not _equal_attrs(item.attrs, new_item.attrs):
+            return False
+        item.resize(num_rows + len(values), axis=0)
+        item[num_rows:] = values
+
+    return True
+
+
+def _merge_categories(h5_categories: "h5py.Dataset", new_categories: "h5py.Dataset") -> Optional[np.ndarray]:
+    """Add new categories of dictionary encoded text after the existing ones
+
+    Args:
+        h5_categories:   HDF5 dataset with existing categories, updated in place.
+        new_categories:  HDF5 dataset with the categories used by the new rows.
+
+    Returns:
+        Array translating codes of new rows to codes of the merged categories, None if they can not be merged.
+    """
+    categories, new = h5_categories[...], new_categories[...]
+    missing = np.setdiff1d(new, categories)
+    if not _can_append(h5_categories, missing):
+        return None
+
+    merged = np.concatenate((categories, missing))
+    sorter = np.argsort(merged)
+    h5_categories.resize(len(merged), axis=0)
+    h5_categories[len(categories) :] = missing
+    return sorter[np.searchsorted(merged, new, sorter=sorter)]
+
+
+def _can_append(h5_dataset: "h5py.Dataset", values: np.ndarray) -> bool:
+    """Check whether values can be appended to a HDF5 dataset without changing its shape or type"""
+    if h5_dataset.maxshape[0] is not None or h5_dataset.shape[1:] != values.shape[1:]:
+        return False
+    if h5_dataset.dtype.kind == "S" and values.dtype.kind == "S":
+        # Shorter strings are padded, while longer strings would be truncated
+        return values.dtype.itemsize <= h5_dataset.dtype.itemsize
+    if h5_dataset.dtype.kind in "iu" and values.dtype.kind in "iu" and values.size:
+        return np.can_cast(np.min_scalar_type(values.max()), h5_dataset.dtype)
+    return values.dtype == h5_dataset.dtype
+
+
+def _equal_attrs(attrs: "h5py.AttributeManager", other_attrs: "h5py.AttributeManager") -> bool:
+    """Check whether two sets of HDF5 attributes are equal"""
+    if set(attrs) != set(other_attrs):
+        return False
+    return all(np.array_equal(attrs[name], other_attrs[name]) for name in attrs)
+
+
+def select_rows(rows: Union[None, slice, np.ndarray], num_obs: int) -> Union[None, slice, np.ndarray]:
+    """Normalize a selection of rows to either a slice with positive step or an array of row indices
+
+    Args:
+        rows:     Slice, boolean mask or integer indices of rows, None for all rows.
+        num_obs:  Number of rows in the HDF5 file.
+
+    Returns:
+        None, slice or array of indices, see read_rows().
+    """
+    if rows is None:
+        return None
+    if isinstance(rows, slice):
+        start, stop, step = rows.indices(num_obs)
+        if step > 0:
+            return slice(start, max(start, stop), step)
+        return np.arange(start, stop, step)
+
+    rows = np.asarray(rows)
+    if rows.dtype == bool:
+        if rows.shape != (num_obs,):
+            raise ValueError(f"Boolean row mask must have shape ({num_obs},), not {rows.shape}")
+        return np.flatnonzero(rows)
+    if rows.ndim != 1 or rows.dtype.kind not in "iu":
+        raise ValueError(f"Rows must be given as a slice, a boolean mask or integer indices, not {rows.dtype}")
+    if rows.size and (rows.min() < -num_obs or rows.max() >= num_obs):
+        raise IndexError(f"Row index out of range for dataset with {num_obs} observations")
+    return np.where(rows < 0, rows + num_obs, rows)
+
+
+def num_rows(rows: Union[None, slice, np.ndarray], num_obs: int) -> int:
+    """Number of rows picked out by a selection returned by select_rows()"""
+    if rows is None:
+        return num_obs
+    if isinstance(rows, slice):
+        return len(range(*rows.indices(num_obs)))
+    return len(rows)
+
+
+def read_rows(h5_dataset: "h5py.Dataset", memo: Dict[str, Any], mappable: bool = False) -> np.ndarray:
+    """Read the rows selected when reading a dataset from a HDF5 dataset
+
+    The selection is stored in memo under the ROWS key by Dataset.read. Rows given by indices are read in blocks
+    covering the selected rows, so that neither the full HDF5 dataset nor slow point selections are needed.
+
+    If memory mapping is requested in memo under the MMAP key, mappable values are returned as read-only views of the
+    file, see memory_map().
+
+    Args:
+        h5_dataset:  HDF5 dataset with one row per observation.
+        memo:        Dictionary keeping track of objects read from file.
+        mappable:    Whether the values may be memory mapped.
+
+    Returns:
+        Values of the selected rows.
+    """
+    rows = memo.get(ROWS)
+    if isinstance(rows, slice) and rows.indices(len(h5_dataset)) == (0, len(h5_dataset), 1):
+        rows = None  # All rows
+    if mappable and memo.get(MMAP) and not isinstance(rows, np.ndarray):
+        values = memory_map(h5_dataset, rows)
+        if values is not None:
+            return values
+    if rows is None:
+        return h5_dataset[...]
+    if isinstance(rows, slice):
+        return h5_dataset[rows]
+
+    values = np.empty((len(rows),) + h5_dataset.shape[1:], dtype=h5_dataset.dtype)
+    if not len(rows):
+        return values
+    order = np.argsort(rows, kind="stable")
+    sorted_rows = rows[order]
+    for start in range(sorted_rows[0], sorted_rows[-1] + 1, _READ_BLOCK_ROWS):
+        first, last = np.searchsorted(sorted_rows, [start, start + _READ_BLOCK_ROWS])
+        if first == last:
+            continue
+        block = h5_dataset[start : sorted_rows[last - 1] + 1]
+        values[order[first:last]] = block[sorted_rows[first:last] - start]
+    return values
+
+
+def memory_map(h5_dataset: "h5py.Dataset", rows: Optional[slice] = None) -> Optional[np.ndarray]:
+    """Map the values of a HDF5 dataset into memory without reading them
+
+    Only datasets stored contiguously and without filters, i.e. written with the "none" codec, can be mapped. The
+    values are shared with every other process mapping the same file, and are read from disk as they are accessed.
+
+    Only the rows spanned by rows are mapped. The mapping stays open, keeping the file open and its mapped pages
+    counted as used by the process, as long as the returned array or any view of it exists. Views of a small part
+    of the mapping are therefore copied when fields are subset with compact, see release_mapping().
+
+    Args:
+        h5_dataset:  HDF5 dataset.
+        rows:        Slice with positive step selecting the rows to map, default is all rows.
+
+    Returns:
+        Read-only array viewing the values in the file, None if the dataset can not be mapped or has no rows to map.
+    """
+    if h5_dataset.chunks is not None or h5_dataset.dtype.hasobject or h5_dataset.dtype.kind not in "biuf":
+        return None
+    offset = h5_dataset.id.get_offset()
+    if offset is None:
+        # No storage is allocated for empty datasets
+        return None
+
+    # Map the range of rows from the first to the last selected row
+    start, stop, step = (rows or slice(None)).indices(len(h5_dataset))
+    num_rows = len(range(start, stop, step))
+    if not num_rows:
+        return None
+    first, last = start, start + (num_rows - 1) * step
+    row_bytes = h5_dataset.dtype.itemsize * int(np.prod(h5_dataset.shape[1:]))
+    values = np.memmap(
+        h5_dataset.file.filename,
+        h5_dataset.dtype,
+        mode="r",
+        offset=offset + first * row_bytes,
+        shape=(last - first + 1,) + h5_dataset.shape[1:],
+    )
+    if step != 1:
+        values = values[::step]
+    return values.view(np.ndarray)
+
+
+def release_mapping(values: np.ndarray) -> np.ndarray:
+    """Copy values viewing a small part of a memory mapped file, so that the mapping can be closed
+
+    Args:
+        values:  Array, possibly a view of a memory mapped file, see memory_map().
+
+    Returns:
+        The values, copied if they view less than _MMAP_MIN_FRACTION of the mapped rows.
+    """
+    # Each view refers to the array it was made from, the innermost memory map covers the whole mapping
+    mapped, base = None, values.base
+    while isinstance(base, np.ndarray):
+        mapped = base if isinstance(base, np.memmap) else mapped
+        base = base.base
+    if mapped is None or len(values) >= _MMAP_MIN_FRACTION * len(mapped):
+        return values
+    return values.copy()
+
+
+class LazyFields(dict):
+    """Dictionary of fields that are read from file the first time they are accessed
+
+    Fields are added with a function reading them. Until then the dictionary stores None for the field, so that names
+    and number of fields are available without reading anything.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._loaders: Dict[str, Callable[[], Any]] = dict()
+
+    def add_loader(self, name: str, loader: Callable[[], Any]) -> None:
+        """Add a function reading the field with the given name"""
+        self._loaders[name] = loader
+        super().__setitem__(name, None)
+
+    @property
+    def pending(self) -> KeysView[str]:
+        """Names of fields that have not been read yet"""
+        return self._loaders.keys()
+
+    def load(self, name: str) -> None:
+        """Read a field from file, if it has not been read yet"""
+        loader = self._loaders.get(name)
+        if loader is not None:
+            super().__setitem__(name, loader())
+            del self._loaders[name]
+
+    def __getitem__(self, name: str) -> Any:
+        self.load(name)
+        return super().__getitem__(name)
+
+    def __setitem__(self, name: str, value: Any) -> None:
+        self._loaders.pop(name, None)
+        super().__setitem__(name, value)
+
+    def __delitem__(self, name: str) -> None:
+        self._loaders.pop(name, None)
+        super().__delitem__(name)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return self[name] if name in self else default
+
+    def pop(self, name: str, *default: Any) -> Any:
+        self.load(name)
+        return super().pop(name, *default)
+
+    def values(self) -> List[Any]:
+        return [self[name] for name in self]
+
+    def items(self) -> List[Tuple[str, Any]]:
+        return [(name, self[name]) for name in self]
+
+    def copy(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+    def __reduce__(self):
+        return (dict, (self.copy(),))
+
+
+def write_attr(h5_group: "h5py.Group", name: str, value: Any) -> None:
+    """Store a value as a HDF5 attribute
+
+    Values too large for an attribute are stored as compressed datasets in a separate group instead.
+
+    Args:
+        h5_group:  HDF5 group or file the value is stored on.
+        name:      Name of the attribute.
+        value:     Value to be stored, see encode_h5attr().
+    """
+    encoded_value = encode_h5attr(value)
+    large_attrs = h5_group.get(LARGE_ATTRS)
+    if large_attrs is not None and name in large_attrs:
+        del large_attrs[name]
+
+    if isinstance(encoded_value, str) and len(encoded_value) > _MAX_ATTR_SIZE:
+        h5_group.attrs.pop(name, None)
+        data = np.frombuffer(encoded_value.encode("utf-8"), dtype=np.uint8)
+        h5_group.require_group(LARGE_ATTRS).create_dataset(name, data=data, chunks=True, **CODECS["gzip"])
+    else:
+        h5_group.attrs[name] = encoded_value
+
+
+def read_attr(h5_group: "h5py.Group", name: str) -> Any:
+    """Read a value stored by write_attr()"""
+    large_attrs = h5_group.get(LARGE_ATTRS)
+    if large_attrs is not None and name in large_attrs:
+        return decode_h5attr(large_attrs[name][...].tobytes().decode("utf-8"))
+    return decode_h5attr(h5_group.attrs[name])
+
+
+def read_attrs(h5_group: "h5py.Group") -> Dict[str, Any]:
+    """Read all values stored by write_attr() on a HDF5 group"""
+    names = list(h5_group.attrs) + list(h5_group.get(LARGE_ATTRS, ()))
+    return {name: read_attr(h5_group, name) for name in names}
+
+
 def encode_h5attr(data: Any) -> Any:
     """Convert a basic data type to something that can be saved as a hdf5 attribute
 
+    Strings are stored with a str-prefix, while lists, tuples, sets and dicts are stored as JSON with a json-prefix.
+    Numbers and numpy arrays are stored as they are.
+
     Will raise a TypeError if the attribute cannot be saved in a way that allows
     reading and correct interpretation of the attribute.
     """
-    data_type = type(data).__name__
-    error_msg = f"Cannot save attribute to file. Data too complex: {data_type} {data}. Data can only consist of strings, lists, dicts, tuples, sets or numbers"
+    error_msg = (
+        f"Cannot save attribute to file. Data too complex: {type(data).__name__} {data}. Data can only consist of "
+        "strings, lists, dicts, tuples, sets or numbers"
+    )
+    if isinstance(data, str):
+        return _str2h5attr(data)
 
-    try:
-        encoded_data = globals()[f"_{data_type}2h5attr"](data)
-    except KeyError:
-        encoded_data = data
-        # Check if data is considered an dtype('O') by numpy
-        # In which case it is not supported by h5py
-        np_array = np.asarray(data)
-        if np_array.dtype == "O":
-            # Objects is too complex
-            raise TypeError(error_msg)
+    if isinstance(data, (list, tuple, set, frozenset, dict)):
+        try:
+            return f"json {json.dumps(_to_json(data), separators=(',', ':'))}"
+        except (TypeError, ValueError):
+            raise TypeError(error_msg) from None
 
-    try:
-        # Verify that decoding works
-        decode_h5attr(copy.deepcopy(encoded_data))
-    except ValueError:
+    # Check if data is considered an dtype('O') by numpy
+    # In which case it is not supported by h5py
+    if np.asarray(data).dtype == "O":
         raise TypeError(error_msg)
-
-    return encoded_data
+    return data
 
 
 def decode_h5attr(attr: Any) -> Any:
-    """Convert hdf5 attribute back to its original datatype"""
+    """Convert hdf5 attribute back to its original datatype
+
+    Attributes stored as Python literals by earlier versions of Midgard are also understood.
+    """
     try:
         attr_type, _, attr = attr.partition(" ")
+        if attr_type == "json":
+            return json.loads(attr, object_hook=_from_json)
         if "nan" in attr or "inf" in attr:
             # ast.literal_eval does not understand that nan and inf are floats. convert these to strings
             attr = re.sub(r"\bnan\b", "'nan'", attr)
@@ -55,24 +549,32 @@ def decode_h5attr(attr: Any) -> Any:
         return attr
 
 
-def _list2h5attr(data: List[str]) -> str:
-    """Convert a list to a string that can be stored as an HDF5 attribute"""
-    return f"list {str(data)}"
-
-
-def _tuple2h5attr(data: Tuple[str]) -> str:
-    """Convert a list to a string that can be stored as an HDF5 attribute"""
-    return f"tuple {str(data)}"
-
-
-def _set2h5attr(data: Set[str]) -> str:
-    """Convert a list to a string that can be stored as an HDF5 attribute"""
-    return f"set {str(data)}"
-
-
-def _dict2h5attr(data: Dict[str, str]) -> str:
-    """Convert a dictionary to a string that can be stored as an HDF5 attribute"""
-    return f"dict {str(data)}"
+def _to_json(data: Any) -> Any:
+    """Convert data to types understood by JSON, tagging tuples, sets and dicts with non-string keys"""
+    if data is None or isinstance(data, (str, int, float)):
+        return data
+    if isinstance(data, np.generic):
+        return data.item()
+    if isinstance(data, list):
+        return [_to_json(v) for v in data]
+    if isinstance(data, tuple):
+        return {"__tuple__": [_to_json(v) for v in data]}
+    if isinstance(data, (set, frozenset)):
+        return {"__set__": [_to_json(v) for v in data]}
+    if isinstance(data, dict):
+        if all(isinstance(k, str) for k in data) and not (len(data) == 1 and next(iter(data)) in _JSON_TAGS):
+            return {k: _to_json(v) for k, v in data.items()}
+        return {"__dict__": [[_to_json(k), _to_json(v)] for k, v in data.items()]}
+    raise TypeError(f"Cannot convert {type(data).__name__} to JSON")
+
+
+def _from_json(obj: Dict[str, Any]) -> Any:
+    """Convert tagged JSON objects back to tuples, sets and dicts, see _to_json()"""
+    if len(obj) == 1:
+        tag, value = next(iter(obj.items()))
+        if tag in _JSON_TAGS:
+            return _JSON_TAGS[tag](value)
+    return obj
 
 
 def _str2h5attr(data: str) -> str:
@@ -0,0 +1,266 @@
+"""Simple utilities used by Dataset when joining, merging and querying datasets
+
+Key fields are factorized to integer codes by hashing, see factorize(). The codes are ordered like the keys, so that
+joins, intersections and sorting only work on integer arrays instead of comparing Python objects.
+
+Times are compared by their Julian dates normalized to whole days and nanoseconds, so that equal times are equal
+keys regardless of how the Julian date is split between jd1 and jd2.
+"""
+
+# Standard library imports
+from typing import Any, Dict, List, Optional, Tuple
+
+# Third party imports
+import numpy as np
+import pandas as pd
+
+# Nanoseconds in one day, used to normalize times, see _key_columns()
+_NS_PER_DAY = 86_400_000_000_000
+
+# Combined codes of several key columns are compacted before they can overflow, see factorize()
+_MAX_CODES = 2**62
+
+# Types of joins supported by join()
+JOIN_TYPES = ("inner", "left", "outer")
+
+# Reductions supported by aggregate()
+AGGREGATES = ("count", "mean", "rms", "std", "min", "max")
+
+
+def factorize(left_keys: List[Any], right_keys: List[Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """Factorize the keys of two datasets to common integer codes
+
+    Equal keys get equal codes, and codes are ordered like the keys, comparing the key fields in the order given.
+    Rows where any key is missing (nan) get the code -1, and never match other rows.
+
+    Args:
+        left_keys:   Values of each key field in the left dataset.
+        right_keys:  Values of each key field in the right dataset, in the same order as left_keys.
+
+    Returns:
+        Codes of the rows in the left dataset and codes of the rows in the right dataset.
+    """
+    num_left = len(left_keys[0])
+    codes = np.zeros(num_left + len(right_keys[0]), dtype=np.int64)
+    missing = np.zeros(len(codes), dtype=bool)
+    num_codes = 1
+    for left, right in zip(left_keys, right_keys):
+        for column in _key_columns(left, right):
+            column_codes, uniques = pd.factorize(column, sort=True)
+            missing |= column_codes < 0
+            if num_codes * len(uniques) > _MAX_CODES:
+                codes, combined = pd.factorize(codes, sort=True)
+                num_codes = len(combined)
+            codes = codes * len(uniques) + column_codes
+            num_codes *= max(len(uniques), 1)
+
+    codes[~missing] = pd.factorize(codes[~missing], sort=True)[0]
+    codes[missing] = -1
+    return codes[:num_left], codes[num_left:]
+
+
+def join(left_codes: np.ndarray, right_codes: np.ndarray, how: str = "inner") -> Tuple[np.ndarray, np.ndarray]:
+    """Find rows with equal codes in two datasets
+
+    Rows of the result follow the order of the left dataset, with all matches of a left row in the order of the right
+    dataset. For outer joins, right rows without a match are added at the end.
+
+    Args:
+        left_codes:   Codes of the left dataset, see factorize().
+        right_codes:  Codes of the right dataset.
+        how:          Type of join, "inner" for matched rows only, "left" to also keep unmatched left rows and "outer"
+                      to keep all unmatched rows.
+
+    Returns:
+        Indices of rows in the left and the right dataset for each row in the result, -1 where there is no match.
+    """
+    if how not in JOIN_TYPES:
+        raise ValueError(f"Unknown join type {how!r}. Use one of {', '.join(JOIN_TYPES)}")
+
+    # Group the right rows by code, rows with missing keys first
+    right_order = np.argsort(right_codes, kind="stable")
+    right_valid = right_codes >= 0
+    num_codes = max(left_codes.max(initial=-1), right_codes.max(initial=-1)) + 1
+    counts = np.bincount(right_codes[right_valid], minlength=num_codes + 1)
+    starts = np.cumsum(counts) - counts + np.count_nonzero(~right_valid)
+
+    # Repeat each left row once for every match, or once if unmatched rows are kept
+    left_codes_ = np.maximum(left_codes, 0)
+    num_matches = np.where(left_codes >= 0, counts[left_codes_], 0)
+    num_rows = num_matches if how == "inner" else np.maximum(num_matches, 1)
+    left_idx = np.repeat(np.arange(len(left_codes)), num_rows)
+    ends = np.cumsum(num_rows)
+    offsets = np.arange(len(left_idx)) - np.repeat(ends - num_rows, num_rows)
+    if len(right_order):
+        right_pos = np.minimum(np.repeat(starts[left_codes_], num_rows) + offsets, len(right_order) - 1)
+        right_idx = np.where(np.repeat(num_matches > 0, num_rows), right_order[right_pos], -1)
+    else:
+        right_idx = np.full(len(left_idx), -1)
+
+    if how == "outer":
+        matched = np.zeros(len(right_codes), dtype=bool)
+        matched[right_idx[right_idx >= 0]] = True
+        unmatched = np.flatnonzero(~matched)
+        left_idx = np.concatenate((left_idx, np.full(len(unmatched), -1)))
+        right_idx = np.concatenate((right_idx, unmatched))
+
+    return left_idx, right_idx
+
+
+def intersect(left_codes: np.ndarray, right_codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Find the first row of each code found in both datasets, like np.intersect1d
+
+    Args:
+        left_codes:   Codes of the left dataset, see factorize().
+        right_codes:  Codes of the right dataset.
+
+    Returns:
+        Indices of rows in the left and the right dataset, sorted by code.
+    """
+    left_valid = np.flatnonzero(left_codes >= 0)
+    right_valid = np.flatnonzero(right_codes >= 0)
+    _, left_idx, right_idx = np.intersect1d(left_codes[left_valid], right_codes[right_valid], return_indices=True)
+    return left_valid[left_idx], right_valid[right_idx]
+
+
+def sort_order(values: Any) -> Optional[np.ndarray]:
+    """Stable order sorting the values of a field
+
+    Numpy's stable sort merges runs of sorted values in linear time, so merging datasets that are already sorted
+    is cheap.
+
+    Args:
+        values:  Values of a field.
+
+    Returns:
+        Indices sorting the values, None if the values are already sorted.
+    """
+    if hasattr(values, "jd1"):
+        key, _ = factorize([values], [values[:0]])
+    else:
+        key = np.asarray(values)
+    if key.ndim == 1 and np.all(key[:-1] <= key[1:]):
+        return None
+    return np.argsort(key, kind="stable")
+
+
+def _key_columns(left: Any, right: Any) -> List[np.ndarray]:
+    """Values of a key field in both datasets, split into columns that can be factorized"""
+    if hasattr(left, "jd1"):
+        if getattr(right, "scale", None) != getattr(left, "scale", None):
+            right = getattr(right, left.scale)
+        jd1 = np.concatenate((left.jd1, right.jd1))
+        jd2 = np.concatenate((left.jd2, right.jd2))
+        day_1, frac_1 = np.divmod(jd1, 1)
+        day_2, frac_2 = np.divmod(jd2, 1)
+        day, ns = np.divmod(np.round((frac_1 + frac_2) * _NS_PER_DAY).astype(np.int64), _NS_PER_DAY)
+        return [(day_1 + day_2).astype(np.int64) + day, ns]
+
+    values = np.concatenate((np.asarray(left), np.asarray(right)))
+    if values.ndim == 1:
+        return [values]
+    values = values.reshape(len(values), -1)
+    return [values[:, col] for col in range(values.shape[1])]
+
+
+class FieldIndex:
+    """Index of the observations having each distinct value of a field
+
+    The values are factorized to codes, and the observations are grouped by code, so that the observations having a
+    given value are found without comparing all values. Values are compared like `np.asarray(values) == value`.
+    Observations with missing (nan) values are not part of any group.
+    """
+
+    def __init__(self, values: Any) -> None:
+        """Create an index of the values of a field
+
+        Args:
+            values:  1-dimensional values of a field.
+        """
+        self.values = values
+        keys = np.asarray(values)
+        if keys.ndim != 1:
+            raise ValueError(f"Only 1-dimensional fields can be indexed, not {keys.ndim}-dimensional")
+
+        self.codes, _ = pd.factorize(keys, sort=True)
+        self.order = np.argsort(self.codes, kind="stable")
+        num_missing = np.count_nonzero(self.codes < 0)
+        counts = np.bincount(self.codes[self.codes >= 0])
+        self.offsets = np.concatenate(([0], np.cumsum(counts))) + num_missing
+
+        # First observation having each value, sorted by value, and first observation with a missing value
+        self.first = self.order[self.offsets[:-1]]
+        self.first_missing = self.order[: min(num_missing, 1)]
+        self.uniques = keys[self.first]
+
+    @property
+    def num_groups(self) -> int:
+        """Number of distinct values"""
+        return len(self.first)
+
+    def rows(self, code: int) -> np.ndarray:
+        """Observations having the value with the given code, in their original order"""
+        return self.order[self.offsets[code] : self.offsets[code + 1]]
+
+    def lookup(self, value: Any) -> Optional[int]:
+        """Code of a value, -1 if no observations have the value and None if the index can not be used for the value"""
+        if np.ndim(value) != 0:
+            return None
+        try:
+            pos = int(np.searchsorted(self.uniques, value))
+        except (TypeError, ValueError):
+            return None
+        if pos < len(self.uniques) and self.uniques[pos] == value:
+            return pos
+        return -1
+
+    def mask(self, value: Any) -> Optional[np.ndarray]:
+        """Boolean mask of observations having the value, None if the index can not be used for the value"""
+        code = self.lookup(value)
+        if code is None:
+            return None
+        idx = np.zeros(len(self.codes), dtype=bool)
+        if code >= 0:
+            idx[self.rows(code)] = True
+        return idx
+
+
+def aggregate(values: np.ndarray, codes: np.ndarray, funcs: List[str]) -> Dict[str, np.ndarray]:
+    """Reduce the values of each group of observations
+
+    The values are sorted by group once, and each group is reduced as a segment of the sorted values with
+    `np.add.reduceat` and friends. Reductions follow numpy, so that nan values give nan results.
+
+    Args:
+        values:  Values to reduce, either 1- or 2-dimensional.
+        codes:   Group of each value, dense codes starting at 0, see factorize().
+        funcs:   Names of reductions, see AGGREGATES.
+
+    Returns:
+        Dictionary with one value per group for each reduction.
+    """
+    counts = np.bincount(codes)
+    if not len(counts):
+        return {f: np.zeros((0, *values.shape[1:])) for f in funcs}
+
+    values = values[np.argsort(codes, kind="stable")]
+    starts = np.cumsum(counts) - counts
+    num = counts.reshape(-1, *[1] * (values.ndim - 1))
+    reduced = dict()
+    for func in funcs:
+        if func == "count":
+            reduced[func] = counts
+        elif func == "mean":
+            reduced[func] = np.add.reduceat(values, starts, axis=0) / num
+        elif func == "rms":
+            reduced[func] = np.sqrt(np.add.reduceat(values**2, starts, axis=0) / num)
+        elif func == "std":
+            deviation = values - np.repeat(np.add.reduceat(values, starts, axis=0) / num, counts, axis=0)
+            reduced[func] = np.sqrt(np.add.reduceat(deviation**2, starts, axis=0) / num)
+        elif func == "min":
+            reduced[func] = np.minimum.reduceat(values, starts, axis=0)
+        elif func == "max":
+            reduced[func] = np.maximum.reduceat(values, starts, axis=0)
+        else:
+            raise ValueError(f"Unknown aggregate {func!r}. Use one of {', '.join(AGGREGATES)}")
+    return reduced
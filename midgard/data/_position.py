@@ -1,15 +1,18 @@
 """ Module for dealing with positions, velocities and position corrections in different coordinate systems
 """
 # Standard library imports
-from typing import Any, Callable, Dict, List, Tuple
+from collections import namedtuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import copy
 import sys
+import threading
 import weakref
 
 # Third party imports
 import numpy as np
 
 # Midgard imports
+from midgard.data import _h5utils
 from midgard.dev import exceptions
 from midgard.math import rotation
 from midgard.math import ellipsoid
@@ -22,6 +25,12 @@ _SYSTEMS: Dict[str, Dict[str, Callable]] = dict()  # Populated by register_syste
 _CONVERSIONS: Dict[str, Dict[Tuple[str, str], Callable]] = dict()  # Populated by register_system()
 _CONVERSION_HOPS: Dict[str, Dict[Tuple[str, str], List[str]]] = dict()  # Cache for to_system()
 
+# Lock for caches and dependencies of arrays shared between threads converting blocks, see nputil.set_workers()
+_STATE_LOCK = threading.RLock()
+
+# Result of PositionArray.look_angles_to()
+LookAngles = namedtuple("LookAngles", ["azimuth", "elevation", "zenith_distance", "distance", "direction"])
+
 
 def register_attribute(cls: Callable, name: str) -> None:
     """Function used to register new attributes on position arrays
@@ -194,11 +203,16 @@ class PosBase(np.ndarray):
     def CONVERSIONS(self):
         return self._conversions()
 
-    def to_system(self, system: str) -> "PosDeltaBase":
+    def to_system(self, system: str, block_size: Optional[int] = None) -> "PosDeltaBase":
         """Convert to a different system
 
+        Large arrays are converted in blocks of `block_size` rows, so that intermediate systems and temporary arrays
+        are only created for one block at a time. Blocks are converted in parallel threads if enabled by
+        `nputil.set_workers`. Only the final result is cached when converting in blocks.
+
         Args:
-            system:  Name of new system.
+            system:      Name of new system.
+            block_size:  Number of rows converted at a time, default is set by `nputil.set_block_size`.
 
         Returns:
             PosDeltaBase representing the same positions or position deltas in the new system.
@@ -215,6 +229,12 @@ class PosBase(np.ndarray):
         if system in self._cache:
             return self._cache[system]
 
+        # Convert large arrays block by block
+        row_blocks = nputil.blocks(len(self), block_size) if self.ndim == 2 else []
+        if len(row_blocks) > 1:
+            self._cache[system] = self._to_system_blockwise(system, row_blocks)
+            return self._cache[system]
+
         # Convert to new system
         hop = (self.system, system)
         if hop in _CONVERSIONS[self.cls_name]:
@@ -230,6 +250,49 @@ class PosBase(np.ndarray):
             self._cache[one_hop[-1]] = val
         return val
 
+    def _to_system_blockwise(self, system: str, row_blocks: List[slice]) -> "PosDeltaBase":
+        """Convert to a different system one block of rows at a time
+
+        Args:
+            system:      Name of new system.
+            row_blocks:  Slices picking out blocks of rows.
+
+        Returns:
+            PosDeltaBase representing the same positions or position deltas in the new system.
+        """
+        val = np.empty(self.shape)
+
+        def _convert_block(block: slice) -> None:
+            val[block] = self.subset(block, memo={}).to_system(system, block_size=0)
+
+        nputil.map_blocks(_convert_block, row_blocks)
+        return _SYSTEMS[self.cls_name][system].convert_to(self, lambda _: val)
+
+    def _map_rows(self, func: Callable, other: "PosBase") -> np.ndarray:
+        """Apply a row-wise function of this and another array, one block of rows at a time
+
+        Blocks are processed in parallel threads if enabled by `nputil.set_workers`. The other array is split in the
+        same blocks, unless it is a single position which is used for all rows.
+
+        Args:
+            func:   Function called as func(self_block, other_block), returning one value per row.
+            other:  Other array.
+
+        Returns:
+            Array with one value per row.
+        """
+        row_blocks = nputil.blocks(len(self)) if self.ndim == 2 else []
+        if len(row_blocks) <= 1:
+            return func(self, other)
+
+        split_other = other.ndim == 2 and len(other) == len(self)
+
+        def _apply(block: slice) -> np.ndarray:
+            other_block = other.subset(block, memo={}) if split_other else other
+            return np.atleast_1d(func(self.subset(block, memo={}), other_block))
+
+        return np.concatenate(nputil.map_blocks(_apply, row_blocks))
+
     @classmethod
     def unit(cls, field: str = "") -> Tuple[str, ...]:
         """Unit of field"""
@@ -323,11 +386,10 @@ class PosBase(np.ndarray):
 
     def __setitem__(self, key, item):
         self.clear_cache()  # Clear cache when any elements change
-        if self._dependent_objs:
-            for o in self._dependent_objs:
-                if o() is None:
-                    continue
-                o().clear_cache()  # Clear cache of dependent obj
+        with _STATE_LOCK:
+            dependent_objs = list(self._dependent_objs.values())
+        for obj in dependent_objs:
+            obj.clear_cache()  # Clear cache of dependent obj
         return super().__setitem__(key, item)
 
     def __setattr__(self, key, value):
@@ -346,30 +408,48 @@ class PosBase(np.ndarray):
                     pass
         return super().__setattr__(key, value)
 
-    def add_dependency(self, dependency):
-        self._dependent_objs.append(weakref.ref(dependency))
+    def _init_cache(self):
+        """Initialize an empty cache and no dependent objects
+
+        Dependent objects are stored by id, as arrays are not hashable. Dependencies that are garbage collected are
+        removed automatically.
+        """
+        self.__dict__.update(
+            _cache_values=dict(),
+            _cache_version=0,
+            _cache_values_version=0,
+            _dependent_objs=weakref.WeakValueDictionary(),
+        )
+
+    @property
+    def _cache(self):
+        """Cached values, emptied lazily after clear_cache() has been called"""
+        if self._cache_values_version == self._cache_version:
+            return self._cache_values
+
+        with _STATE_LOCK:
+            if self._cache_values_version != self._cache_version:
+                for k, v in self._cache_values.items():
+                    if k in self._systems():
+                        try:
+                            v.other.remove_dependency(v)
+                        except AttributeError:
+                            pass
+                self.__dict__.update(_cache_values=dict(), _cache_values_version=self._cache_version)
+            return self._cache_values
 
-        # Clean out references that have been garbage collected
-        dead_refs = [obj for obj in self._dependent_objs if obj() is None]
-        for element in dead_refs:
-            self._dependent_objs.remove(element)
+    def add_dependency(self, dependency):
+        with _STATE_LOCK:
+            self._dependent_objs[id(dependency)] = dependency
 
     def remove_dependency(self, dependency):
-        try:
-            idx = next(idx for idx, obj in enumerate(self._dependent_objs) if id(obj()) == id(dependency))
-            del self._dependent_objs[idx]
-        except StopIteration:
-            pass
+        with _STATE_LOCK:
+            self._dependent_objs.pop(id(dependency), None)
 
     def clear_cache(self):
-        if getattr(self, "_cache", {}) is not None:
-            for k, v in getattr(self, "_cache", {}).items():
-                if k in self._systems():
-                    try:
-                        v.other.remove_dependency(v)
-                    except AttributeError:
-                        pass
-        super().__setattr__("_cache", dict())
+        """Invalidate the cache, the cached values are removed the next time the cache is used"""
+        if "_cache_version" in self.__dict__:
+            self.__dict__["_cache_version"] += 1
 
     def __getattr__(self, key):
         """Get attributes with dot notation
@@ -526,8 +606,7 @@ class PositionArray(PosBase):
 
     def __array_finalize__(self, obj):
         """Called automatically when a new Position is created"""
-        self._cache = dict()
-        self._dependent_objs = list()
+        self._init_cache()
 
         if obj is None:
             return
@@ -641,7 +720,7 @@ class PositionArray(PosBase):
                 pos_args[attr_name] = attr.subset(idx, memo)
                 memo[old_id_attr] = pos_args[attr_name]
 
-        new_pos = _SYSTEMS[self.cls_name][self.system](val, **pos_args)
+        new_pos = _SYSTEMS[self.cls_name][self.system](val, ellipsoid=self.ellipsoid, **pos_args)
         memo[old_id] = new_pos
         return new_pos
 
@@ -774,6 +853,9 @@ class PositionArray(PosBase):
         if self.other is None:
             raise exceptions.InitializationError("Other position is not defined")
 
+        if self.system == "trs":
+            return self.look_angles.distance
+
         if "distance" not in self._cache:
             self._cache["distance"] = self.distance_to(self.other)
         return self._cache["distance"]
@@ -790,14 +872,59 @@ class PositionArray(PosBase):
         if self.other is None:
             raise exceptions.InitializationError("Other position is not defined")
 
+        if self.system == "trs":
+            return self.look_angles.direction
+
         if "direction" not in self._cache:
             self._cache["direction"] = self.direction_to(self.other)
         return self._cache["direction"]
 
+    def look_angles_to(self, other: "PositionArray") -> LookAngles:
+        """Azimuth, elevation, zenith distance, distance and direction to other positions
+
+        All values are computed in one pass, sharing the direction in TRS and its rotation to the local ENU system.
+        Distance and direction are given in TRS. Rows are processed in blocks, in parallel threads if enabled by
+        `nputil.set_workers`.
+
+        Args:
+            other:  Other position array.
+
+        Returns:
+            Look angles, with one value (or one direction vector) per position.
+        """
+        trs, other_trs = self.trs.pos.val, other.trs.pos.val
+        shape = np.broadcast_shapes(trs.shape, other_trs.shape)
+        trs2enu = np.broadcast_to(self.trs2enu, shape + (3,))
+
+        out = np.empty((int(np.prod(shape[:-1])), 7))
+        nputil.blockwise(
+            _look_angles,
+            np.broadcast_to(trs, shape).reshape(-1, 3),
+            np.broadcast_to(other_trs, shape).reshape(-1, 3),
+            trs2enu.reshape(-1, 3, 3),
+            out=out,
+        )
+        out = out.reshape(shape[:-1] + (7,))
+        return LookAngles(out[..., 0], out[..., 1], out[..., 2], out[..., 3], out[..., 4:])
+
+    @property
+    def look_angles(self) -> LookAngles:
+        """Azimuth, elevation, zenith distance, distance and direction to registered other position"""
+        if self.other is None:
+            raise exceptions.InitializationError("Other position is not defined")
+
+        if "look_angles" not in self._cache:
+            self._cache["look_angles"] = self.look_angles_to(self.other)
+        return self._cache["look_angles"]
+
     def azimuth_to(self, other):
+        return self._map_rows(type(self)._azimuth_to, other)
+
+    def _azimuth_to(self, other):
+        # Use einsum instead of stacked matmul, as the rounding of matmul depends on the number of rows
         trs_dir = self.trs.direction_to(other.trs)
-        east_proj = np.squeeze(nputil.row(trs_dir) @ nputil.col(self.enu_east))
-        north_proj = np.squeeze(nputil.row(trs_dir) @ nputil.col(self.enu_north))
+        east_proj = np.squeeze(np.einsum("...i, ...i", trs_dir, self.enu_east))
+        north_proj = np.squeeze(np.einsum("...i, ...i", trs_dir, self.enu_north))
 
         return np.arctan2(east_proj, north_proj)
 
@@ -807,13 +934,14 @@ class PositionArray(PosBase):
         if self.other is None:
             raise exceptions.InitializationError("Other position is not defined")
 
-        if "azimuth" not in self._cache:
-            self._cache["azimuth"] = self.azimuth_to(self.other)
-        return self._cache["azimuth"]
+        return self.look_angles.azimuth
 
     def elevation_to(self, other):
+        return self._map_rows(type(self)._elevation_to, other)
+
+    def _elevation_to(self, other):
         trs_dir = self.trs.direction_to(other.trs)
-        up_proj = np.squeeze(nputil.row(trs_dir) @ nputil.col(self.enu_up))
+        up_proj = np.squeeze(np.einsum("...i, ...i", trs_dir, self.enu_up))
 
         return np.arcsin(up_proj)
 
@@ -823,9 +951,7 @@ class PositionArray(PosBase):
         if self.other is None:
             raise exceptions.InitializationError("Other position is not defined")
 
-        if "elevation" not in self._cache:
-            self._cache["elevation"] = self.elevation_to(self.other)
-        return self._cache["elevation"]
+        return self.look_angles.elevation
 
     def zenith_distance_to(self, other):
         return np.pi / 2 - self.elevation_to(other)
@@ -833,9 +959,7 @@ class PositionArray(PosBase):
     @property
     @register_field(units=("radians",), dependence="other")
     def zenith_distance(self):
-        if "zenith_distance" not in self._cache:
-            self._cache["zenith_distance"] = np.pi / 2 - self.elevation
-        return self._cache["zenith_distance"]
+        return self.look_angles.zenith_distance
 
     def __add__(self, other):
         """self + other"""
@@ -901,7 +1025,7 @@ class PositionArray(PosBase):
                     pos_args.update({a: memo[fieldname]})
                 else:
                     # the other field has not been read yet
-                    attr_group = h5_group.parent[fieldname]
+                    attr_group = h5_group.file[fieldname.replace(".", "/")]
                     cls_module, _, cls_name = attr_group.attrs["__class__"].rpartition(".")
                     attr_cls = getattr(sys.modules[cls_module], cls_name)
                     arg = attr_cls._read(attr_group, memo)
@@ -916,7 +1040,7 @@ class PositionArray(PosBase):
                 pos_args.update({a: arg})
                 memo[f"{h5_group.attrs['fieldname']}.{a}"] = arg
 
-        val = h5_group[h5_group.attrs["fieldname"]][...]
+        val = _h5utils.read_rows(h5_group[h5_group.attrs["fieldname"]], memo)
 
         pos = cls.create(val, system=system, ellipsoid=ellipsoid_, **pos_args)
         memo[f"{h5_group.attrs['fieldname']}"] = pos
@@ -925,8 +1049,7 @@ class PositionArray(PosBase):
     def _write(self, h5_group, memo):
         h5_group.attrs["system"] = self.system
         h5_group.attrs["ellipsoid"] = self.ellipsoid.name
-        h5_field = h5_group.create_dataset(h5_group.attrs["fieldname"], self.shape, dtype=self.dtype)
-        h5_field[...] = self.val
+        _h5utils.create_dataset(h5_group, h5_group.attrs["fieldname"], self.val, memo)
 
         for a in PositionArray._attributes():
             attr = getattr(self, a, None)
@@ -947,6 +1070,31 @@ class PositionArray(PosBase):
         memo[id(self)] = h5_group.attrs["fieldname"]
 
 
+def _look_angles(trs: np.ndarray, other_trs: np.ndarray, trs2enu: np.ndarray, out: np.ndarray) -> None:
+    """Compute look angles for rows of flat arrays, see PositionArray.look_angles_to
+
+    Args:
+        trs:        Positions in TRS, shape (N, 3).
+        other_trs:  Other positions in TRS, shape (N, 3).
+        trs2enu:    Rotation matrices from TRS to the local ENU system at each position, shape (N, 3, 3).
+        out:        Array with shape (N, 7) the azimuth, elevation, zenith distance, distance and direction are
+                    stored in.
+    """
+    vector = other_trs - trs
+    distance = nputil.norm(vector)
+    direction = vector / nputil.col(distance)
+
+    # Use contiguous rows. For strided input that happens to end close to the output in memory, NumPy falls back to
+    # other implementations of arctan2 and arcsin, with results differing in the last bit
+    east, north, up = np.einsum("nij, nj -> in", trs2enu, direction, order="C")
+
+    out[:, 0] = np.arctan2(east, north)
+    out[:, 1] = np.arcsin(up)
+    out[:, 2] = np.pi / 2 - out[:, 1]
+    out[:, 3] = distance
+    out[:, 4:] = direction
+
+
 class PositionDeltaArray(PosBase):
     """Base class for position deltas
 
@@ -976,8 +1124,7 @@ class PositionDeltaArray(PosBase):
 
     def __array_finalize__(self, obj):
         """Called automatically when a new PositionDelta is created"""
-        self._cache = dict()
-        self._dependent_objs = list()
+        self._init_cache()
 
         if obj is None:
             return
@@ -1263,7 +1410,7 @@ class PositionDeltaArray(PosBase):
                     delta_args.update({a: memo[fieldname]})
                 else:
                     # the other field has not been read yet
-                    attr_group = h5_group.parent[fieldname]
+                    attr_group = h5_group.file[fieldname.replace(".", "/")]
                     cls_module, _, cls_name = attr_group.attrs["__class__"].rpartition(".")
                     attr_cls = getattr(sys.modules[cls_module], cls_name)
                     arg = attr_cls._read(attr_group, memo)
@@ -1278,7 +1425,7 @@ class PositionDeltaArray(PosBase):
                 delta_args.update({a: arg})
                 memo[f"{h5_group.attrs['fieldname']}.{a}"] = arg
 
-        val = h5_group[h5_group.attrs["fieldname"]][...]
+        val = _h5utils.read_rows(h5_group[h5_group.attrs["fieldname"]], memo)
 
         posdelta = cls.create(val, system=system, **delta_args)
         memo[f"{h5_group.attrs['fieldname']}"] = posdelta
@@ -1286,8 +1433,7 @@ class PositionDeltaArray(PosBase):
 
     def _write(self, h5_group, memo):
         h5_group.attrs["system"] = self.system
-        h5_field = h5_group.create_dataset(h5_group.attrs["fieldname"], self.shape, dtype=self.dtype)
-        h5_field[...] = self.val
+        _h5utils.create_dataset(h5_group, h5_group.attrs["fieldname"], self.val, memo)
 
         for a in self._attributes() + ["ref_pos"]:
             attr = getattr(self, a, None)
@@ -1336,8 +1482,7 @@ class VelocityArray(PosBase):
 
     def __array_finalize__(self, obj):
         """Called automatically when a new PositionDelta is created"""
-        self._cache = dict()
-        self._dependent_objs = list()
+        self._init_cache()
 
         if obj is None:
             return
@@ -1409,8 +1554,7 @@ class VelocityDeltaArray(PosBase):
 
     def __array_finalize__(self, obj):
         """Called automatically when a new VelocityDelta is created"""
-        self._cache = dict()
-        self._dependent_objs = list()
+        self._init_cache()
 
         if obj is None:
             return
@@ -1645,7 +1789,7 @@ class PosVelArray(PositionArray):
                     pos_args.update({a: memo[fieldname]})
                 else:
                     # the other field has not been read yet
-                    attr_group = h5_group.parent[fieldname]
+                    attr_group = h5_group.file[fieldname.replace(".", "/")]
                     cls_module, _, cls_name = attr_group.attrs["__class__"].rpartition(".")
                     attr_cls = getattr(sys.modules[cls_module], cls_name)
                     arg = attr_cls._read(attr_group, memo)
@@ -1659,7 +1803,7 @@ class PosVelArray(PositionArray):
                 pos_args.update({a: arg})
                 memo[f"{h5_group.attrs['fieldname']}.{a}"] = arg
 
-        val = h5_group[h5_group.attrs["fieldname"]][...]
+        val = _h5utils.read_rows(h5_group[h5_group.attrs["fieldname"]], memo)
         posvel = cls.create(val, system=system, ellipsoid=ellipsoid_, **pos_args)
         memo[f"{h5_group.attrs['fieldname']}"] = posvel
         return posvel
@@ -1667,8 +1811,7 @@ class PosVelArray(PositionArray):
     def _write(self, h5_group, memo):
         h5_group.attrs["system"] = self.system
         h5_group.attrs["ellipsoid"] = self.ellipsoid.name
-        h5_field = h5_group.create_dataset(h5_group.attrs["fieldname"], self.shape, dtype=self.dtype)
-        h5_field[...] = self.val
+        _h5utils.create_dataset(h5_group, h5_group.attrs["fieldname"], self.val, memo)
 
         for a in PosVelArray._attributes():
             attr = getattr(self, a, None)
@@ -1783,7 +1926,7 @@ class PosVelDeltaArray(PositionDeltaArray):
                     delta_args.update({a: memo[fieldname]})
                 else:
                     # the other field has not been read yet
-                    attr_group = h5_group.parent[fieldname]
+                    attr_group = h5_group.file[fieldname.replace(".", "/")]
                     cls_module, _, cls_name = attr_group.attrs["__class__"].rpartition(".")
                     attr_cls = getattr(sys.modules[cls_module], cls_name)
                     arg = attr_cls._read(attr_group, memo)
@@ -1798,7 +1941,7 @@ class PosVelDeltaArray(PositionDeltaArray):
                 delta_args.update({a: arg})
                 memo[f"{h5_group.attrs['fieldname']}.{a}"] = arg
 
-        val = h5_group[h5_group.attrs["fieldname"]][...]
+        val = _h5utils.read_rows(h5_group[h5_group.attrs["fieldname"]], memo)
 
         posveldelta = cls.create(val, system=system, **delta_args)
         memo[f"{h5_group.attrs['fieldname']}"] = posveldelta
@@ -1806,8 +1949,7 @@ class PosVelDeltaArray(PositionDeltaArray):
 
     def _write(self, h5_group, memo):
         h5_group.attrs["system"] = self.system
-        h5_field = h5_group.create_dataset(h5_group.attrs["fieldname"], self.shape, dtype=self.dtype)
-        h5_field[...] = self.val
+        _h5utils.create_dataset(h5_group, h5_group.attrs["fieldname"], self.val, memo)
 
         for a in self._attributes() + ["ref_pos"]:
             attr = getattr(self, a, None)
@@ -1,10 +1,13 @@
 """Array with time epochs
 """
 # Standard library imports
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 from datetime import datetime, timedelta
-from typing import Callable, Dict, List, Optional, Tuple, Any, TypeVar
-from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Set, Tuple, Any, TypeVar
+from functools import lru_cache, wraps
+import sys
+import threading
+import weakref
 
 try:
     import importlib.resources as importlib_resources  # Python >= 3.7
@@ -15,6 +18,7 @@ except ImportError:
 import numpy as np
 
 # Midgard imports
+from midgard.data import _h5utils
 from midgard.dev import exceptions
 from midgard.math.unit import Unit
 from midgard.math.constant import constant
@@ -27,6 +31,23 @@ _FORMAT_UNITS: Dict[str, Dict[str, str]] = dict()  # Populated by register_forma
 
 # Type specification: scalar float or numpy array
 np_float = TypeVar("np_float", float, np.ndarray)
+np_int = TypeVar("np_int", int, np.ndarray)
+
+# Calendar fields calculated directly from Julian dates
+Calendar = namedtuple("Calendar", ["year", "month", "day", "doy", "microsecond"])
+_JD2000 = 2_451_544.5  # Julian date of 2000-01-01 00:00
+_US_PER_DAY = 86_400_000_000
+_CUMULATIVE_DAYS = np.array([0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334])
+_MONTH_DAYS = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+_DT64_2000 = np.datetime64("2000-01-01T00:00:00", "us")
+_DT64_MIN = np.datetime64(datetime.min, "us")
+_DT64_MAX = np.datetime64(datetime.max, "us")
+
+# Default memory limit for the conversion caches of all time arrays, see ConversionCache
+_CACHE_MAX_BYTES = 1024 ** 3
+
+# Fields in fixed width text templates, see _text2jds() and _jds2text()
+_TEMPLATE_FIELDS = ("Y", "y", "M", "D", "J", "h", "m", "s", "S", "f")
 
 
 #######################################################################################################################
@@ -112,6 +133,353 @@ def _find_conversion_hops(cls: str, hop: Tuple[str, str]) -> List[Tuple[str, str
     raise exceptions.UnknownConversionError(f"Can't convert TimeArray from {start_scale!r} to {target_scale!r}")
 
 
+def _days2us(days: "np_float") -> np.ndarray:
+    """Convert days to integer microseconds
+
+    The rounding mimics `datetime.timedelta(days=days)` exactly: the integer and fractional parts of the days are
+    converted separately, and the remaining fraction of a microsecond is rounded half to even.
+
+    Args:
+        days:  Scalar or array with number of days.
+
+    Returns:
+        Integer array with number of microseconds.
+    """
+    days = np.asarray(days, dtype=float)
+    int_days = np.trunc(days)
+    us = (days - int_days) * float(_US_PER_DAY)
+    int_us = np.trunc(us)
+    leftover = us - int_us
+
+    whole_us = int_days.astype(np.int64) * _US_PER_DAY + int_us.astype(np.int64)
+    abs_leftover = np.abs(leftover)
+    round_away = (abs_leftover > 0.5) | ((abs_leftover == 0.5) & (whole_us % 2 == 1))
+    return whole_us + np.where(round_away, np.sign(leftover), 0).astype(np.int64)
+
+
+def _jds2calendar(jd1: "np_float", jd2: "np_float") -> "Calendar":
+    """Convert Julian dates to calendar fields using integer arithmetic
+
+    The epochs are first rounded to whole microseconds the same way as the datetime format does, before the date is
+    found with the algorithm of Fliegel and Van Flandern (1968).
+
+    Args:
+        jd1:  Scalar or array with first part of Julian dates.
+        jd2:  Scalar or array with second part of Julian dates.
+
+    Returns:
+        Calendar tuple with year, month, day, day of year and microsecond of day.
+    """
+    us = _days2us(np.asarray(jd1) - _JD2000) + _days2us(jd2)
+    days, us_of_day = np.divmod(us, _US_PER_DAY)
+
+    # Fliegel and Van Flandern, Communications of the ACM, 11 (10), 1968
+    l = days + int(_JD2000 + 0.5) + 68_569
+    n = 4 * l // 146_097
+    l = l - (146_097 * n + 3) // 4
+    i = 4000 * (l + 1) // 1_461_001
+    l = l - 1461 * i // 4 + 31
+    j = 80 * l // 2447
+    day = l - 2447 * j // 80
+    l = j // 11
+    month = j + 2 - 12 * l
+    year = 100 * (n - 49) + i + l
+
+    is_leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    doy = _CUMULATIVE_DAYS[month - 1] + day + ((month > 2) & is_leap)
+
+    fields = (year, month, day, doy, us_of_day)
+    if np.ndim(us) == 0:
+        return Calendar(*[int(f) for f in fields])
+    return Calendar(*fields)
+
+
+def _calendar2jds(
+    year: np.ndarray, doy: np.ndarray, us_of_day: np.ndarray, sub_us: "np_float" = 0.0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Convert calendar fields to Julian dates using integer arithmetic
+
+    The inverse of `_jds2calendar`. Microseconds past the end of the day are carried over to the next day.
+
+    Args:
+        year:       Integer array with years.
+        doy:        Integer array with day of year.
+        us_of_day:  Integer array with microsecond of day.
+        sub_us:     Fraction of microsecond, for precision beyond microseconds.
+
+    Returns:
+        Tuple with first and second part of Julian dates.
+    """
+    years_before = year - 1
+    days_before = 365 * years_before + years_before // 4 - years_before // 100 + years_before // 400
+    days, us_of_day = np.divmod(us_of_day, _US_PER_DAY)
+
+    # 1_721_426 is the Julian day number of January 1st year 1
+    jd1 = (1_721_426 + days_before + doy - 1 + days) - 0.5
+    jd2 = (us_of_day / 10 ** 6 + sub_us * 1e-6) / Unit.day2seconds
+    return jd1, jd2
+
+
+@lru_cache()
+def _template_fields(template: str) -> List[Tuple[Optional[str], int, int]]:
+    """Split a fixed width text template into fields and literal text
+
+    Returns:
+        List of (field, start, stop) where field is None for literal text.
+    """
+    fields = list()
+    start = 0
+    for idx in range(1, len(template) + 1):
+        if idx == len(template) or template[idx] != template[start] or template[start] not in _TEMPLATE_FIELDS:
+            field = template[start] if template[start] in _TEMPLATE_FIELDS else None
+            fields.append((field, start, idx))
+            start = idx
+    return fields
+
+
+def _text2jds(val: np.ndarray, template: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """Convert fixed width text to Julian dates using NumPy
+
+    The text is viewed as a byte buffer, and each field is read as columns of digits. The template uses the codes in
+    `_TEMPLATE_FIELDS`: Y is a 4-digit year, y a 2-digit year, M month, D day of month, J day of year, h hour, m
+    minute, s second, S second of day and f fraction of second. A trailing fraction of second is optional, may have
+    any number of digits and is kept with precision beyond microseconds.
+
+    Args:
+        val:       Strings to convert.
+        template:  Fixed width template the strings should follow.
+
+    Returns:
+        Tuple with first and second part of Julian dates, or None if some of the strings do not follow the template.
+    """
+    main_template, dot, fraction = template.partition(".")
+    try:
+        text = np.ascontiguousarray(np.asarray(val).astype(bytes).reshape(-1))
+    except (UnicodeEncodeError, ValueError):
+        return None
+
+    width = len(main_template)
+    if text.dtype.itemsize < width:
+        return None
+    chars = text.view(np.uint8).reshape(-1, text.dtype.itemsize)
+
+    # Read digit columns of each field, and check that the literal text is as expected
+    values = dict()
+    for field, start, stop in _template_fields(main_template):
+        columns = chars[:, start:stop]
+        if field is None:
+            if not np.all(columns == np.frombuffer(main_template[start:stop].encode(), dtype=np.uint8)):
+                return None
+            continue
+        digits = columns.astype(np.int64) - ord("0")
+        if np.any((digits < 0) | (digits > 9)):
+            return None
+        values[field] = digits @ 10 ** np.arange(stop - start - 1, -1, -1)
+
+    # Optional fraction of second, padded with NUL bytes for shorter strings
+    us = np.zeros(len(chars), dtype=np.int64)
+    sub_us = 0.0
+    tail = chars[:, width:]
+    if tail.shape[1] > 0:
+        if not (dot and "f" in fraction):
+            if np.any(tail):
+                return None
+        else:
+            has_dot = tail[:, 0] == ord(dot)
+            digits = tail[:, 1:].astype(np.int64) - ord("0")
+            is_digit = (digits >= 0) & (digits <= 9)
+            if (
+                not np.all(has_dot | (tail[:, 0] == 0))
+                or np.any(~is_digit & (tail[:, 1:] != 0))
+                or np.any(is_digit & ~has_dot[:, None])
+                or np.any(np.diff(is_digit.astype(np.int8), axis=1) > 0)
+            ):
+                return None
+            digits = np.where(is_digit, digits, 0)
+            digits = np.pad(digits, ((0, 0), (0, max(0, 18 - digits.shape[1]))))[:, :18]
+            us = digits[:, :6] @ 10 ** np.arange(5, -1, -1)
+            sub_us = (digits[:, 6:] @ 10 ** np.arange(11, -1, -1)) / 1e12
+
+    # Validate fields the same way as datetime.strptime does
+    year = values["Y"] if "Y" in values else values["y"] + np.where(values["y"] < 69, 2000, 1900)
+    is_leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    is_valid = year > 0
+    if "J" in values:
+        doy = values["J"]
+        is_valid &= (doy >= 1) & (doy <= 365 + is_leap)
+    else:
+        month, day = values["M"], values["D"]
+        is_valid &= (month >= 1) & (month <= 12)
+        month_idx = np.clip(month - 1, 0, 11)
+        is_valid &= (day >= 1) & (day <= _MONTH_DAYS[month_idx] + ((month == 2) & is_leap))
+        doy = _CUMULATIVE_DAYS[month_idx] + day + ((month > 2) & is_leap)
+
+    if "S" in values:
+        seconds = values["S"]
+    else:
+        hour, minute, second = [values.get(f, 0) for f in "hms"]
+        is_valid &= (hour < 24) & (minute < 60) & (second < 60)
+        seconds = (hour * 60 + minute) * 60 + second
+    if not np.all(is_valid):
+        return None
+
+    return _calendar2jds(year, doy, seconds * 10 ** 6 + us, sub_us)
+
+
+def _jds2text(jd1: "np_float", jd2: "np_float", template: str) -> np.ndarray:
+    """Convert Julian dates to fixed width text using NumPy
+
+    The inverse of `_text2jds`. The text is written column by column into a byte buffer. A fraction of second is
+    written with as many digits as in the template, up to microseconds.
+
+    Args:
+        jd1:       First part of Julian dates.
+        jd2:       Second part of Julian dates.
+        template:  Fixed width template, see `_text2jds`.
+
+    Returns:
+        Array of strings.
+    """
+    calendar = _jds2calendar(np.atleast_1d(jd1), np.atleast_1d(jd2))
+    us_of_day = calendar.microsecond
+    values = dict(
+        Y=calendar.year,
+        y=calendar.year % 100,
+        M=calendar.month,
+        D=calendar.day,
+        J=calendar.doy,
+        h=us_of_day // 3_600_000_000,
+        m=us_of_day // 60_000_000 % 60,
+        s=us_of_day // 1_000_000 % 60,
+        S=us_of_day // 1_000_000,
+    )
+
+    chars = np.empty((len(us_of_day), len(template)), dtype=np.uint8)
+    chars[:] = np.frombuffer(template.encode(), dtype=np.uint8)
+    for field, start, stop in _template_fields(template):
+        if field is None:
+            continue
+        value = values[field] if field != "f" else us_of_day % 1_000_000 // 10 ** (6 - (stop - start))
+        for col in range(start, stop):
+            chars[:, col] = ord("0") + value // 10 ** (stop - col - 1) % 10
+
+    return chars.view(f"S{len(template)}").reshape(-1).astype(str)
+
+
+def _nbytes(value: Any) -> int:
+    """Estimate the memory used by a cached value"""
+    if isinstance(value, TimeBase):
+        return value.nbytes + np.asarray(value.jd1).nbytes + np.asarray(value.jd2).nbytes
+    if isinstance(value, tuple):
+        return sum(_nbytes(v) for v in value)
+    if isinstance(value, np.ndarray):
+        if value.dtype == object and value.size > 0:
+            return value.nbytes + value.size * sys.getsizeof(value.flat[0])
+        return value.nbytes
+    return sys.getsizeof(value)
+
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "evictions", "nbytes", "max_bytes"])
+
+
+class ConversionCache:
+    """Bookkeeping for the conversion caches of time arrays
+
+    Conversions to other scales and formats, and derived properties, are cached in the `_cache` dictionary of each
+    time array, and live only as long as the time array itself. This class keeps track of the memory used by all
+    these caches together, and evicts the least recently used values when the total exceeds `max_bytes`.
+
+    The bookkeeping is shared by all time arrays, and is locked so that time arrays can be converted from several
+    threads, see `nputil.set_workers`. Values are calculated outside the lock.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Tuple[int, str], int]" = OrderedDict()  # (id, key) -> nbytes
+        self._keys: Dict[int, Set[str]] = dict()
+        self._refs: Dict[int, weakref.ref] = dict()
+        self._lock = threading.RLock()  # Reentrant, as objects may be garbage collected while the lock is held
+
+    def get(self, obj: "TimeBase", key: str, func: Callable[[], Any]) -> Any:
+        """Get a value from the cache of obj, calling func to calculate it if it is not cached"""
+        with self._lock:
+            if key in obj._cache:
+                self.hits += 1
+                self._entries.move_to_end((id(obj), key))
+                return obj._cache[key]
+            self.misses += 1
+
+        value = func()
+        self.add(obj, key, value)
+        return value
+
+    def add(self, obj: "TimeBase", key: str, value: Any) -> None:
+        """Add a value to the cache of obj"""
+        obj_id = id(obj)
+        nbytes = _nbytes(value)
+        with self._lock:
+            if obj_id not in self._refs:
+                self._refs[obj_id] = weakref.ref(obj, lambda _, obj_id=obj_id: self._forget(obj_id))
+            self._discard(obj_id, key)
+
+            obj._cache[key] = value
+            self._entries[(obj_id, key)] = nbytes
+            self._keys.setdefault(obj_id, set()).add(key)
+            self.nbytes += nbytes
+
+            # Evict least recently used values
+            while self.nbytes > self.max_bytes and self._entries:
+                (evict_id, evict_key), _ = next(iter(self._entries.items()))
+                evict_obj = self._refs[evict_id]()
+                if evict_obj is not None:
+                    evict_obj._cache.pop(evict_key, None)
+                self._discard(evict_id, evict_key)
+                self.evictions += 1
+
+    def clear(self, obj: Optional["TimeBase"] = None) -> None:
+        """Clear the cache of obj, or of all time arrays if obj is not given"""
+        with self._lock:
+            obj_ids = list(self._keys) if obj is None else [id(obj)]
+            for obj_id in obj_ids:
+                cached_obj = self._refs[obj_id]() if obj_id in self._refs else None
+                if cached_obj is not None:
+                    cached_obj._cache.clear()
+                self._forget(obj_id)
+
+    def info(self) -> CacheInfo:
+        """Statistics about the use of the cache"""
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.evictions, self.nbytes, self.max_bytes)
+
+    def _discard(self, obj_id: int, key: str) -> None:
+        """Remove the bookkeeping of one cached value"""
+        nbytes = self._entries.pop((obj_id, key), None)
+        if nbytes is not None:
+            self.nbytes -= nbytes
+            self._keys[obj_id].discard(key)
+
+    def _forget(self, obj_id: int) -> None:
+        """Remove the bookkeeping of all values cached on one object, called when the object is garbage collected"""
+        with self._lock:
+            for key in self._keys.pop(obj_id, set()):
+                self.nbytes -= self._entries.pop((obj_id, key))
+            self._refs.pop(obj_id, None)
+
+
+def _cache_on_instance(func: Callable) -> Callable:
+    """Decorator caching the value of a method without arguments in the conversion cache of the time array"""
+
+    @wraps(func)
+    def wrapper(self):
+        return _CONVERSION_CACHE.get(self, func.__name__, lambda: func(self))
+
+    return wrapper
+
+
 ######################################################################################################################
 # Time classes
 ######################################################################################################################
@@ -131,34 +499,35 @@ class TimeBase(np.ndarray):
             formats = ", ".join(cls._formats())
             raise exceptions.UnknownSystemError(f"Format {fmt!r} unknown. Use one of {formats}")
 
-        # Convert to numpy array and read format
-        fmt_values = cls._formats()[fmt](val, val2, cls.scale)
+        # Values are already formatted when the Julian dates are given, store them as they are
+        if _jd1 is not None and _jd2 is not None:
+            return cls._from_formatted(val, fmt, _jd1, _jd2)
 
-        val = np.asarray(val)
-        if val2 is not None:
-            val2 = np.asarray(val2)
-            if val2.shape != val.shape:
-                raise ValueError(f"'val2' must have the same shape as 'val': {val.shape}")
+        if val2 is not None and np.shape(val2) != np.shape(val):
+            raise ValueError(f"'val2' must have the same shape as 'val': {np.shape(val)}")
 
-            if val2.ndim == 0:
-                val2 = val2.item()
+        # Read format and store values on array
+        fmt_values = cls._formats()[fmt](val, val2, cls.scale)
+        return cls._from_formatted(fmt_values.value, fmt, fmt_values.jd1, fmt_values.jd2)
 
-        if val.ndim == 0:
-            val = val.item()
+    @classmethod
+    def _from_formatted(cls, fmt_value, fmt, jd1, jd2):
+        """Create a new time array from formatted values and the corresponding Julian dates
 
-        # Store values on array
-        if cls._formats()[fmt].ndim > 1:
-            obj = np.asarray(fmt_values.value).T.view(cls)
-        else: 
-            obj = np.asarray(fmt_values.value).view(cls)
-        jd1 = fmt_values.jd1 if _jd1 is None else _jd1
-        jd2 = fmt_values.jd2 if _jd2 is None else _jd2
+        The formatted values are not derived again from the Julian dates, and neither values nor Julian dates are
+        copied.
+        """
+        if isinstance(fmt_value, tuple):
+            # Formats with more than one value per epoch, like gps_ws
+            obj = np.asarray(fmt_value).T.view(cls)
+        else:
+            obj = np.asarray(fmt_value).view(cls)
 
         # Validate shape
         fmt_ndim = cls._formats()[fmt].ndim
         if obj.ndim > fmt_ndim:
             raise ValueError(
-                f"{type(self).__name__!r} must be a {fmt_ndim - 1} or {fmt_ndim}-dimensional array for format type {obj_fmt}"
+                f"{cls.__name__!r} must be a {fmt_ndim - 1} or {fmt_ndim}-dimensional array for format type {fmt}"
             )
 
         # Freeze
@@ -169,6 +538,7 @@ class TimeBase(np.ndarray):
         super(TimeBase, obj).__setattr__("fmt", fmt)
         super(TimeBase, obj).__setattr__("jd1", jd1)
         super(TimeBase, obj).__setattr__("jd2", jd2)
+        super(TimeBase, obj).__setattr__("_cache", dict())
 
         if isinstance(obj, np.ndarray):
             obj.flags.writeable = False
@@ -183,6 +553,7 @@ class TimeBase(np.ndarray):
 
         # Copy attributes from the original object
         super().__setattr__("fmt", obj_fmt)
+        super().__setattr__("_cache", dict())
 
         jd1_sliced = getattr(obj, "_jd1_sliced", None)
         if jd1_sliced is not None:
@@ -226,11 +597,10 @@ class TimeBase(np.ndarray):
 
         return self.jd > other.jd
 
-    @lru_cache()
     def to_scale(self, scale: str) -> "TimeBase":
         """Convert to a different scale
  
-        Returns a new array with the same time in the new scale.
+        Returns a new array with the same time in the new scale. The conversion is cached on the array.
  
         Args:
             scale:  Name of new scale.
@@ -247,6 +617,11 @@ class TimeBase(np.ndarray):
             scales = ", ".join(self._scales())
             raise exceptions.UnknownSystemError(f"Scale {scale!r} unknown. Use one of {scales}")
 
+        return _CONVERSION_CACHE.get(self, scale, lambda: self._to_scale(scale))
+
+    def _to_scale(self, scale: str) -> "TimeBase":
+        """Convert to a different scale without using the cache"""
+
         # Simplified conversion if time is None
         if self.shape == () and self.item() == None: # time is None
             return _SCALES[self.cls_name][scale](val=None, fmt=self.fmt, _jd1=None, _jd2=None)
@@ -264,10 +639,13 @@ class TimeBase(np.ndarray):
             _CONVERSION_HOPS[self.cls_name][hop] = _find_conversion_hops(self.cls_name, hop)
 
         converted_time = self
-        for one_hop in _CONVERSION_HOPS[self.cls_name][hop]:
+        hops = _CONVERSION_HOPS[self.cls_name][hop]
+        for one_hop in hops:
             jd1, jd2 = _CONVERSIONS[self.cls_name][one_hop](converted_time)
+            # Only the final scale is formatted, intermediate scales use the cheap jd format
+            fmt = self.fmt if one_hop is hops[-1] else "jd"
             try:
-                converted_time = self._scales()[one_hop[-1]].from_jds(jd1, jd2, self.fmt)
+                converted_time = self._scales()[one_hop[-1]].from_jds(jd1, jd2, fmt)
             except ValueError:
                 # Given format does not exist for selected time scale, use default jd
                 converted_time = self._scales()[one_hop[-1]].from_jds(jd1, jd2, "jd")
@@ -279,9 +657,9 @@ class TimeBase(np.ndarray):
         if old_id in memo:
             return memo[old_id]
 
-        new_time = self._scales()[self.scale](
-            np.asarray(self)[idx], fmt=self.fmt, _jd1=self.jd1[idx], _jd2=self.jd2[idx]
-        )
+        # Slices are views sharing the values and Julian dates with the original array. Indexing the plain arrays
+        # instead of self does not touch any state on self, so subsets can be created from several threads.
+        new_time = self._from_formatted(np.asarray(self)[idx], self.fmt, self.jd1[idx], self.jd2[idx])
         memo[old_id] = new_time
         return new_time
 
@@ -399,7 +777,7 @@ class TimeBase(np.ndarray):
 
         return scales_and_formats
 
-    @lru_cache()
+    @_cache_on_instance
     def plot_fields(self):
         """Returns list of attributes that can be plotted"""
         obj = self if len(self) == 1 else self[0]
@@ -427,9 +805,25 @@ class TimeBase(np.ndarray):
         else:
             return self._unit
 
-    @lru_cache()
     def to_format(self, fmt: str):
-        return self._formats()[fmt].from_jds(self.jd1, self.jd2, scale=self.scale)
+        """Convert to a different format, the conversion is cached on the array"""
+        return _CONVERSION_CACHE.get(
+            self, fmt, lambda: self._formats()[fmt].from_jds(self.jd1, self.jd2, scale=self.scale)
+        )
+
+    def clear_cache(self) -> None:
+        """Clear cached conversions and properties of this array"""
+        _CONVERSION_CACHE.clear(self)
+
+    @staticmethod
+    def cache_info() -> CacheInfo:
+        """Statistics about the conversion caches of all time arrays"""
+        return _CONVERSION_CACHE.info()
+
+    @staticmethod
+    def set_cache_size(max_bytes: int) -> None:
+        """Set the maximum memory used by the conversion caches of all time arrays"""
+        _CONVERSION_CACHE.max_bytes = max_bytes
 
     def __hash__(self):
         try:
@@ -472,12 +866,18 @@ class TimeBase(np.ndarray):
         raise AttributeError(f"{self.__class__.__name__} object does not support item assignment ")
 
     def __copy__(self):
-        return self.create(val=self.val.copy(), fmt=self.fmt, scale=self.scale, _jd1=self.jd1, _jd2=self.jd2)
+        """Copy a TimeArray
+
+        Time arrays are immutable, so the copy shares values and Julian dates with the original array.
+        """
+        return self._from_formatted(self.val, self.fmt, self.jd1, self.jd2)
 
     def __deepcopy__(self, memo):
         """Deep copy a TimeArray
+
+        Time arrays are immutable, so the copy shares values and Julian dates with the original array.
         """
-        time = self.create(val=self.val.copy(), fmt=self.fmt, scale=self.scale, _jd1=self.jd1, _jd2=self.jd2)
+        time = self._from_formatted(self.val, self.fmt, self.jd1, self.jd2)
         memo[id(time)] = time
         return time
 
@@ -485,29 +885,38 @@ class TimeBase(np.ndarray):
     copy = __copy__
 
     def __getitem__(self, item):
-        """Update _jd*_sliced with correct shape, used by __array_finalize__"""
-        if not isinstance(item, tuple):
+        """Slice values and Julian dates together
+
+        The sliced Julian dates are stored temporarily in _jd*_sliced, where they are picked up by
+        __array_finalize__. Slices are views sharing the underlying buffers with the original array.
+        """
+        if isinstance(item, tuple):
             # super.__getitem__ and other super methods (like __repr__) will send in a tuple to 
             # recursively access all individual elements.
             # Do not update _jd*_sliced when this happens.
             # TODO: What if the user is indexing the TimeArray with a tuple?
-            if isinstance(self.jd1, np.ndarray):
-                super().__setattr__("_jd1_sliced", self.jd1[item])
-            if isinstance(self.jd2, np.ndarray):
-                super().__setattr__("_jd2_sliced", self.jd2[item])
-        
-        if isinstance(item, (int, np.int_)):
+            return super().__getitem__(item)
+
+        jd1 = self.jd1[item] if isinstance(self.jd1, np.ndarray) else None
+        jd2 = self.jd2[item] if isinstance(self.jd2, np.ndarray) else None
+        if isinstance(item, (int, np.integer)):
             # Make a new time object if a single entry is requested
-            return self._scales()[self.scale].from_jds(self._jd1_sliced, self._jd2_sliced, self.fmt)
-        
-        return super().__getitem__(item) # __array_finalize__ is called when this finishes
-    
+            return self._scales()[self.scale].from_jds(jd1, jd2, self.fmt)
+
+        super().__setattr__("_jd1_sliced", jd1)
+        super().__setattr__("_jd2_sliced", jd2)
+        try:
+            return super().__getitem__(item)  # __array_finalize__ is called when this finishes
+        finally:
+            self.__dict__.pop("_jd1_sliced", None)
+            self.__dict__.pop("_jd2_sliced", None)
+
     @classmethod
     def _read(cls, h5_group, memo):
         scale = h5_group.attrs["scale"]
         fmt = h5_group.attrs["fmt"]
-        jd1 = h5_group["jd1"][...]
-        jd2 = h5_group["jd2"][...]
+        jd1 = _h5utils.read_rows(h5_group["jd1"], memo)
+        jd2 = _h5utils.read_rows(h5_group["jd2"], memo)
         time = cls._cls_scale(scale).from_jds(jd1, jd2, fmt)
         memo[f"{h5_group.attrs['fieldname']}"] = time
         return time
@@ -515,10 +924,8 @@ class TimeBase(np.ndarray):
     def _write(self, h5_group, memo):
         h5_group.attrs["scale"] = self.scale
         h5_group.attrs["fmt"] = self.fmt
-        h5_field = h5_group.create_dataset("jd1", self.jd1.shape, dtype=self.jd1.dtype)
-        h5_field[...] = self.jd1
-        h5_field = h5_group.create_dataset("jd2", self.jd2.shape, dtype=self.jd2.dtype)
-        h5_field[...] = self.jd2
+        _h5utils.create_dataset(h5_group, "jd1", self.jd1, memo)
+        _h5utils.create_dataset(h5_group, "jd2", self.jd2, memo)
 
     def __dir__(self):
         """List all fields and attributes on the Time array"""
@@ -558,64 +965,63 @@ class TimeArray(TimeBase):
     def _formats(cls):
         return _FORMATS["TimeFormat"]
 
+    @property
+    @_cache_on_instance
+    def _calendar(self):
+        """Calendar fields of the epochs
+
+        The fields are calculated directly from `jd1` and `jd2`, and give the same values as the `datetime` format
+        without creating any datetime objects.
+
+        Returns:
+            Calendar tuple with year, month, day, day of year and microsecond of day.
+        """
+        return _jds2calendar(self.jd1, self.jd2)
+
     @property
     @Unit.register(("year",))
-    @lru_cache()
+    @_cache_on_instance
     def year(self):
-        if isinstance(self.datetime, datetime):
-            return self.datetime.year
-        return np.array([d.year for d in self.datetime])
+        return self._calendar.year
 
     @property
-    @lru_cache()
+    @_cache_on_instance
     @Unit.register(("month",))
     def month(self):
-        if isinstance(self.datetime, datetime):
-            return self.datetime.month
-        return np.array([d.month for d in self.datetime])
+        return self._calendar.month
 
     @property
-    @lru_cache()
+    @_cache_on_instance
     @Unit.register(("day",))
     def day(self):
-        if isinstance(self.datetime, datetime):
-            return self.datetime.day
-        return np.array([d.day for d in self.datetime])
+        return self._calendar.day
 
     @property
-    @lru_cache()
+    @_cache_on_instance
     @Unit.register(("hour",))
     def hour(self):
-        if isinstance(self.datetime, datetime):
-            return self.datetime.hour
-        return np.array([d.hour for d in self.datetime])
+        return self._calendar.microsecond // 3_600_000_000
 
     @property
-    @lru_cache()
+    @_cache_on_instance
     @Unit.register(("minute",))
     def minute(self):
-        if isinstance(self.datetime, datetime):
-            return self.datetime.minute
-        return np.array([d.minute for d in self.datetime])
+        return self._calendar.microsecond // 60_000_000 % 60
 
     @property
-    @lru_cache()
+    @_cache_on_instance
     @Unit.register(("second",))
     def second(self):
-        if isinstance(self.datetime, datetime):
-            return self.datetime.second
-        return np.array([d.second for d in self.datetime])
+        return self._calendar.microsecond // 1_000_000 % 60
 
     @property
-    @lru_cache()
+    @_cache_on_instance
     @Unit.register(("day",))
     def doy(self):
-        if isinstance(self.datetime, datetime):
-            return self.datetime.timetuple().tm_yday
-        return np.array([d.timetuple().tm_yday for d in self.datetime])
+        return self._calendar.doy
 
     @property
-    @lru_cache()
+    @_cache_on_instance
     @Unit.register(("second",))
     def sec_of_day(self):
         """Seconds since midnight
@@ -625,12 +1031,10 @@ class TimeArray(TimeBase):
         Returns:
             Seconds since midnight
         """
-        if isinstance(self.datetime, datetime):
-            return self.datetime.hour * 60 * 60 + self.datetime.minute * 60 + self.datetime.second
-        return np.array([d.hour * 60 * 60 + d.minute * 60 + d.second for d in self.datetime])
+        return self._calendar.microsecond // 1_000_000
 
     @property
-    @lru_cache()
+    @_cache_on_instance
     def mean(self):
         """Mean time
 
@@ -643,17 +1047,17 @@ class TimeArray(TimeBase):
         return self._cls_scale(self.scale)(np.mean(self.utc.jd), fmt="jd")
 
     @property
-    @lru_cache()
+    @_cache_on_instance
     def min(self):
         return self[np.argmin(self.jd)]
 
     @property
-    @lru_cache()
+    @_cache_on_instance
     def max(self):
         return self[np.argmax(self.jd)]
 
     @property
-    @lru_cache()
+    @_cache_on_instance
     def jd_int(self):
         """Integer part of Julian Day
 
@@ -667,7 +1071,7 @@ class TimeArray(TimeBase):
         return self.jd1 - self._jd_delta
 
     @property
-    @lru_cache()
+    @_cache_on_instance
     def jd_frac(self):
         """Fractional part of Julian Day
 
@@ -679,7 +1083,7 @@ class TimeArray(TimeBase):
         return self.jd2 + self._jd_delta
 
     @property
-    @lru_cache()
+    @_cache_on_instance
     def _jd_delta(self):
         """Delta between jd1 and jd_int
 
@@ -692,7 +1096,7 @@ class TimeArray(TimeBase):
         return self.jd1 - (np.floor(self.jd - 0.5) + 0.5)
 
     @property
-    @lru_cache()
+    @_cache_on_instance
     def mjd_int(self):
         """Integer part of Modified Julian Day
 
@@ -704,7 +1108,7 @@ class TimeArray(TimeBase):
         return self.jd_int - 2_400_000.5
 
     @property
-    @lru_cache()
+    @_cache_on_instance
     def mjd_frac(self):
         """Fractional part of Modified Julian Day
 
@@ -784,7 +1188,7 @@ class TimeDeltaArray(TimeBase):
         """
         return _SCALES[other.scale](np.full(other.shape, fill_value=timedelta(seconds=0)), fmt="timedelta")
 
-    @lru_cache()
+    @_cache_on_instance
     def plot_fields(self):
         """Returns list of attributes that can be plotted"""
         obj = self if len(self) == 1 else self[0]
@@ -877,12 +1281,32 @@ class TimeDeltaArray(TimeBase):
 # Time deltas
 
 
-def delta_tai_utc(time: "TimeArray") -> "np_float":
-    try:
-        idx = [np.argmax(np.logical_and(t.jd >= _TAIUTC["start"], t.jd < _TAIUTC["end"])) for t in time]
-    except TypeError:
-        idx = np.argmax(np.logical_and(time.jd >= _TAIUTC["start"], time.jd < _TAIUTC["end"]))
+def _taiutc_idx(jd: "np_float") -> "np_int":
+    """Find the rows of the TAI-UTC table with the leap second intervals of the given epochs
+
+    The table is searched with a binary search over the start of the intervals. Epochs outside the table use the
+    first row. If all epochs are in the same interval, the index of that row is returned as a scalar.
+
+    Args:
+        jd:  Julian dates in UTC.
+
+    Returns:
+        Scalar or array with indices into the TAI-UTC table.
+    """
+    jd = np.asarray(jd)
+    if jd.size > 1:
+        # Fast path when there is no leap second within the epochs
+        idx = np.searchsorted(_TAIUTC["start"], jd.min(), side="right") - 1
+        if idx >= 0 and jd.max() < _TAIUTC["end"][idx]:
+            return idx
+
+    idx = np.searchsorted(_TAIUTC["start"], jd, side="right") - 1
+    is_outside = (idx < 0) | ~(jd < _TAIUTC["end"][idx])
+    return np.where(is_outside, 0, idx)
 
+
+def delta_tai_utc(time: "TimeArray") -> "np_float":
+    idx = _taiutc_idx(time.jd)
     delta = _TAIUTC["offset"][idx] + (time.mjd - _TAIUTC["ref_epoch"][idx]) * _TAIUTC["factor"][idx]
 
     if time.scale == "utc":
@@ -892,11 +1316,7 @@ def delta_tai_utc(time: "TimeArray") -> "np_float":
         tmp_utc_jd = time.tai.jd - delta * Unit.seconds2day
         tmp_utc_mjd = time.tai.mjd - delta * Unit.seconds2day
 
-        try:
-            idx = [np.argmax(np.logical_and(t >= _TAIUTC["start"], t < _TAIUTC["end"])) for t in tmp_utc_jd]
-        except TypeError:
-            idx = np.argmax(np.logical_and(tmp_utc_jd >= _TAIUTC["start"], tmp_utc_jd < _TAIUTC["end"]))
-
+        idx = _taiutc_idx(tmp_utc_jd)
         delta = _TAIUTC["offset"][idx] + (tmp_utc_mjd - _TAIUTC["ref_epoch"][idx]) * _TAIUTC["factor"][idx]
         return -delta * Unit.seconds2day
 
@@ -1172,17 +1592,18 @@ class TimeDateTime(TimeFormat):
 
     @classmethod
     def _to_jds(cls, val, val2=None, scale=None):
-        try:
-            if val2 is not None:
-                val = np.asarray(val) + np.asarray(val2)
-            return np.array([cls._dt2jd(dt) for dt in val]).T
-        except TypeError:
-            if val2 is not None:
-                val = val + val2
-            return cls._dt2jd(val)
+        dt = np.asarray(val, dtype="datetime64[us]")
+        if val2 is not None:
+            dt = dt + np.asarray(val2, dtype="timedelta64[us]")
+
+        days, us = np.divmod((dt - _DT64_2000).astype(np.int64), _US_PER_DAY)
+        jd1 = cls._jd2000 + days
+        jd2 = us / 10 ** 6 / cls.day2seconds
+        if np.ndim(jd1) == 0:
+            return float(jd1), float(jd2)
+        return jd1, jd2
 
     @classmethod
-    @lru_cache()
     def _dt2jd(cls, dt):
         """Convert one datetime to one Julian date pair"""
         delta = dt - cls._dt2000
@@ -1195,13 +1616,16 @@ class TimeDateTime(TimeFormat):
 
     @classmethod
     def _from_jds(cls, jd1, jd2, scale=None):
-        try:
-            return np.array([cls._jd2dt(j1, j2) for j1, j2 in zip(jd1, jd2)])
-        except TypeError:
-            return cls._jd2dt(jd1, jd2)
+        us = _days2us(np.asarray(jd1) - cls._jd2000) + _days2us(jd2)
+        dt = _DT64_2000 + us.astype("timedelta64[us]")
+        if np.any(dt < _DT64_MIN) or np.any(dt > _DT64_MAX):
+            raise OverflowError("date value out of range")
+
+        if np.ndim(dt) == 0:
+            return dt.item()
+        return dt.astype(object)
 
     @classmethod
-    @lru_cache()
     def _jd2dt(cls, jd1, jd2):
         """Convert one Julian date to a datetime"""
         return cls._dt2000 + timedelta(days=jd1 - cls._jd2000) + timedelta(days=jd2)
@@ -1403,62 +1827,66 @@ class TimeDecimalYear(TimeFormat):
         return (t_end - t_start).days
 
 
-@register_format
-class TimeYyDddSssss(TimeFormat):
-    """ Time as 2 digit year, doy and second of day.
-
-    Text based format "yy:ddd:sssss"
-        yy     - decimal year without century
-        ddd    - zero padded decimal day of year
-        sssss  - zero padded seconds since midnight
+# Text based time formats
 
-        Note   -  Does not support leap seconds
 
-        Returns:
-            Time converted to yydddssss format
+class TimeStr(TimeFormat):
+    """ Base class for text based time.
 
+    Arrays of text following the fixed width `_template` are converted with NumPy, see `_text2jds` and `_jds2text`.
+    Other text is parsed one string at a time using the `_dt_fmt` format.
     """
 
-    fmt = "yydddsssss"
     unit = None
+    _dt_fmt = None
+    _template = None
 
     @classmethod
     def _to_jds(cls, val, val2=None, scale=None):
         if val2 is not None:
-            raise ValueError(f"val2 should be None (not {val2}) for format {fmt}")
+            raise ValueError(f"val2 should be None (not {val2}) for format {cls.fmt}")
 
-        try:
-            return np.array([cls._yds2jd(v) for v in val]).T
-        except TypeError:
-            cls._yds2jd(val)
+        jds = _text2jds(val, cls._template)
+        if jds is not None:
+            jd1, jd2 = jds
+            if np.ndim(val) == 0:
+                return float(jd1[0]), float(jd2[0])
+            return jd1, jd2
 
-    @classmethod
-    @lru_cache()
-    def _yds2jd(cls, val):
-        dt = datetime.strptime(val[:7], "%y:%j:") + timedelta(seconds=float(val[7:]))
-        return TimeDateTime._dt2jd(dt)
+        # Fall back to parsing one string at a time
+        if np.ndim(val) == 0:
+            return TimeDateTime._dt2jd(cls._str2dt(str(val)))
+        else:
+            return np.array([TimeDateTime._dt2jd(cls._str2dt(isot)) for isot in val]).T
 
     @classmethod
     def _from_jds(cls, jd1, jd2, scale=None):
-        try:
-            return np.array([cls._jd2yds(j1, j2) for j1, j2 in zip(jd1, jd2)])
-        except TypeError:
-            return cls._jd2yds(jd1, jd2)
+        text = _jds2text(jd1, jd2, cls._template)
+        if np.ndim(jd1) == 0:
+            return text.item()
+        return text
 
     @classmethod
-    @lru_cache()
-    def _jd2yds(cls, jd1, jd2):
-        dt = TimeDateTime._jd2dt(jd1, jd2)
-        delta = (dt - datetime(dt.year, dt.month, dt.day)).seconds
-        return dt.strftime("%y:%j:") + str(delta).zfill(5)
+    def _str2dt(cls, time_str):
+        # fractional parts are optional
+        main_str, _, fraction = time_str.partition(".")
+        if fraction and set(fraction) != "0":
+            # Truncate fraction to 6 digits due to limits of datetime
+            frac = float(f"0.{fraction}")
+            fraction = f"{frac:8.6f}"[2:]
+            time_str = f"{main_str}.{fraction}"
+            return datetime.strptime(time_str, cls._dt_fmt)
+        else:
+            fmt_str, _, _ = cls._dt_fmt.partition(".")
+            return datetime.strptime(main_str, fmt_str)
 
 
 @register_format
-class TimeYyyyDddSssss(TimeFormat):
-    """ Time as 4-digit year, doy and second of day.
+class TimeYyDddSssss(TimeStr):
+    """ Time as 2 digit year, doy and second of day.
 
-    Text based format "yyyy:ddd:sssss"
-        yyyy   - decimal year with century
+    Text based format "yy:ddd:sssss"
+        yy     - decimal year without century
         ddd    - zero padded decimal day of year
         sssss  - zero padded seconds since midnight
 
@@ -1469,85 +1897,36 @@ class TimeYyyyDddSssss(TimeFormat):
 
     """
 
-    fmt = "yyyydddsssss"
-    unit = None
-
-    @classmethod
-    def _to_jds(cls, val, val2=None, scale=None):
-        if val2 is not None:
-            raise ValueError(f"val2 should be None (not {val2}) for format {fmt}")
-
-        try:
-            return np.array([cls._yds2jd(v) for v in val]).T
-        except TypeError:
-            cls._yds2jd(val)
-
-    @classmethod
-    @lru_cache()
-    def _yds2jd(cls, val):
-        dt = datetime.strptime(val[:9], "%Y:%j:") + timedelta(seconds=float(val[9:]))
-        return TimeDateTime._dt2jd(dt)
-
-    @classmethod
-    def _from_jds(cls, jd1, jd2, scale=None):
-        try:
-            return np.array([cls._jd2yds(j1, j2) for j1, j2 in zip(jd1, jd2)])
-        except TypeError:
-            return cls._jd2yds(jd1, jd2)
+    fmt = "yydddsssss"
+    _template = "yy:JJJ:SSSSS"
 
     @classmethod
-    @lru_cache()
-    def _jd2yds(cls, jd1, jd2):
-        dt = TimeDateTime._jd2dt(jd1, jd2)
-        delta = (dt - datetime(dt.year, dt.month, dt.day)).seconds
-        return dt.strftime("%Y:%j:") + str(delta).zfill(5)
-
-
-# Text based time formats
+    def _str2dt(cls, time_str):
+        return datetime.strptime(time_str[:7], "%y:%j:") + timedelta(seconds=float(time_str[7:]))
 
 
-class TimeStr(TimeFormat):
-    """ Base class for text based time. """
+@register_format
+class TimeYyyyDddSssss(TimeStr):
+    """ Time as 4-digit year, doy and second of day.
 
-    unit = None
-    _dt_fmt = None
+    Text based format "yyyy:ddd:sssss"
+        yyyy   - decimal year with century
+        ddd    - zero padded decimal day of year
+        sssss  - zero padded seconds since midnight
 
-    @classmethod
-    def _to_jds(cls, val, val2=None, scale=None):
-        if val2 is not None:
-            raise ValueError(f"val2 should be None (not {val2}) for format {cls.fmt}")
+        Note   -  Does not support leap seconds
 
-        if isinstance(val, str):
-            return TimeDateTime._dt2jd(cls._str2dt(val))
-        else:
-            return np.array([TimeDateTime._dt2jd(cls._str2dt(isot)) for isot in val]).T
+        Returns:
+            Time converted to yydddssss format
 
-    @classmethod
-    def _from_jds(cls, jd1, jd2, scale=None):
-        try:
-            return np.array([cls._dt2str(TimeDateTime._jd2dt(j1, j2)) for j1, j2 in zip(jd1, jd2)])
-        except TypeError:
-            return cls._dt2str(TimeDateTime._jd2dt(jd1, jd2))
+    """
 
-    @classmethod
-    @lru_cache()
-    def _dt2str(cls, dt):
-        return dt.strftime(cls._dt_fmt)
+    fmt = "yyyydddsssss"
+    _template = "YYYY:JJJ:SSSSS"
 
     @classmethod
-    @lru_cache()
     def _str2dt(cls, time_str):
-        # fractional parts are optional
-        main_str, _, fraction = time_str.partition(".")
-        if fraction and set(fraction) != "0":
-            # Truncate fraction to 6 digits due to limits of datetime
-            frac = float(f"0.{fraction}")
-            fraction = f"{frac:8.6f}"[2:]
-            time_str = f"{main_str}.{fraction}"
-            return datetime.strptime(time_str, cls._dt_fmt)
-        else:
-            fmt_str, _, _ = cls._dt_fmt.partition(".")
-            return datetime.strptime(main_str, fmt_str)
+        return datetime.strptime(time_str[:9], "%Y:%j:") + timedelta(seconds=float(time_str[9:]))
 
 
 @register_format
@@ -1556,6 +1935,7 @@ class TimeIsot(TimeStr):
 
     fmt = "isot"
     _dt_fmt = "%Y-%m-%dT%H:%M:%S.%f"
+    _template = "YYYY-MM-DDThh:mm:ss.ffffff"
 
 
 @register_format
@@ -1564,6 +1944,7 @@ class TimeIso(TimeStr):
 
     fmt = "iso"
     _dt_fmt = "%Y-%m-%d %H:%M:%S.%f"
+    _template = "YYYY-MM-DD hh:mm:ss.ffffff"
 
 
 @register_format
@@ -1571,6 +1952,7 @@ class TimeYearDoy(TimeStr):
 
     fmt = "yday"
     _dt_fmt = "%Y:%j:%H:%M:%S.%f"
+    _template = "YYYY:JJJ:hh:mm:ss.ffffff"
 
 
 @register_format
@@ -1578,6 +1960,7 @@ class TimeDate(TimeStr):
 
     fmt = "date"
     _dt_fmt = "%Y-%m-%d"
+    _template = "YYYY-MM-DD"
 
 
 # Time Delta Formats
@@ -1697,3 +2080,4 @@ class TimeDeltaDateTime(TimeDeltaFormat):
 # Execute on import
 #######################################################################################################################
 _TAIUTC = read_tai_utc()
+_CONVERSION_CACHE = ConversionCache(max_bytes=_CACHE_MAX_BYTES)
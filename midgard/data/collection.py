@@ -29,10 +29,13 @@ class Collection:
     def fields(self):
         """Names of fields and nested fields in the collection"""
         all_fields = list()
-        for fieldname, field in self._fields.items():
+        pending = getattr(self._fields, "pending", ())  # Fields not yet read from file are not collections
+        for fieldname in self._fields:
             all_fields.append(fieldname)
+            if fieldname in pending:
+                continue
             try:
-                all_fields.extend([f"{fieldname}.{f}" for f in field.fields])
+                all_fields.extend([f"{fieldname}.{f}" for f in self._fields[fieldname].fields])
             except AttributeError:
                 pass
 
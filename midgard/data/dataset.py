@@ -7,9 +7,10 @@ Description:
 # Standard library imports
 from collections import UserDict
 import copy
+import io
 import numbers
 import pathlib
-from typing import Any, Callable, Dict, List, Optional, Union, Hashable, Collection
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union, Hashable, Collection
 
 # Third party imports
 import h5py
@@ -22,13 +23,17 @@ from midgard.collections import enums
 from midgard.dev import exceptions
 from midgard.dev import log
 from midgard.data import _h5utils
+from midgard.data import _joinutils
 from midgard.data import fieldtypes
+from midgard.data.fieldtypes import _fieldtype
 from midgard.data import collection
 from midgard.data.time import Time
+from midgard.files import files
+from midgard.math import nputil
 from midgard.math.unit import Unit
 
-# Version of Dataset
-__version__ = "3.0"
+# Version of Dataset. The major version is increased when files can not be read by earlier versions
+__version__ = "4.0"
 
 
 class Dataset(collection.Collection):
@@ -43,11 +48,43 @@ class Dataset(collection.Collection):
         self.meta = Meta()
         self.vars = dict()
         self._num_obs = num_obs
+        self._h5_file = None  # Open file when reading lazily, see read()
+        self._indexes = dict()  # Indexes of fields, built when first used, see create_index()
 
     @classmethod
-    def read(cls, file_path: Union[str, pathlib.Path]) -> "Dataset":
-        """Read a dataset from file"""
+    def read(
+        cls,
+        file_path: Union[str, pathlib.Path],
+        fields: Optional[List[str]] = None,
+        rows: Union[None, slice, np.ndarray] = None,
+        lazy: bool = False,
+        mmap: bool = False,
+    ) -> "Dataset":
+        """Read a dataset from file
+
+        Only the given fields and rows are read from file. Fields referenced by the selected fields, for instance
+        the reference position of a position delta, are read as well, but are not added to the dataset.
+
+        In lazy mode, the file is kept open and each field is read the first time it is accessed. Use `load()` to
+        read the remaining fields and close the file, or `close()` to close the file without reading them. The file
+        is also closed when leaving a `with` block using the dataset, or when the dataset is garbage collected.
+
+        With mmap, float and bool fields written with the "none" codec are read-only views of the file instead of
+        copies in memory, so that several processes reading the same file share its pages. Selecting rows with a
+        slice keeps the views, mapping only the selected rows, while a mask or indices copies the selected rows. The
+        file stays mapped as long as any of the views exist, also when the dataset is subset. Use `subset` with
+        compact to copy subsets keeping only a small part of a mapped field, so that the mapping can be closed.
 
+        Args:
+            file_path:  Path to the HDF5 file.
+            fields:     Names of fields to read, nested fields are named like "collection.field". Default is all.
+            rows:       Rows to read given as a slice, a boolean mask or integer indices. Default is all rows.
+            lazy:       Whether to read fields when they are first accessed instead of immediately.
+            mmap:       Whether to memory map float and bool fields instead of reading them.
+
+        Returns:
+            Dataset with the data read from file.
+        """
         log.debug(f"Read dataset from {file_path}")
 
         # Dictionary to keep track of references in the data structure
@@ -55,21 +92,63 @@ class Dataset(collection.Collection):
         memo = {}
 
         # Read fields from file
-        with h5py.File(file_path, mode="r") as h5_file:
+        h5_file = h5py.File(file_path, mode="r")
+        try:
+            _check_version(h5_file)
+
+            # Only read the number of rows given by the file, see write(mode="a")
             num_obs = h5_file.attrs["num_obs"]
-            dset = cls(num_obs=num_obs)
-            dset.vars.update(_h5utils.decode_h5attr(h5_file.attrs["vars"]))
+            rows = _h5utils.select_rows(slice(None) if rows is None else rows, num_obs)
+            memo[_h5utils.ROWS] = rows
+            if mmap:
+                memo[_h5utils.MMAP] = True
+            dset = cls(num_obs=_h5utils.num_rows(rows, num_obs))
+            dset.vars.update(_h5utils.read_attr(h5_file, "vars"))
 
             # Read fields
-            for fieldname, fieldtype in _h5utils.decode_h5attr(h5_file.attrs["fields"]).items():
-                field = fieldtypes.function(fieldtype).read(h5_file[fieldname], memo)
-                dset._fields[fieldname] = field
-                memo[fieldname] = field.data
+            dset._fields = fieldtypes.read_fields(h5_file, memo, fields=fields, lazy=lazy)
 
             # Read meta
             dset.meta.read(h5_file["__meta__"])
+        except BaseException:
+            h5_file.close()
+            raise
+
+        if lazy:
+            dset._h5_file = h5_file
+        else:
+            h5_file.close()
         return dset
 
+    def load(self) -> None:
+        """Read all remaining fields of a lazily read dataset and close the file"""
+
+        def _load(fields):
+            for field in fields.values():
+                if field.fieldtype == "collection":
+                    _load(field.data._fields)
+
+        _load(self._fields)
+        self.close()
+
+    def close(self) -> None:
+        """Close the file of a lazily read dataset, fields not yet read can no longer be accessed"""
+        h5_file, self._h5_file = self._h5_file, None
+        if h5_file is not None:
+            h5_file.close()
+
+    def __enter__(self) -> "Dataset":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def __del__(self) -> None:
+        """Close the file of a lazily read dataset that is never loaded"""
+        h5_file = self.__dict__.get("_h5_file")  # Avoid __getattr__, as __init__ may not have run
+        if h5_file is not None:
+            h5_file.close()
+
     @classmethod
     def from_dict(cls, data):
         """ Convert a simple data dictionary to a dataset.
@@ -97,46 +176,169 @@ class Dataset(collection.Collection):
             field.fill_memo(memo)
         return memo
 
-    def write(self, file_path: Union[str, pathlib.Path], write_level: Optional[enums.WriteLevel] = None) -> None:
-        """Write a dataset to file"""
+    def write(
+        self,
+        file_path: Union[str, pathlib.Path],
+        write_level: Optional[enums.WriteLevel] = None,
+        codec: str = "none",
+        field_codecs: Optional[Dict[str, str]] = None,
+        chunk_rows: Optional[int] = None,
+        dictionary_text: Optional[bool] = None,
+        mode: str = "w",
+    ) -> None:
+        """Write a dataset to file
+
+        By default, fields are stored in contiguous, uncompressed HDF5 datasets and text is stored as plain strings.
+        Attributes are encoded as JSON, so the files can only be read by Midgard versions with Dataset v4.0 or later.
+        Fields can instead be stored in chunked and compressed datasets using the codecs "gzip" or "lzf" (faster, but
+        less compression and only readable through h5py), and text fields can be dictionary encoded, storing each
+        distinct string once. Codecs can be chosen for all fields, for types of fields like "float" or "text", or for
+        individual fields. Text fields stored with a codec are dictionary encoded, unless `dictionary_text` is given.
+        All codecs shuffle the bytes of the values before compressing them, which helps compressing float values.
+        The options are recorded in the file, so reading the dataset needs no extra arguments.
+
+        With mode "a", the observations are appended to the dataset already stored in the file, like `extend`. Files
+        written with mode "a" store all fields in resizable datasets, also with the "none" codec. The new rows are
+        added to the existing datasets if the fields match and the datasets are resizable, so the stored fields are
+        neither read nor encoded again. Otherwise, the file is read, extended and rewritten with resizable datasets,
+        so that later appends do not need to rewrite it. The other storage options of an existing file are kept.
+
+        Files are always written to a temporary file replacing the original file when done, so that readers never see
+        a partially written file, and a failing write leaves the file unchanged. Appending therefore starts by copying
+        the bytes of the file to the temporary file.
+
+        Args:
+            file_path:        Path to the HDF5 file.
+            write_level:      Only fields with at least this write level are written.
+            codec:            Codec used for all fields.
+            field_codecs:     Codecs used for types of fields or individual fields, overriding `codec`. Nested fields
+                              are named like "collection.field". Codecs of fields override codecs of types.
+            chunk_rows:       Number of rows in each chunk of compressed datasets, default is chosen by h5py.
+            dictionary_text:  Whether to dictionary encode text fields, by default if they are stored with a codec.
+            mode:             "w" to overwrite the file, "a" to append to the dataset in the file.
+        """
         write_level = (
             min(enums.get_enum("write_level")) if write_level is None else enums.get_value("write_level", write_level)
         )
-        log.debug(f"Write dataset to {file_path} with {write_level}")
+        storage = _h5utils.storage_options(codec, field_codecs, chunk_rows, dictionary_text, resizable=mode == "a")
+        if mode not in ("w", "a"):
+            raise ValueError(f"Mode must be 'w' or 'a', not {mode!r}")
+
+        # Read all fields of a lazily read dataset, as the file it was read from may be overwritten
+        self.load()
 
-        # Make sure directory exists
         file_path = pathlib.Path(file_path).resolve()
-        file_path.parent.mkdir(parents=True, exist_ok=True)
+        if mode == "a" and file_path.exists():
+            self._append_to_file(file_path, write_level)
+            return
 
+        log.debug(f"Write dataset to {file_path} with {write_level} and {codec} codec")
+        with files.replace_atomically(file_path) as tmp_path, h5py.File(tmp_path, mode="w") as h5_file:
+            self._write_to_h5(h5_file, write_level, storage)
+
+    def _write_to_h5(self, h5_file: h5py.File, write_level: enums.WriteLevel, storage: Dict[str, Any]) -> None:
+        """Write fields, meta and information about the dataset to an open HDF5 file"""
         memo = self._construct_memo()
-        with h5py.File(file_path, mode="w") as h5_file:
-
-            # Write each field
-            for field_name, field in self._fields.items():
-                if field.write_level >= write_level:
-                    h5_group = h5_file.create_group(field_name)
-                    field.write(h5_group, memo, write_level=write_level)
-
-            # Write meta-information
-            self.meta.write(h5_file.create_group("__meta__"))
-
-            # Write information about dataset
-            fields = {fn: f.fieldtype for fn, f in self._fields.items() if f.write_level >= write_level}
-            h5_file.attrs["fields"] = _h5utils.encode_h5attr(fields)
-            h5_file.attrs["num_obs"] = self.num_obs
-            h5_file.attrs["vars"] = _h5utils.encode_h5attr(self.vars)
-            h5_file.attrs["version"] = self.version
-
-    def subset(self, idx: np.array) -> None:
-        """Remove observations from all fields based on index"""
+        _h5utils.write_storage_options(h5_file, storage)
+        field_types = {n: self.field(n).fieldtype for n in self.fields}
+        memo[_h5utils.STORAGE] = _h5utils.field_storage_options(storage, field_types)
+
+        # Write each field
+        for field_name, field in self._fields.items():
+            if field.write_level >= write_level:
+                h5_group = h5_file.create_group(field_name)
+                field.write(h5_group, memo, write_level=write_level)
+
+        # Write meta-information
+        self.meta.write(h5_file.create_group("__meta__"))
+
+        # Write information about dataset
+        fields = {fn: f.fieldtype for fn, f in self._fields.items() if f.write_level >= write_level}
+        h5_file.attrs["fields"] = _h5utils.encode_h5attr(fields)
+        h5_file.attrs["num_obs"] = self.num_obs
+        _h5utils.write_attr(h5_file, "vars", self.vars)
+        h5_file.attrs["version"] = self.version
+
+    def _append_to_file(self, file_path: pathlib.Path, write_level: enums.WriteLevel) -> None:
+        """Append observations to the dataset stored in a file, see write()"""
+        with files.replace_atomically(file_path, copy=True) as tmp_path:
+            with h5py.File(tmp_path, mode="r+") as h5_file, h5py.File(io.BytesIO(), mode="w") as new_file:
+                storage = {**_h5utils.read_storage_options(h5_file), "resizable": True}
+                self._write_to_h5(new_file, write_level, storage)
+                appended = self._append_h5(h5_file, new_file)
+
+            if appended:
+                log.debug(f"Appended {self.num_obs} observations to {file_path}")
+                return
+
+            # Fall back to rewriting the whole file, read from the original file as the copy may be partly appended
+            log.debug(f"Rewrite {file_path} to append {self.num_obs} observations")
+            dset = self.read(file_path)
+            dset.extend(self)
+            dset.vars.update(self.vars)
+            with h5py.File(tmp_path, mode="w") as h5_file:
+                dset._write_to_h5(h5_file, write_level, storage)
+
+    def _append_h5(self, h5_file: h5py.File, new_file: h5py.File) -> bool:
+        """Append rows, meta and vars in new_file to h5_file. Return False if rows can not be appended in place
+
+        The rows are written after the rows counted by the num_obs attribute, replacing any rows after them.
+        """
+        _check_version(h5_file)
+        fields = _h5utils.decode_h5attr(h5_file.attrs["fields"])
+        if fields != _h5utils.decode_h5attr(new_file.attrs["fields"]):
+            return False
+        num_obs = h5_file.attrs["num_obs"]
+        for field_name in fields:
+            if not _h5utils.append_rows(h5_file[field_name], new_file[field_name], num_obs):
+                return False
+
+        # Update meta, vars and the number of observations
+        meta = Meta()
+        meta.read(h5_file["__meta__"])
+        meta.update(self.meta)
+        del h5_file["__meta__"]
+        meta.write(h5_file.create_group("__meta__"))
+        dset_vars = _h5utils.read_attr(h5_file, "vars")
+        dset_vars.update(self.vars)
+        _h5utils.write_attr(h5_file, "vars", dset_vars)
+        h5_file.attrs["version"] = self.version
+        h5_file.attrs["num_obs"] = num_obs + self.num_obs
+        return True
+
+    def subset(self, idx: Union[np.array, slice], compact: bool = False) -> None:
+        """Remove observations from all fields based on index
+
+        When idx is a slice, or selects a contiguous range of observations, the fields become views of the original
+        values instead of copies. Observations may also be picked, in any order, by integer indices.
+
+        With compact, values of float, bool and text fields are moved to the start of their existing arrays instead of
+        being copied to new ones, when idx is a boolean mask or increasing integer indices. The old values are
+        overwritten, so only use this when the values are not shared with other datasets or variables. Views keeping
+        only a small part of memory mapped values, see `read`, are copied when compacting.
+
+        Args:
+            idx:      Boolean mask, integer indices or slice of observations to keep.
+            compact:  Reuse the existing arrays of the fields, overwriting the old values, and copy small views of
+                      memory mapped values.
+        """
         # Dictionary to keep track of object references
         # key: object id before slicing, value: object after slicing
-        memo = dict()
+        memo = {_fieldtype.COMPACT: compact}
+
+        if isinstance(idx, slice):
+            row_slice = idx
+            num_obs = len(range(*idx.indices(self.num_obs)))
+        else:
+            row_slice = nputil.as_slice(idx, size=self.num_obs)
+            idx = np.asarray(idx)
+            num_obs = int(np.sum(idx)) if idx.dtype == bool else len(idx)
 
         for field in self._fields.values():
-            field.subset(idx, memo)
+            field.subset(idx if row_slice is None else row_slice, memo)
 
-        self._num_obs = int(np.sum(idx))
+        self._num_obs = num_obs
+        self._indexes = dict.fromkeys(self._indexes)
 
     def extend(self, other_dataset: "Dataset", meta_key=None) -> None:
         """Add observations from another dataset to the end of this dataset"""
@@ -149,6 +351,7 @@ class Dataset(collection.Collection):
 
         self._extend(other_dataset, memo)
         self._num_obs += other_dataset.num_obs
+        self._indexes = dict.fromkeys(self._indexes)
 
         # Extend meta
         if meta_key is None:
@@ -159,6 +362,9 @@ class Dataset(collection.Collection):
     def merge_with(self, *dsets, sort_by=None, meta_key=None):
         """Merge in observations from other datasets 
 
+        The merged observations are sorted with a stable sort, keeping the order of observations with equal sort_by
+        values. Merging datasets that are already sorted only merges the sorted runs of observations.
+
         Args:
             other_dset (Sequence): List of Datasets
             sort_by (str):         Name of field to be used for sorting the merged data
@@ -170,7 +376,9 @@ class Dataset(collection.Collection):
 
         memo = dict()
         if sort_by is not None:
-            sort_idx = np.argsort(np.asarray(getattr(self, sort_by)))
+            sort_idx = _joinutils.sort_order(getattr(self, sort_by))
+            if sort_idx is None:
+                return
 
             for field in self._fields.values():
                 field.subset(sort_idx, memo)
@@ -202,17 +410,11 @@ class Dataset(collection.Collection):
             other_idx = np.ones(len(other), dtype=bool)
         else:
             _index_by = index_by.split(",")
-            self_index_data = [self[n.strip()] for n in _index_by]
-            other_index_data = [other[n.strip()] for n in _index_by]
-            # intersect1d does not like to compare unicode strings of different lengths
-            # use object as dtype for all fields to avoid the problem
-            
-            dtype_self = np.dtype([(f"f{i}", "O") for i, _ in enumerate(self_index_data)])
-            dtype_other = np.dtype([(f"f{i}", "O") for i, _ in enumerate(other_index_data)])
-            A = np.rec.fromarrays(self_index_data, dtype=dtype_self)
-            B = np.rec.fromarrays(other_index_data, dtype=dtype_other)
-            common, self_idx, other_idx = np.intersect1d(A, B, return_indices=True)
-            num_obs = len(common)
+            self_codes, other_codes = _joinutils.factorize(
+                [self[n.strip()] for n in _index_by], [other[n.strip()] for n in _index_by]
+            )
+            self_idx, other_idx = _joinutils.intersect(self_codes, other_codes)
+            num_obs = len(self_idx)
 
         if num_obs == 0:
             raise ValueError(f"Nothing to differentiate. No common data found for chosen option index_by '{index_by}'.")
@@ -251,6 +453,129 @@ class Dataset(collection.Collection):
 
         return result
 
+    def join(self, other: "Dataset", on: Union[str, List[str]], how: str = "inner") -> "Dataset":
+        """Join observations of two datasets with equal values of the key fields
+
+        Fields of other, except the key fields, are added to the fields of self. Fields of other with the same name as
+        a field of self are named with an `_other` suffix. Observations without a match get empty values for the
+        fields of the other dataset. Times are converted to the time scale of self and rounded to whole nanoseconds
+        before they are compared, so times are equal if they round to the same nanosecond.
+
+        Only the observations kept in the result are copied from self and other.
+
+        Args:
+            other:  Dataset to join with self.
+            on:     Names of the key fields, as a list or a comma separated string.
+            how:    "inner" for matching observations only, "left" to also keep observations of self without a match
+                    and "outer" to also keep observations of other without a match, added at the end.
+
+        Returns:
+            A new dataset with one observation for each pair of matching observations.
+        """
+        on = [n.strip() for n in on.split(",")] if isinstance(on, str) else list(on)
+        self_codes, other_codes = _joinutils.factorize([self[n] for n in on], [other[n] for n in on])
+        self_idx, other_idx = _joinutils.join(self_codes, other_codes, how=how)
+
+        # Observations of other without a match in self are at the end of an outer join
+        num_matched = int(np.count_nonzero(self_idx >= 0))
+        result = self._copy_rows(self_idx[:num_matched])
+        result.vars.update(self.vars)
+
+        # Use an empty observation, added after the matching observations of other, for observations without a match
+        other_idx_matched = other_idx[:num_matched]
+        has_match = other_idx_matched >= 0
+        other_fields = other._copy_rows(other_idx_matched[has_match], exclude=on)
+        other_fields._fields = {
+            n: f for n, f in other_fields._fields.items() if f.fieldtype != "collection" or f.data.fields
+        }
+        if not np.all(has_match):
+            memo = dict()
+            for field in other_fields._fields.values():
+                field.append_empty(1, memo)
+            other_fields._num_obs += 1
+            rows = np.full(num_matched, other_fields.num_obs - 1)
+            rows[has_match] = np.arange(other_fields.num_obs - 1)
+            other_fields.subset(rows)
+
+        new_names = {n: f"{n}_other" if n in result._fields else n for n in other_fields._fields}
+        for name, field in other_fields._fields.items():
+            field.name = new_names[name]
+            result._fields[field.name] = field
+        result.meta.update(other.meta)
+
+        if num_matched < len(self_idx):
+            # Rename fields of other as above, but keep the key fields where they are in self
+            unmatched = other._copy_rows(other_idx[num_matched:])
+            keys = {n: unmatched.field(n) for n in on}
+            for name in on:
+                del unmatched[name]
+            unmatched._fields = {new_names.get(n, n): f for n, f in unmatched._fields.items()}
+            for name, field in unmatched._fields.items():
+                field.name = name
+            for name, field in keys.items():
+                add_field = getattr(unmatched, f"add_{field.fieldtype}")
+                add_field(name, val=field.data, unit=field._unit, write_level=field.write_level.name)
+            result.extend(unmatched)
+
+        return result
+
+    def _copy_rows(self, idx: np.ndarray, exclude: Collection[str] = ()) -> "Dataset":
+        """Copy the given observations into a new dataset, without copying the other observations
+
+        Unlike subset, the values are copied also when the observations are contiguous, so that the new dataset does
+        not share values with self.
+
+        Args:
+            idx:      Integer indices of observations to copy.
+            exclude:  Names of fields that are not copied.
+
+        Returns:
+            New dataset with the given observations.
+        """
+        new_dset = Dataset(num_obs=self.num_obs)
+        new_dset._fields = _copy_fields(self._fields)
+        new_dset.meta = copy.deepcopy(self.meta)
+        for name in exclude:
+            del new_dset[name]
+
+        memo = dict()
+        for field in new_dset._fields.values():
+            field.subset(idx, memo)
+        new_dset._num_obs = len(idx)
+        return new_dset
+
+    def create_index(self, *fields: str) -> None:
+        """Index fields to speed up filter, unique, count and group_by
+
+        The index of a field groups the observations by value, so that observations having a given value are found
+        without comparing all values. Indexes are built the first time they are used, and rebuilt after the dataset
+        is subset or extended. Call create_index again after changing values of an indexed field in place.
+
+        Args:
+            fields:  Names of 1-dimensional fields to index.
+        """
+        for field in fields:
+            ndim = np.ndim(self[field])
+            if ndim != 1:
+                raise ValueError(f"Only 1-dimensional fields can be indexed, {field!r} is {ndim}-dimensional")
+            self._indexes[field] = None
+
+    def drop_index(self, *fields: str) -> None:
+        """Remove indexes of fields, see create_index(). Remove all indexes if no fields are given"""
+        for field in fields or list(self._indexes):
+            self._indexes.pop(field, None)
+
+    def _field_index(self, field: str) -> Optional[_joinutils.FieldIndex]:
+        """Index of a field, None if the field is not indexed"""
+        if field not in self._indexes:
+            return None
+
+        values = self[field]
+        index = self._indexes[field]
+        if index is None or index.values is not values:
+            index = self._indexes[field] = _joinutils.FieldIndex(values)
+        return index
+
     def filter(self, idx=None, collection=None, **filters) -> np.array:
         """Filter observations"""
         idx = np.ones(self.num_obs, dtype=bool) if idx is None else idx
@@ -258,6 +583,11 @@ class Dataset(collection.Collection):
         for field, value in filters.items():
             if collection is not None:
                 field = f"{collection}.{field}"
+            index = self._field_index(field)
+            field_idx = None if index is None else index.mask(value)
+            if field_idx is not None:
+                idx = np.logical_and(idx, field_idx)
+                continue
             try:
                 field_idx = np.asarray(self[field]) == value
             except AttributeError as err:
@@ -285,6 +615,16 @@ class Dataset(collection.Collection):
         Returns:
             Returns a list of unique values for of the given field.
         """
+        index = self._field_index(field)
+        if index is not None:
+            # First observation of each value, in the order they appear like when the field is not indexed
+            rows = np.concatenate((index.first, index.first_missing))
+            if filters:
+                selected = np.flatnonzero(self.filter(**filters))
+                _, first = np.unique(index.codes[selected], return_index=True)
+                rows = selected[first]
+            return self[field][np.sort(rows)]
+
         idx = self.filter(**filters)
         try:
             # convert to np.ndarray and find unique index (np.unique does not work on immutable arrays like TimeArray)
@@ -325,6 +665,30 @@ class Dataset(collection.Collection):
                 indicies = np.sort(indicies)
             return concat_field[indicies]
 
+    def group_by(self, field: str, **filters: Any) -> Iterator[Tuple[Any, np.ndarray]]:
+        """Iterate over the distinct values of a field and the observations having each value
+
+        The values are sorted, while the observations of each value are in their original order. Observations with
+        missing (nan) values are skipped. Uses the index of the field if it is indexed, see create_index().
+
+        Args:
+            field:    Name of 1-dimensional field.
+            filters:  Only include observations matching these filters, see filter().
+
+        Returns:
+            Iterator over tuples of value and integer indices of the observations having the value.
+        """
+        index = self._field_index(field) or _joinutils.FieldIndex(self[field])
+        idx = self.filter(**filters) if filters else None
+        values = self[field][index.first]
+        for code in range(index.num_groups):
+            rows = index.rows(code)
+            if idx is not None:
+                rows = rows[idx[rows]]
+                if not len(rows):
+                    continue
+            yield values[code], rows
+
     def plot_values(self, field: str) -> np.array:
         """Return values of a field in a form that can be plotted"""
 
@@ -348,6 +712,89 @@ class Dataset(collection.Collection):
 
         return df
 
+    def to_arrow(self, fields: Optional[List[str]] = None) -> "pyarrow.Table":
+        """Return a representation of the dataset as an Arrow table
+
+        Each field is stored as one column, with multi-dimensional fields stored as fixed size lists instead of
+        being split into several columns. Float and position fields are not copied. Units, time scales, position
+        systems as well as meta and vars of the dataset are stored as metadata in the schema of the table.
+
+        Fields of types that can not be converted, like time_delta, are skipped with a warning when converting all
+        fields, while selecting them in fields raises a TypeError.
+
+        Requires the pyarrow package.
+
+        Args:
+            fields:  Names of fields to convert, nested fields are named like "collection.field". Default is all.
+
+        Returns:
+            Arrow table with one column per field.
+        """
+        import pyarrow as pa  # Local import - pyarrow is an optional dependency
+        from midgard.data import _arrowutils
+
+        if fields is None:
+            columns = [c for f in self._fields.values() for c in _arrowutils.to_columns(f, strict=False)]
+        else:
+            prefixes = [f"{n.rpartition('.')[0]}." if "." in n else "" for n in fields]
+            columns = [c for n, p in zip(fields, prefixes) for c in _arrowutils.to_columns(self.field(n), prefix=p)]
+        metadata = {
+            _arrowutils.META: _arrowutils.encode_metadata(self.meta),
+            _arrowutils.VARS: _arrowutils.encode_metadata(self.vars),
+        }
+        schema = pa.schema([f for f, _ in columns], metadata=metadata)
+        return pa.Table.from_arrays([v for _, v in columns], schema=schema)
+
+    @classmethod
+    def from_arrow(cls, table: "pyarrow.Table") -> "Dataset":
+        """Create a dataset from an Arrow table created by to_arrow()
+
+        Float and position fields are read-only views of the Arrow buffers when possible.
+
+        Args:
+            table:  Arrow table with one column per field.
+
+        Returns:
+            Dataset with the fields in the table.
+        """
+        from midgard.data import _arrowutils  # Local import - pyarrow is an optional dependency
+
+        dset = cls(num_obs=table.num_rows)
+        dset.meta.update(_arrowutils.decode_metadata(table.schema.metadata, _arrowutils.META))
+        dset.vars.update(_arrowutils.decode_metadata(table.schema.metadata, _arrowutils.VARS))
+        for field, column in zip(table.schema, table.columns):
+            fieldtype, val, field_args = _arrowutils.from_column(field, column)
+            getattr(dset, f"add_{fieldtype}")(field.name, val=val, **field_args)
+        return dset
+
+    def to_parquet(
+        self, file_path: Union[str, pathlib.Path], fields: Optional[List[str]] = None, **parquet_args: Any
+    ) -> None:
+        """Write the dataset to a Parquet file, see to_arrow()
+
+        Args:
+            file_path:     Path to the Parquet file.
+            fields:        Names of fields to write. Default is all.
+            parquet_args:  Options passed on to pyarrow.parquet.write_table, like compression.
+        """
+        import pyarrow.parquet as pq  # Local import - pyarrow is an optional dependency
+
+        pq.write_table(self.to_arrow(fields=fields), file_path, **parquet_args)
+
+    @classmethod
+    def read_parquet(cls, file_path: Union[str, pathlib.Path]) -> "Dataset":
+        """Read a dataset from a Parquet file written by to_parquet()
+
+        Args:
+            file_path:  Path to the Parquet file.
+
+        Returns:
+            Dataset with the data read from file.
+        """
+        import pyarrow.parquet as pq  # Local import - pyarrow is an optional dependency
+
+        return cls.from_arrow(pq.read_table(file_path))
+
     def apply(self, func: Callable, field: str, **filters: Any) -> Any:
         """Apply a function to a field"""
         idx = self.filter(**filters)
@@ -380,7 +827,61 @@ class Dataset(collection.Collection):
 
     def num(self, **filters: Any) -> int:
         """Number of observations satisfying the filters"""
-        return int(sum(self.filter(**filters)))
+        return int(np.count_nonzero(self.filter(**filters)))
+
+    def aggregate(
+        self,
+        by: Union[str, List[str]],
+        fields: Union[str, List[str]],
+        funcs: Collection[str] = ("mean",),
+        **filters: Any,
+    ) -> "Dataset":
+        """Calculate statistics of fields for each group of observations with equal values of the by fields
+
+        Like `apply`, the values of all suffixes of a field, for instance numbers_1 and numbers_2, are pooled. The
+        statistics are stored in float fields named like "numbers_mean", with one observation per group sorted by the
+        by fields. Observations with missing (nan) values of the by fields are not part of any group.
+
+        Args:
+            by:       Names of the fields to group by, as a list or a comma separated string.
+            fields:   Names of the fields to calculate statistics of.
+            funcs:    Statistics to calculate, any of count, mean, rms, std, min and max.
+            filters:  Only include observations matching these filters, see filter().
+
+        Returns:
+            A new dataset with the by fields and the statistics of each group.
+        """
+        by = [n.strip() for n in by.split(",")] if isinstance(by, str) else list(by)
+        fields = [fields] if isinstance(fields, str) else list(fields)
+        unknown = [f for f in funcs if f not in _joinutils.AGGREGATES]
+        if unknown:
+            raise ValueError(f"Unknown aggregate {unknown[0]!r}. Use one of {', '.join(_joinutils.AGGREGATES)}")
+
+        # Group the filtered observations
+        rows = np.flatnonzero(self.filter(**filters))
+        codes, _ = _joinutils.factorize([self[n][rows] for n in by], [self[n][:0] for n in by])
+        rows, codes = rows[codes >= 0], codes[codes >= 0]
+        counts = np.bincount(codes)
+        first = rows[np.argsort(codes, kind="stable")[np.cumsum(counts) - counts]]
+
+        result = self.__class__(num_obs=len(counts))
+        for name in by:
+            field = self.field(name)
+            add_field = getattr(result, f"add_{field.fieldtype}")
+            add_field(name, val=self[name][first], unit=field._unit, write_level=field.write_level.name)
+
+        for name in fields:
+            values, units = list(), list()
+            for _ in self.for_each_suffix(name):
+                values.append(np.asarray(self[name])[rows])
+                units.append(self.field(f"{name}{self.default_field_suffix}")._unit)
+            if not values:
+                raise exceptions.FieldDoesNotExistError(f"Field {name!r} does not exist")
+
+            reduced = _joinutils.aggregate(np.concatenate(values), np.tile(codes, len(values)), funcs)
+            for func, val in reduced.items():
+                result.add_float(f"{name}_{func}", val=val, unit=None if func == "count" else units[0])
+        return result
 
     @property
     def num_obs(self) -> int:
@@ -439,8 +940,7 @@ class Meta(UserDict):
         Args:
             h5_group:    The hdf5 group that contains the meta data
         """
-        for k, v in h5_group.attrs.items():
-            self.data[k] = _h5utils.decode_h5attr(v)
+        self.data.update(_h5utils.read_attrs(h5_group))
 
     def write(self, h5_group: h5py.Group) -> None:
         """Write meta data to hdf5-file
@@ -449,7 +949,7 @@ class Meta(UserDict):
             h5_group:   The hdf5 group to store the meta data in
         """
         for k, v in self.items():
-            h5_group.attrs[k] = _h5utils.encode_h5attr(v)
+            _h5utils.write_attr(h5_group, k, v)
 
     def add(self, name: Hashable, value: Collection, section: Optional[Hashable] = None) -> None:
         """Add information to the metaset"""
@@ -477,6 +977,33 @@ class Meta(UserDict):
         )
 
 
+def _copy_fields(fields: Dict[str, "FieldType"]) -> Dict[str, "FieldType"]:
+    """Shallow copies of fields, that can be subset without changing the original fields
+
+    Fields in collections are copied as well, since collections are subset by subsetting their fields.
+    """
+    copies = dict()
+    for name, field in fields.items():
+        copies[name] = field.copy()
+        if field.fieldtype == "collection":
+            copies[name].data = type(field.data)()
+            copies[name].data._fields = _copy_fields(field.data._fields)
+    return copies
+
+
+def _check_version(h5_file: h5py.File) -> None:
+    """Raise an error if the file is written by a Dataset version with a newer major version
+
+    The version attribute is formatted like `Dataset.version`. Files without it are read as before.
+    """
+    version = h5_file.attrs.get("version", "")
+    file_version = version.split(",")[0].partition(" v")[-1]
+    if file_version and int(file_version.split(".")[0]) > int(__version__.split(".")[0]):
+        raise ValueError(
+            f"Can not read {h5_file.filename}, written by {version}. Reading requires Dataset v{file_version} or later"
+        )
+
+
 #
 # Add available fieldtypes to dataset
 #
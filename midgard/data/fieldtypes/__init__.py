@@ -2,12 +2,14 @@
 
 """
 # Standard library imports
-from typing import Callable, List, Any
+from typing import Any, Callable, Dict, List, Optional
 
 # Third party imports
 import numpy as np
 
 # Midgard imports
+from midgard.data import _h5utils
+from midgard.dev import exceptions
 from midgard.dev import plugins
 
 
@@ -32,3 +34,50 @@ def fieldtype(data: Any) -> Callable:
                 if np.issubdtype(func.dtype, data.dtype.type):
                     return ftype
     raise TypeError(f"Unable to find suitable fieldtype for {data}")
+
+
+def read_fields(h5_group, memo, fields: Optional[List[str]] = None, lazy: bool = False) -> Dict[str, Any]:
+    """Read fields stored in a HDF5 group
+
+    Collections are always created immediately, so that their nested fields are known, while in lazy mode the nested
+    fields themselves are read the first time they are accessed.
+
+    Args:
+        h5_group:  HDF5 file or group with a fields attribute naming the fields and their fieldtypes.
+        memo:      Dictionary keeping track of objects read from file, shared by all fields in the file.
+        fields:    Names of fields to read, nested fields are named like "collection.field". Default is all fields.
+        lazy:      Whether to read fields when they are first accessed instead of immediately.
+
+    Returns:
+        Dictionary of fields, a LazyFields dictionary in lazy mode.
+    """
+    field_types = _h5utils.decode_h5attr(h5_group.attrs["fields"])
+
+    # Pick out fields to read, key: fieldname, value: nested fields to read from a collection, None for all
+    selection = dict()
+    for fieldname in field_types if fields is None else fields:
+        mainfield, _, subfield = fieldname.partition(".")
+        if mainfield not in field_types:
+            raise exceptions.FieldDoesNotExistError(f"Field {mainfield!r} does not exist in {h5_group.file.filename}")
+        if not subfield or field_types[mainfield] != "collection":
+            selection[mainfield] = None
+        elif selection.get(mainfield, list()) is not None:
+            selection.setdefault(mainfield, list()).append(subfield)
+
+    def read_field(fieldname):
+        field_cls = function(field_types[fieldname])
+        if field_types[fieldname] == "collection":
+            field = field_cls.read(h5_group[fieldname], memo, fields=selection[fieldname], lazy=lazy)
+        else:
+            field = field_cls.read(h5_group[fieldname], memo)
+        if h5_group.name == "/":
+            memo[fieldname] = field.data
+        return field
+
+    read_fields = _h5utils.LazyFields() if lazy else dict()
+    for fieldname in selection:
+        if lazy and field_types[fieldname] != "collection":
+            read_fields.add_loader(fieldname, lambda fieldname=fieldname: read_field(fieldname))
+        else:
+            read_fields[fieldname] = read_field(fieldname)
+    return read_fields
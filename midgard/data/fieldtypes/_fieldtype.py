@@ -15,6 +15,10 @@ import pandas as pd
 from midgard.collections import enums
 from midgard.data import _h5utils
 from midgard.dev import exceptions
+from midgard.math import nputil
+
+# Key in the memo of Dataset.subset telling fields that their old values may be overwritten, see FieldType._subset()
+COMPACT = "__compact__"
 
 
 class FieldType(abc.ABC):
@@ -102,10 +106,27 @@ class FieldType(abc.ABC):
     def _subset(self, idx: np.array, memo) -> None:
         """Remove observations from a field based on index
 
+        Values shared with a field that has already been subset are reused from memo. When compacting, the selected
+        values are moved to the start of the existing array instead of being copied to a new one, if the array owns
+        its values and is writeable, and slices of memory mapped values are copied if they only keep a small part of
+        the mapping, so that the mapped file can be closed.
+
             Overwrite by subclass if needed
         """
         old_id = id(self.data)
-        self.data = self.data[idx]
+        if old_id in memo:
+            self.data = memo[old_id]
+            return
+
+        data = None
+        if memo.get(COMPACT) and not isinstance(idx, slice) and type(self.data) is np.ndarray:
+            if self.data.flags.owndata and self.data.flags.writeable:
+                data = nputil.compact(self.data, idx)
+        if data is None:
+            data = self.data[idx]
+            if memo.get(COMPACT):
+                data = _h5utils.release_mapping(data)
+        self.data = data
         memo[old_id] = self.data
 
     def extend(self, other_field, memo) -> None:
@@ -5,6 +5,7 @@
 import numpy as np
 
 # Midgard imports
+from midgard.data import _h5utils
 from midgard.data.fieldtypes._fieldtype import FieldType
 from midgard.dev import exceptions
 from midgard.dev import plugins
@@ -102,10 +103,9 @@ class BoolField(FieldType):
         if name in memo:
             val = memo[name]
         else:
-            val = h5_group[name][...]
+            val = _h5utils.read_rows(h5_group[name], memo, mappable=True)
         return cls(num_obs=len(val), name=name.split(".")[-1], val=val)
 
-    def _write(self, h5_group, _) -> None:
+    def _write(self, h5_group, memo) -> None:
         """Write data to a HDF5 data source"""
-        h5_field = h5_group.create_dataset(h5_group.attrs["fieldname"], self.data.shape, dtype=self.data.dtype)
-        h5_field[...] = self.data
+        _h5utils.create_dataset(h5_group, h5_group.attrs["fieldname"], self.data, memo)
@@ -69,12 +69,11 @@ class CollectionField(FieldType):
         return self.data.fields
 
     @classmethod
-    def read(cls, h5_group, memo):
+    def read(cls, h5_group, memo, fields=None, lazy=False):
+        """Read a collection from a HDF5 data source, see fieldtypes.read_fields() for the optional parameters"""
         name = h5_group.attrs["fieldname"]
         field = cls(num_obs=None, name=name, val=None)  # num_obs and val not used
-        fields = _h5utils.decode_h5attr(h5_group.attrs["fields"])
-        for fieldname, fieldtype in fields.items():
-            field.data._fields[fieldname] = fieldtypes.function(fieldtype).read(h5_group[fieldname], memo)
+        field.data._fields = fieldtypes.read_fields(h5_group, memo, fields=fields, lazy=lazy)
 
         return field
 
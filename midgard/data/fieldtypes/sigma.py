@@ -4,6 +4,7 @@
 import numpy as np
 
 # Midgard imports
+from midgard.data import _h5utils
 from midgard.data.fieldtypes._fieldtype import FieldType
 from midgard.data.sigma import SigmaArray
 from midgard.dev import exceptions
@@ -108,13 +109,11 @@ class SigmaField(FieldType):
         if name in memo:
             val = memo[name]
         else:
-            val = h5_group[name][...]
-            sigma = h5_group["sigma"][...]
+            val = _h5utils.read_rows(h5_group[name], memo)
+            sigma = _h5utils.read_rows(h5_group["sigma"], memo)
         return cls(num_obs=len(val), name=name.split(".")[-1], val=val, sigma=sigma)
 
-    def _write(self, h5_group, _) -> None:
+    def _write(self, h5_group, memo) -> None:
         """Write a SigmaField to a HDF5 data source"""
-        h5_field = h5_group.create_dataset(h5_group.attrs["fieldname"], self.data.shape, dtype=self.data.dtype)
-        h5_field[...] = self.data
-        h5_field = h5_group.create_dataset("sigma", self.data.shape, dtype=self.data.sigma.dtype)
-        h5_field[...] = self.data.sigma
+        _h5utils.create_dataset(h5_group, h5_group.attrs["fieldname"], np.asarray(self.data), memo)
+        _h5utils.create_dataset(h5_group, "sigma", self.data.sigma, memo)
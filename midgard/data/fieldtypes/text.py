@@ -6,6 +6,7 @@
 import numpy as np
 
 # Midgard imports
+from midgard.data import _h5utils
 from midgard.data.fieldtypes._fieldtype import FieldType
 from midgard.dev import exceptions
 from midgard.dev import plugins
@@ -107,14 +108,29 @@ class TextField(FieldType):
         name = h5_group.attrs["fieldname"]
         if name in memo:
             val = memo[name]
+        elif h5_group.attrs.get("encoding") == "dictionary":
+            # Look up text from categories and codes, and convert back from byte-string to unicode
+            categories = np.asarray(h5_group["__categories__"][...], dtype=np.str_)
+            val = categories[_h5utils.read_rows(h5_group[name], memo)]
         else:
             # Convert back from byte-string to unicode
-            val = np.asarray(h5_group[name][...], dtype=np.str_)
+            val = np.asarray(_h5utils.read_rows(h5_group[name], memo), dtype=np.str_)
         return cls(num_obs=len(val), name=name.split(".")[-1], val=val)
 
-    def _write(self, h5_group, _) -> None:
-        """Write data to a HDF5 data source"""
+    def _write(self, h5_group, memo) -> None:
+        """Write data to a HDF5 data source
+
+        Text is dictionary encoded if chosen when writing, storing each distinct string once together with integer
+        codes.
+        """
         # Convert text from unicode to byte-string to avoid error in h5py
         data = np.asarray(self.data, dtype=np.bytes_)
-        h5_field = h5_group.create_dataset(h5_group.attrs["fieldname"], self.data.shape, dtype=data.dtype)
-        h5_field[...] = data
+        if not _h5utils.dictionary_text(h5_group, memo) or data.size == 0:
+            _h5utils.create_dataset(h5_group, h5_group.attrs["fieldname"], data, memo)
+            return
+
+        categories, codes = np.unique(data, return_inverse=True)
+        h5_group.attrs["encoding"] = "dictionary"
+        _h5utils.create_dataset(h5_group, "__categories__", categories, memo)
+        codes = codes.astype(np.min_scalar_type(len(categories))).reshape(data.shape)
+        _h5utils.create_dataset(h5_group, h5_group.attrs["fieldname"], codes, memo)
@@ -68,15 +68,15 @@ class TimeField(FieldType):
         raise exceptions.UnitError(f"Can not change the unit of a time field")
 
     def _prepend_empty(self, num_obs, memo):
-        # Use datetime.min as "empty" value
-        empty = Time([datetime.min] * num_obs, scale="utc", fmt="datetime")
+        # Use datetime.min as "empty" value, in the scale of the field as it can not be converted to other scales
+        empty = Time([datetime.min] * num_obs, scale=self.data.scale, fmt="datetime")
         empty_id = id(empty)
         self.data = TimeArray.insert(self.data, 0, empty, memo)
         memo.pop(empty_id, None)
 
     def _append_empty(self, num_obs, memo):
-        # Use datetime.min as "empty" value
-        empty = Time([datetime.min] * num_obs, scale="utc", fmt="datetime")
+        # Use datetime.min as "empty" value, in the scale of the field as it can not be converted to other scales
+        empty = Time([datetime.min] * num_obs, scale=self.data.scale, fmt="datetime")
         empty_id = id(empty)
         self.data = TimeArray.insert(self.data, self.num_obs, empty, memo)
         memo.pop(empty_id, None)
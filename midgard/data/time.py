@@ -67,6 +67,8 @@ def is_timedelta(val):
 
 # Make classmethods available
 Time.now = TimeArray.now
+Time.cache_info = TimeArray.cache_info
+Time.set_cache_size = TimeArray.set_cache_size
 Time.is_time = is_time
 Time.is_timedelta = is_timedelta
 # Define shorthands for available formats, scales and conversions
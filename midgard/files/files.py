@@ -5,7 +5,10 @@
 import builtins
 from contextlib import contextmanager
 import gzip
+import os
 import pathlib
+import shutil
+import threading
 from typing import Any, Iterator, Optional, Union
 
 
@@ -75,3 +78,48 @@ def move(from_path: Union[str, pathlib.Path], to_path: Union[str, pathlib.Path],
         with to_path.open(mode="xb") as fid:
             fid.write(from_path.read_bytes())
         from_path.unlink()
+
+
+@contextmanager
+def replace_atomically(file_path: Union[str, pathlib.Path], copy: bool = False) -> Iterator[pathlib.Path]:
+    """Write a file through a temporary file that replaces the file when done
+
+    Readers of the file see either the old or the new version of the file, never a partially written one. If an
+    exception is raised while writing, the file is left unchanged. Both the new file and, where supported, the
+    directory entry replacing the old file are synced to disk.
+
+    Args:
+        file_path:  String or pathlib.Path representing the full file path.
+        copy:       True or False, if True the temporary file starts as a copy of the existing file.
+
+    Returns:
+        Path of the temporary file to write to.
+    """
+    file_path = pathlib.Path(file_path).resolve()
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = file_path.with_name(f".{file_path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+
+    try:
+        if copy:
+            shutil.copyfile(file_path, tmp_path)
+        yield tmp_path
+
+        # Make sure the new file is on disk before replacing the old one, and the replacement after
+        with builtins.open(tmp_path, mode="rb+") as fid:
+            os.fsync(fid.fileno())
+        tmp_path.replace(file_path)
+        _fsync_dir(file_path.parent)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def _fsync_dir(dir_path: pathlib.Path) -> None:
+    """Sync a directory to disk, so that files renamed in it are stored. Not supported on Windows"""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(dir_path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -5,11 +5,31 @@ Makes sure numpy functions can be called in a similar fashion for different use
  + both single values and arrays
 
 """
+from concurrent.futures import ThreadPoolExecutor
 import functools
+from collections import OrderedDict
+import os
+import threading
+from typing import Any, Callable, Hashable, List, Optional, Tuple, Union
+import weakref
 
 # Third party imports
 import numpy as np
 
+# Default number of rows in each block used by blockwise(), None means all rows at once. See set_block_size()
+_BLOCK_SIZE: Optional[int] = None
+
+# Number of threads used by map_blocks() and blockwise(), 1 means serial execution. See set_workers()
+_WORKERS = 1
+
+# Arrays are not split between threads into blocks smaller than this, as the overhead would dominate
+_MIN_PARALLEL_ROWS = 10_000
+
+# Thread pool, and its number of threads, used for parallel execution. Created when first needed
+_EXECUTOR: Optional[Tuple[int, ThreadPoolExecutor]] = None
+_EXECUTOR_LOCK = threading.Lock()
+_THREAD_STATE = threading.local()
+
 
 def unit_vector(vector):
     if vector.ndim == 1:
@@ -39,6 +59,67 @@ def row(vector):
     return np.expand_dims(vector, axis=vector.ndim - 1)
 
 
+def as_slice(idx: np.ndarray, size: Optional[int] = None) -> Optional[slice]:
+    """Slice picking out the same elements as an index, if the selected elements are a contiguous range
+
+    Indexing with a slice gives a view instead of a copy. A slice does not fail for elements past the end of the
+    array, so give the size of the array to check that the index is valid.
+
+    Args:
+        idx:   Boolean mask or increasing integer indices.
+        size:  Number of elements in the indexed array. An IndexError is raised if idx is not valid for this size.
+
+    Returns:
+        Slice equivalent to the index, None if idx does not select a contiguous range.
+    """
+    idx = np.asarray(idx)
+    if size is not None:
+        _check_index(idx, size)
+    if idx.ndim != 1 or idx.dtype.kind not in "biu":
+        return None
+    selected = np.flatnonzero(idx) if idx.dtype == bool else idx
+    if not len(selected):
+        return slice(0, 0)
+    if selected[0] < 0 or selected[-1] - selected[0] + 1 != len(selected) or np.any(np.diff(selected) != 1):
+        return None
+    return slice(int(selected[0]), int(selected[-1]) + 1)
+
+
+def compact(values: np.ndarray, idx: np.ndarray, block_size: int = 65_536) -> Optional[np.ndarray]:
+    """Move the selected elements to the start of an array, overwriting the array in place
+
+    The elements are moved in blocks, so that at most block_size elements are copied to temporary memory. Elements
+    are only moved towards the start of the array, so each element is moved before it is overwritten.
+
+    Args:
+        values:      Writeable array, indexed along the first axis.
+        idx:         Boolean mask or strictly increasing integer indices.
+        block_size:  Number of elements moved at a time.
+
+    Returns:
+        View of the start of values containing the selected elements, None if idx is not increasing.
+    """
+    idx = np.asarray(idx)
+    _check_index(idx, len(values))  # Check all indices before values are overwritten
+    selected = np.flatnonzero(idx) if idx.dtype == bool else idx
+    if idx.ndim != 1 or (len(selected) and selected[0] < 0) or np.any(np.diff(selected) <= 0):
+        return None
+    for start in range(0, len(selected), block_size):
+        block = selected[start : start + block_size]
+        values[start : start + len(block)] = values[block]
+    return values[: len(selected)]
+
+
+def _check_index(idx: np.ndarray, size: int) -> None:
+    """Raise an IndexError if a boolean mask or integer indices are not valid for an array of the given size"""
+    if idx.dtype == bool:
+        if idx.shape[:1] != (size,):
+            raise IndexError(f"Boolean index of length {len(idx)} does not match array of size {size}")
+    elif idx.dtype.kind in "iu" and idx.size:
+        if idx.max() >= size or idx.min() < -size:
+            raise IndexError(f"Index out of bounds for array of size {size}")
+
+
 class HashArray(np.ndarray):
     def __new__(cls, val):
         """Create a new hashable array"""
@@ -90,3 +171,250 @@ def hashable(func):
         return func(*new_args_list, **kwargs)
 
     return wrapper
+
+
+def is_immutable(arr: np.ndarray) -> bool:
+    """Check whether the values of an array can be changed
+
+    An array is only immutable if neither the array itself nor any array it is a view of is writeable.
+    """
+    while isinstance(arr, np.ndarray):
+        if arr.flags.writeable:
+            return False
+        arr = arr.base
+    return arr is None or isinstance(arr, bytes)
+
+
+def _is_scalar(value: Any) -> bool:
+    """Check whether a value is a single number, which can be compared by value"""
+    return isinstance(value, (int, float, np.number))
+
+
+class IdentityCache:
+    """Cache of results calculated from numpy arrays, keyed on the identity of the arrays
+
+    Unlike `hashable` together with `lru_cache`, the arrays are never serialized or compared, so a lookup costs the
+    same for small and large arrays. Results are cached in one of two ways:
+
+    + Objects with a `_cache` dictionary, like position arrays, store the results there. These objects are
+      responsible for clearing their cache when their values change.
+    + Immutable numpy arrays, see `is_immutable`, are cached here as long as the array is alive, with at most
+      `maxsize` results in total.
+
+    Results for other arrays are calculated every time, as there is no cheap way to see if their values have changed.
+
+    Results calculated from several arrays are cached by giving a tuple of arrays. They are only cached if all the
+    arrays are immutable or scalars, where scalars are part of the key by value.
+
+    Example:
+
+    >>> cache = IdentityCache(maxsize=8)
+    >>> values = np.arange(3.0)
+    >>> values.flags.writeable = False
+    >>> float(cache.get(values, "sum", lambda: values.sum()))
+    3.0
+    """
+
+    def __init__(self, maxsize: int = 32) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._results: "OrderedDict[Any, Any]" = OrderedDict()
+
+    def get(self, arr: Union[np.ndarray, Tuple[Any, ...]], key: Hashable, func: Callable[[], Any]) -> Any:
+        """Get the result for arr and key, calling func to calculate it if it is not cached"""
+        if isinstance(arr, tuple):
+            return self._get_many(arr, key, func)
+
+        obj_cache = getattr(arr, "_cache", None)
+        if isinstance(obj_cache, dict):
+            if key in obj_cache:
+                self.hits += 1
+            else:
+                self.misses += 1
+                obj_cache[key] = func()
+            return obj_cache[key]
+
+        if not is_immutable(arr):
+            return func()
+
+        cache_key = (id(arr), key)
+        if cache_key in self._results:
+            self.hits += 1
+            self._results.move_to_end(cache_key)
+            return self._results[cache_key][1]
+
+        self.misses += 1
+        result = func()
+        arr_ref = weakref.ref(arr, lambda _: self._results.pop(cache_key, None))
+        self._results[cache_key] = (arr_ref, result)
+        while len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+        return result
+
+    def _get_many(self, arrs: Tuple[Any, ...], key: Hashable, func: Callable[[], Any]) -> Any:
+        """Get the result for several arrays and key, calling func to calculate it if it is not cached"""
+        if not all(is_immutable(a) or _is_scalar(a) for a in arrs):
+            return func()
+
+        cache_key = (tuple(id(a) if isinstance(a, np.ndarray) else (type(a), a) for a in arrs), key)
+        if cache_key in self._results:
+            self.hits += 1
+            self._results.move_to_end(cache_key)
+            return self._results[cache_key][1]
+
+        self.misses += 1
+        result = func()
+        arrays = [a for a in arrs if isinstance(a, np.ndarray)]
+        arr_refs = [weakref.ref(a, lambda _: self._results.pop(cache_key, None)) for a in arrays]
+        self._results[cache_key] = (arr_refs, result)
+        while len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+        return result
+
+    def clear(self) -> None:
+        """Remove all cached results for immutable arrays"""
+        self._results.clear()
+
+
+def set_block_size(block_size: Optional[int]) -> None:
+    """Set the default number of rows processed at a time by blockwise()
+
+    Args:
+        block_size:  Number of rows in each block, None to process all rows at once.
+    """
+    global _BLOCK_SIZE
+    _BLOCK_SIZE = block_size
+
+
+def get_block_size() -> Optional[int]:
+    """Get the default number of rows processed at a time by blockwise()"""
+    return _BLOCK_SIZE
+
+
+def set_workers(workers: Optional[int]) -> None:
+    """Set the number of threads used to process blocks of rows in parallel
+
+    NumPy releases the GIL in most array operations, so blocks of rows can be processed in parallel by a pool of
+    threads. Each block is computed independently of the others, so results are identical to serial execution.
+    Caches shared between the blocks, like the conversions of a common other position or time array, are locked.
+
+    Args:
+        workers:  Number of threads, None to use one thread per CPU. 1 means serial execution.
+    """
+    global _WORKERS
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    if workers < 1:
+        raise ValueError(f"Number of workers must be at least 1, not {workers}")
+    _WORKERS = workers
+
+
+def get_workers() -> int:
+    """Get the number of threads used to process blocks of rows in parallel"""
+    return _WORKERS
+
+
+def blocks(num_rows: int, block_size: Optional[int] = None, workers: Optional[int] = None) -> List[slice]:
+    """Split a number of rows into consecutive blocks
+
+    When running in parallel, large arrays are split into at least one block per thread, even if no block size is
+    given.
+
+    Args:
+        num_rows:    Total number of rows.
+        block_size:  Number of rows in each block, default is set by set_block_size(). 0 or None means one block.
+        workers:     Number of threads, default is set by set_workers().
+
+    Returns:
+        Slices picking out each block of rows.
+    """
+    block_size = _BLOCK_SIZE if block_size is None else block_size
+    workers = _WORKERS if workers is None else workers
+    if workers > 1 and not _in_worker():
+        rows_per_worker = -(-num_rows // workers)
+        if rows_per_worker >= _MIN_PARALLEL_ROWS:
+            block_size = min(block_size or rows_per_worker, rows_per_worker)
+
+    if not block_size or num_rows <= block_size:
+        return [slice(0, num_rows)]
+    return [slice(start, start + block_size) for start in range(0, num_rows, block_size)]
+
+
+def map_blocks(func: Callable, row_blocks: List[slice], workers: Optional[int] = None) -> List[Any]:
+    """Call a function for each block of rows, in parallel threads if enabled
+
+    Blocks are processed serially when only one thread is used, or when called from inside one of the threads, so
+    that nested calls do not wait for the thread pool they are running in.
+
+    Args:
+        func:        Function called as func(block) for each block.
+        row_blocks:  Slices picking out blocks of rows, typically from blocks().
+        workers:     Number of threads, default is set by set_workers().
+
+    Returns:
+        Results of each call to func, in the same order as the blocks.
+    """
+    workers = _WORKERS if workers is None else workers
+    if workers <= 1 or len(row_blocks) <= 1 or _in_worker():
+        return [func(block) for block in row_blocks]
+    return list(_executor(workers).map(func, row_blocks))
+
+
+def blockwise(
+    func: Callable,
+    *arrays: np.ndarray,
+    out: np.ndarray,
+    block_size: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> np.ndarray:
+    """Apply a row-wise function to blocks of rows, writing the results into out
+
+    The function is called as `func(*array_blocks, out=out_block)` for consecutive blocks of rows, and must write its
+    result into `out_block`. Temporary arrays used by the function are therefore bounded by the block size,
+    regardless of the number of rows. Blocks are processed in parallel threads if enabled, see set_workers().
+
+    Args:
+        func:        Function working on rows of the arrays.
+        arrays:      Arrays with the same number of rows as out.
+        out:         Array the results are written into.
+        block_size:  Number of rows in each block, default is set by set_block_size().
+        workers:     Number of threads, default is set by set_workers().
+
+    Returns:
+        The out array.
+    """
+
+    def _apply(block: slice) -> None:
+        func(*[a[block] for a in arrays], out=out[block])
+
+    map_blocks(_apply, blocks(len(out), block_size, workers), workers)
+    return out
+
+
+def _in_worker() -> bool:
+    """Check whether the current thread is one of the threads in the thread pool"""
+    return getattr(_THREAD_STATE, "in_worker", False)
+
+
+def _mark_worker() -> None:
+    """Mark the current thread as part of the thread pool, used as initializer for the threads"""
+    _THREAD_STATE.in_worker = True
+
+
+def _executor(workers: int) -> ThreadPoolExecutor:
+    """Get a thread pool with the given number of threads
+
+    Args:
+        workers:  Number of threads.
+
+    Returns:
+        Thread pool, reused as long as the number of threads is the same.
+    """
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None or _EXECUTOR[0] != workers:
+            if _EXECUTOR is not None:
+                _EXECUTOR[1].shutdown(wait=False)
+            executor = ThreadPoolExecutor(workers, thread_name_prefix="nputil", initializer=_mark_worker)
+            _EXECUTOR = (workers, executor)
+        return _EXECUTOR[1]
@@ -26,8 +26,7 @@ array([[[ 1.        ,  0.        ,  0.        ],
 
 """
 # Standard library imports
-from typing import TypeVar
-from functools import lru_cache
+from typing import Callable, Optional, TypeVar
 
 # Third party imports
 import numpy as np
@@ -38,6 +37,9 @@ from midgard.math import nputil
 # Type specification: scalar float or numpy array
 np_float = TypeVar("np_float", float, np.ndarray)
 
+# Results of enu2trs and trs2enu when called with cache=True
+_CACHE = nputil.IdentityCache(maxsize=32)
+
 
 def R1(angle: np_float) -> np.ndarray:
     """Rotation matrix around the first axis
@@ -123,9 +125,13 @@ def dR3(angle: np_float) -> np.ndarray:
     return _roll_axes(np.array([[-sinA, cosA, zero], [-cosA, -sinA, zero], [zero, zero, zero]]))
 
 
-@nputil.hashable
-@lru_cache()
-def enu2trs(lat: np_float, lon: np_float) -> np.ndarray:
+def enu2trs(
+    lat: np_float,
+    lon: np_float,
+    cache: bool = False,
+    out: Optional[np.ndarray] = None,
+    block_size: Optional[int] = None,
+) -> np.ndarray:
     """Rotation matrix for rotating an ENU coordinate system to an earth oriented one
 
     See for instance http://www.navipedia.net/index.php/Transformations_between_ECEF_and_ENU_coordinates
@@ -133,29 +139,40 @@ def enu2trs(lat: np_float, lon: np_float) -> np.ndarray:
 
         R3(-(np.pi/2 + lon)) @ R1(-(np.pi/2 - lat))
 
+    The matrices are filled in blocks of `block_size` angles, so that temporary arrays are bounded by the block size.
+
+    Caching is opt-in, and based on the identity of read-only `lat` and `lon` arrays or the values of scalar angles,
+    see `nputil.IdentityCache`.
+
     Args:
         lat (Float or Array):   Latitude of origin of ENU coordinate system.
         lon (Float or Array):   Longitude of origin of ENU coordinate system.
+        cache:                  Whether to cache the result.
+        out:                    Array with shape lat.shape + (3, 3) to store the rotation matrices in.
+        block_size:             Number of angles handled at a time, default is set by `nputil.set_block_size`.
 
     Returns:
         Numpy array:   Rotation matrix or array of rotation matrices.
     """
-    zero = _zero(lat)
+    if cache and out is None:
+        return _CACHE.get((lat, lon), "enu2trs", lambda: _rotation_matrices(_enu2trs, lat, lon, None, block_size))
+    return _rotation_matrices(_enu2trs, lat, lon, out, block_size)
+
+
+def _enu2trs(lat: np.ndarray, lon: np.ndarray, out: np.ndarray) -> None:
     coslat, coslon, sinlat, sinlon = np.cos(lat), np.cos(lon), np.sin(lat), np.sin(lon)
-    return _roll_axes(
-        np.array(
-            [
-                [-sinlon, -coslon * sinlat, coslon * coslat],
-                [coslon, -sinlon * sinlat, sinlon * coslat],
-                [zero, coslat, sinlat],
-            ]
-        )
-    )
-
-
-@nputil.hashable
-@lru_cache()
-def trs2enu(lat: np_float, lon: np_float) -> np.ndarray:
+    out[..., 0, 0], out[..., 0, 1], out[..., 0, 2] = -sinlon, -coslon * sinlat, coslon * coslat
+    out[..., 1, 0], out[..., 1, 1], out[..., 1, 2] = coslon, -sinlon * sinlat, sinlon * coslat
+    out[..., 2, 0], out[..., 2, 1], out[..., 2, 2] = 0, coslat, sinlat
+
+
+def trs2enu(
+    lat: np_float,
+    lon: np_float,
+    cache: bool = False,
+    out: Optional[np.ndarray] = None,
+    block_size: Optional[int] = None,
+) -> np.ndarray:
     """Rotation matrix for rotating an earth oriented coordinate system to an ENU one
 
     See for instance http://www.navipedia.net/index.php/Transformations_between_ECEF_and_ENU_coordinates
@@ -163,24 +180,56 @@ def trs2enu(lat: np_float, lon: np_float) -> np.ndarray:
 
         R1(np.pi/2 - lat) @ R3(np.pi/2 + lon)
 
+    The matrices are filled in blocks of angles, and cached if asked for, see `enu2trs`.
+
     Args:
         lat (Float or Array):   Latitude of origin of ENU coordinate system.
         lon (Float or Array):   Longitude of origin of ENU coordinate system.
+        cache:                  Whether to cache the result.
+        out:                    Array with shape lat.shape + (3, 3) to store the rotation matrices in.
+        block_size:             Number of angles handled at a time, default is set by `nputil.set_block_size`.
 
     Returns:
         Numpy array:   Rotation matrix or array of rotation matrices.
     """
-    zero = _zero(lat)
+    if cache and out is None:
+        return _CACHE.get((lat, lon), "trs2enu", lambda: _rotation_matrices(_trs2enu, lat, lon, None, block_size))
+    return _rotation_matrices(_trs2enu, lat, lon, out, block_size)
+
+
+def _trs2enu(lat: np.ndarray, lon: np.ndarray, out: np.ndarray) -> None:
     coslat, coslon, sinlat, sinlon = np.cos(lat), np.cos(lon), np.sin(lat), np.sin(lon)
-    return _roll_axes(
-        np.array(
-            [
-                [-sinlon, coslon, zero],
-                [-sinlat * coslon, -sinlat * sinlon, coslat],
-                [coslat * coslon, coslat * sinlon, sinlat],
-            ]
-        )
-    )
+    out[..., 0, 0], out[..., 0, 1], out[..., 0, 2] = -sinlon, coslon, 0
+    out[..., 1, 0], out[..., 1, 1], out[..., 1, 2] = -sinlat * coslon, -sinlat * sinlon, coslat
+    out[..., 2, 0], out[..., 2, 1], out[..., 2, 2] = coslat * coslon, coslat * sinlon, sinlat
+
+
+def _rotation_matrices(
+    fill: Callable, lat: np_float, lon: np_float, out: Optional[np.ndarray], block_size: Optional[int]
+) -> np.ndarray:
+    """Fill rotation matrices for the given angles, in blocks of angles
+
+    Args:
+        fill:        Function filling rotation matrices, called as fill(lat, lon, out=out).
+        lat:         Scalar, list or numpy array of latitudes.
+        lon:         Scalar, list or numpy array of longitudes.
+        out:         Array to store the rotation matrices in, a new array is created if None.
+        block_size:  Number of angles handled at a time.
+
+    Returns:
+        Numpy array:   Rotation matrix or array of rotation matrices.
+    """
+    lat, lon = np.asarray(lat), np.asarray(lon)
+    shape = lat.shape + (3, 3)
+    if out is None:
+        out = np.empty(shape)
+    elif out.shape != shape:
+        raise ValueError(f"'out' must have shape {shape}, not {out.shape}")
+
+    if lat.ndim == 0:
+        fill(lat, lon, out=out)
+        return out
+    return nputil.blockwise(fill, lat, lon, out=out, block_size=block_size)
 
 
 def _roll_axes(mat: np.ndarray) -> np.ndarray:
@@ -5,8 +5,7 @@ Description:
 
 """
 # Standard library imports
-from functools import lru_cache
-from typing import Tuple, Union
+from typing import Callable, Optional, Tuple, Union
 
 # Third party imports
 import numpy as np
@@ -17,15 +16,34 @@ from midgard.math.constant import constant
 from midgard.math.ellipsoid import Ellipsoid, GRS80
 from midgard.math import nputil
 
+# Results of trs2llh and llh2trs when called with cache=True
+_CACHE = nputil.IdentityCache(maxsize=32)
 
-def trs2llh(trs: np.ndarray, ellipsoid: Ellipsoid = None) -> np.ndarray:
+
+def trs2llh(
+    trs: np.ndarray,
+    ellipsoid: Ellipsoid = None,
+    cache: bool = False,
+    out: Optional[np.ndarray] = None,
+    block_size: Optional[int] = None,
+) -> np.ndarray:
     """Convert geocentric xyz-coordinates to geodetic latitude-, longitude-, height-coordinates
 
     Reimplementation of GC2GDE.for from the IUA SOFA software collection.
+
+    Caching is opt-in, and based on the identity of `trs`, see `nputil.IdentityCache`. Position arrays cache
+    conversions to other systems themselves, so caching is mainly useful for read-only numpy arrays.
+
+    Large arrays are converted in blocks of `block_size` rows, so that the temporary arrays used by the conversion
+    are bounded by the block size. Blocks are converted in parallel threads if enabled by `nputil.set_workers`. The
+    result is written into `out` if given, which may be `trs` itself.
     
     Args:
-        trs:        Array with geocentric xyz-coordinates in meter
-        ellipsoid:  Ellipsoid definition given via Ellipsoid data class 
+        trs:         Array with geocentric xyz-coordinates in meter
+        ellipsoid:   Ellipsoid definition given via Ellipsoid data class 
+        cache:       Whether to cache the result.
+        out:         Array with the same shape as trs to store the result in.
+        block_size:  Number of rows converted at a time, default is set by `nputil.set_block_size`.
         
     Returns:
         Geodetic latitude, longitude and height coordinates in radian and meter
@@ -34,15 +52,15 @@ def trs2llh(trs: np.ndarray, ellipsoid: Ellipsoid = None) -> np.ndarray:
     if ellipsoid is None:
         ellipsoid = trs.ellipsoid if hasattr(trs, "ellipsoid") else GRS80
 
-    trs = nputil.HashArray(trs)
-    if trs.ndim < 1 or trs.ndim > 2 or trs.shape[-1] != 3:
+    if np.ndim(trs) < 1 or np.ndim(trs) > 2 or np.shape(trs)[-1] != 3:
         raise ValueError("'trs' must be a 1- or 2-dimensional array with 3 columns")
 
-    return _trs2llh(trs, ellipsoid)
+    if cache and out is None:
+        return _CACHE.get(trs, ("trs2llh", ellipsoid), lambda: _convert(_trs2llh, trs, ellipsoid, None, block_size))
+    return _convert(_trs2llh, trs, ellipsoid, out, block_size)
 
 
-@lru_cache()
-def _trs2llh(trs: nputil.HashArray, ellipsoid: Ellipsoid) -> np.ndarray:
+def _trs2llh(trs: np.ndarray, ellipsoid: Ellipsoid, out: Optional[np.ndarray] = None) -> np.ndarray:
     x, y, z = trs.T
 
     e4t = ellipsoid.e2 ** 2 * 1.5
@@ -100,17 +118,30 @@ def _trs2llh(trs: nputil.HashArray, ellipsoid: Ellipsoid) -> np.ndarray:
     # Restore sign of latitude
     lat *= np.sign(z)
 
-    return np.stack((lat, lon, height)).T
+    if out is None:
+        return np.stack((lat, lon, height)).T
+    out[..., 0], out[..., 1], out[..., 2] = lat, lon, height
+    return out
 
 
-def llh2trs(llh: np.ndarray, ellipsoid: Ellipsoid = None) -> np.ndarray:
+def llh2trs(
+    llh: np.ndarray,
+    ellipsoid: Ellipsoid = None,
+    cache: bool = False,
+    out: Optional[np.ndarray] = None,
+    block_size: Optional[int] = None,
+) -> np.ndarray:
     """Convert geodetic latitude-, longitude-, height-coordinates to geocentric xyz-coordinates
 
-    Reimplementation of GD2GCE.for from the IUA SOFA software collection.
+    Reimplementation of GD2GCE.for from the IUA SOFA software collection. Caching, blocks and `out` work as in
+    `trs2llh`.
     
     Args:
-        llh:        Array with geodetic latitude, longitude and height coordinates in radian and meter
-        ellipsoid:  Ellipsoid definition given via Ellipsoid data class 
+        llh:         Array with geodetic latitude, longitude and height coordinates in radian and meter
+        ellipsoid:   Ellipsoid definition given via Ellipsoid data class 
+        cache:       Whether to cache the result.
+        out:         Array with the same shape as llh to store the result in.
+        block_size:  Number of rows converted at a time, default is set by `nputil.set_block_size`.
         
     Returns:
         Array with geocentric xyz-coordinates in meter
@@ -118,15 +149,15 @@ def llh2trs(llh: np.ndarray, ellipsoid: Ellipsoid = None) -> np.ndarray:
     if ellipsoid is None:
         ellipsoid = llh.ellipsoid if hasattr(llh, "ellipsoid") else GRS80
 
-    llh = nputil.HashArray(llh)
-    if llh.ndim < 1 or llh.ndim > 2 or llh.shape[-1] != 3:
+    if np.ndim(llh) < 1 or np.ndim(llh) > 2 or np.shape(llh)[-1] != 3:
         raise ValueError("'llh' must be a 1- or 2-dimensional array with 3 columns")
 
-    return _llh2trs(llh, ellipsoid)
+    if cache and out is None:
+        return _CACHE.get(llh, ("llh2trs", ellipsoid), lambda: _convert(_llh2trs, llh, ellipsoid, None, block_size))
+    return _convert(_llh2trs, llh, ellipsoid, out, block_size)
 
 
-@lru_cache()
-def _llh2trs(llh: nputil.HashArray, ellipsoid: Ellipsoid) -> np.ndarray:
+def _llh2trs(llh: np.ndarray, ellipsoid: Ellipsoid, out: Optional[np.ndarray] = None) -> np.ndarray:
     lat, lon, height = llh.T
 
     coslat, sinlat = np.cos(lat), np.sin(lat)
@@ -140,7 +171,38 @@ def _llh2trs(llh: nputil.HashArray, ellipsoid: Ellipsoid) -> np.ndarray:
     y = r * sinlon
     z = (w * ac + height) * sinlat
 
-    return np.stack((x, y, z)).T
+    if out is None:
+        return np.stack((x, y, z)).T
+    out[..., 0], out[..., 1], out[..., 2] = x, y, z
+    return out
+
+
+def _convert(
+    converter: Callable, val: np.ndarray, ellipsoid: Ellipsoid, out: Optional[np.ndarray], block_size: Optional[int]
+) -> np.ndarray:
+    """Apply a row-wise converter, in blocks of rows if the array is large
+
+    Args:
+        converter:   Function converting rows of val, called as converter(val, ellipsoid, out=out).
+        val:         Array with coordinates to convert.
+        ellipsoid:   Ellipsoid definition given via Ellipsoid data class.
+        out:         Array to store the result in, a new array is created if None.
+        block_size:  Number of rows converted at a time.
+
+    Returns:
+        Array with converted coordinates.
+    """
+    val = np.asarray(val)
+    if out is None:
+        if val.ndim == 1 or len(nputil.blocks(len(val), block_size)) == 1:
+            return converter(val, ellipsoid)
+        out = np.empty(val.shape)
+    elif out.shape != val.shape:
+        raise ValueError(f"'out' must have shape {val.shape}, not {out.shape}")
+
+    if val.ndim == 1:
+        return converter(val, ellipsoid, out=out)
+    return nputil.blockwise(lambda rows, out: converter(rows, ellipsoid, out=out), val, out=out, block_size=block_size)
 
 
 def trs2kepler(trs: "TrsPosVel") -> np.ndarray:
@@ -22,15 +22,26 @@ To use a parser, you will typically use the `parse_file`-function defined below
 
 The name used in `parse_file` to call the parser is the name of the module
 (file) containing the parser.
+
+Several files can be parsed in parallel by worker processes with `parse_files`
+
+    my_parsers = parsers.parse_files('rinex3_obs', file_paths, workers=8)
 """
 
 # Standard library imports
+from concurrent import futures
+import functools
 import pathlib
-from typing import Any, Callable, List, Optional, Union
+import secrets
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Union
 
 # Midgard imports
+from midgard.dev import log
 from midgard.dev import plugins
 from midgard.dev.timer import Timer
+from midgard.parsers import _cache
+from midgard.parsers import _parallel
+from midgard.parsers._cache import set_cache, clear_cache  # noqa
 
 # Make base Parser-classes available at package level
 from midgard.parsers._parser import Parser  # noqa
@@ -61,29 +72,179 @@ def parse_file(
 
         >>> df = parse_file('rinex2_obs', 'ande3160.16o').as_dataframe()  # doctest: +SKIP
 
+    With `use_cache`, files already parsed with the same parser and parser arguments are not parsed again, unless the
+    file has changed. A copy of the cached parser is returned. By default files are only cached in memory, use
+    `set_cache` to also store parsed files on disk.
+
     Args:
         parser_name:    Name of parser
         file_path:      Path to file that should be parsed.
         encoding:       Encoding in file that is parsed.
         timer_logger:   Logging function that will be used to log timing information.
-        use_cache:      Whether to use a cache to avoid parsing the same file several times. (TODO: implement this)
+        use_cache:      Whether to use a cache to avoid parsing the same file several times, see `set_cache`.
         parser_args:    Input arguments to the parser
 
     Returns:
         Parser:  Parser with the parsed data
     """
-    # TODO: Cache
+
+    def create_parser() -> Parser:
+        return plugins.call(
+            package_name=__name__, plugin_name=parser_name, file_path=file_path, encoding=encoding, **parser_args
+        )
+
+    # Look for the parsed data in the cache
+    cache_key = _cache.cache_key(parser_name, file_path, dict(parser_args, encoding=encoding)) if use_cache else None
+    if cache_key is not None:
+        parser = _cache.get(cache_key, create_parser)
+        if parser is not None:
+            log.debug(f"Using cached {parser_name} ({__name__}) - {file_path}")
+            return parser
 
     # Create the parser and parse the data
-    parser = plugins.call(
-        package_name=__name__, plugin_name=parser_name, file_path=file_path, encoding=encoding, **parser_args
-    )
+    parser = create_parser()
     if parser.data_available:
         with Timer(f"Finish {parser_name} ({__name__}) - {file_path} in", logger=timer_logger):
             parser.parse()
+
+    if cache_key is not None:
+        _cache.put(cache_key, parser)
     return parser
 
 
+def parse_files(
+    parser_name: str,
+    file_paths: Iterable[Union[str, pathlib.Path]],
+    workers: Optional[int] = None,
+    encoding: Optional[str] = None,
+    timer_logger: Optional[Callable[[str], None]] = None,
+    use_cache: bool = False,
+    as_dataset: bool = False,
+    **parser_args: Any,
+) -> List[Any]:
+    """Use the given parser on several files in parallel and return parsed data
+
+    The files are parsed by a pool of worker processes, see `parse_file` for the available parsers. The parsers are
+    returned in the same order as the files. An error while parsing one file does not stop the other files from being
+    parsed. Instead the error is logged, and the exception is returned in place of the parser of that file.
+
+    Example:
+
+        >>> dsets = parse_files('rinex3_obs', rinex_paths, workers=8, as_dataset=True)  # doctest: +SKIP
+
+    The time used to parse each file is logged with `timer_logger`, like in `parse_file`. Large numpy arrays are
+    transferred from the worker processes through shared memory instead of being pickled. With `use_cache`, files
+    found in the cache are not sent to the workers, and the other files are added to the cache when parsed.
+
+    Args:
+        parser_name:    Name of parser
+        file_paths:     Paths to files that should be parsed.
+        workers:        Number of worker processes, by default one for each CPU. Use 1 to parse in this process.
+        encoding:       Encoding in files that are parsed.
+        timer_logger:   Logging function that will be used to log timing information.
+        use_cache:      Whether to use a cache to avoid parsing the same file several times, see `set_cache`.
+        as_dataset:     Whether to return Midgard Datasets instead of parsers.
+        parser_args:    Input arguments to the parser
+
+    Returns:
+        Parsers with the parsed data, Datasets if `as_dataset` is True, or exceptions for files that failed.
+    """
+    file_paths = list(file_paths)
+    results: List[Any] = [None] * len(file_paths)
+
+    def finish(idx: int, parse: Callable[[], Any]) -> None:
+        """Store the parser or error of one file, together with logging and caching"""
+        file_path = file_paths[idx]
+        try:
+            parser, time_elapsed = parse()
+            if parser.data_available and timer_logger is not None:
+                timer_logger(f"Finish {parser_name} ({__name__}) - {file_path} in {time_elapsed:.4f} seconds")
+            if cache_keys[idx] is not None:
+                _cache.put(cache_keys[idx], parser)
+            results[idx] = parser.as_dataset() if as_dataset else parser
+        except Exception as err:
+            log.error(f"Failed to parse {file_path} with {parser_name}: {err}")
+            results[idx] = err
+
+    # Look for the parsed data in the cache
+    cache_keys = [
+        _cache.cache_key(parser_name, p, dict(parser_args, encoding=encoding)) if use_cache else None
+        for p in file_paths
+    ]
+    todo = list()
+    for idx, (file_path, cache_key) in enumerate(zip(file_paths, cache_keys)):
+        if cache_key is not None:
+            create_parser = functools.partial(
+                plugins.call,
+                package_name=__name__,
+                plugin_name=parser_name,
+                file_path=file_path,
+                encoding=encoding,
+                **parser_args,
+            )
+            parser = _cache.get(cache_key, create_parser)
+            if parser is not None:
+                log.debug(f"Using cached {parser_name} ({__name__}) - {file_path}")
+                results[idx] = parser.as_dataset() if as_dataset else parser
+                continue
+        todo.append(idx)
+
+    # Parse the other files, in this process if only one worker is used
+    if workers == 1 or len(todo) <= 1:
+        for idx in todo:
+            finish(idx, lambda: _parallel.parse(parser_name, file_paths[idx], encoding, parser_args))
+        return results
+
+    # Shared memory blocks are named by a prefix unique to each file, so that they can be removed if a job fails
+    block_prefix = f"psm_{secrets.token_hex(4)}"
+    with futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        jobs = {
+            executor.submit(
+                _parallel.parse, parser_name, file_paths[idx], encoding, parser_args, f"{block_prefix}_{idx}"
+            ): idx
+            for idx in todo
+        }
+        for job in futures.as_completed(jobs):
+            finish(jobs[job], functools.partial(_parallel.receive, job, f"{block_prefix}_{jobs[job]}"))
+
+    return results
+
+
+def iter_epochs(
+    parser_name: str,
+    file_path: Union[str, pathlib.Path],
+    chunk_epochs: int = 3600,
+    encoding: Optional[str] = None,
+    **parser_args: Any,
+) -> Iterator["Dataset"]:
+    """Use the given parser on an observation file, yielding a Dataset for each chunk of epochs
+
+    The file is parsed while iterating, with only the header and one chunk of observations kept in memory. Parsers
+    supporting this have an `iter_epochs`-method, like `rinex2_obs` and `rinex3_obs`.
+
+    Example:
+
+        >>> for dset in iter_epochs('rinex3_obs', 'trds0320.18o', chunk_epochs=600):  # doctest: +SKIP
+        ...     print(dset.num_obs)
+
+    Args:
+        parser_name:    Name of parser
+        file_path:      Path to file that should be parsed.
+        chunk_epochs:   Number of epochs in each Dataset.
+        encoding:       Encoding in file that is parsed.
+        parser_args:    Input arguments to the parser
+
+    Returns:
+        Datasets with the parsed data of each chunk of epochs
+    """
+    parser = plugins.call(
+        package_name=__name__, plugin_name=parser_name, file_path=file_path, encoding=encoding, **parser_args
+    )
+    if not hasattr(parser, "iter_epochs"):
+        raise TypeError(f"Parser {parser_name!r} can not parse files in chunks of epochs")
+    return parser.iter_epochs(chunk_epochs)
+
+
 def names() -> List[str]:
     """List the names of the available parsers
 
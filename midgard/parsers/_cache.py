@@ -0,0 +1,408 @@
+"""Cache of parsed files, used by parsers.parse_file
+
+Description:
+------------
+
+Parsed files are cached in two layers:
+
++ An in-process LRU cache of the most recently parsed files. A copy of the cached parser is returned, so changing the
+  data of one parser does not change the cache.
++ An optional on-disk store shared between processes, see `set_cache`. The data, meta and other simple attributes of
+  a parser are stored in one HDF5 file per parsed file, without pickling, and set on a new parser when read. The least
+  recently used files are removed when the store grows beyond its maximum size.
+
+An entry is identified by the name of the parser, the path of the file and the parser arguments. It is only used if
+the file has the same fingerprint as when it was parsed, either its size and modification time or a checksum of its
+contents. Entries of files that have changed are removed when they are looked up.
+
+Values are stored on disk as JSON, with tagged objects for types JSON does not support, while numpy arrays are stored
+as HDF5 datasets. Only parsers where every attribute is stored exactly this way are stored on disk, others, for
+instance parsers with TimeArrays or structured arrays, are only cached in memory.
+"""
+
+# Standard library imports
+from collections import OrderedDict
+import copy
+import datetime
+import hashlib
+import json
+import os
+import pathlib
+import threading
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Union
+
+# Third party imports
+import h5py
+import numpy as np
+
+# Midgard imports
+from midgard.data import _h5utils
+from midgard.dev import log
+from midgard.files import files
+
+# Attributes of parsers that are set up when the parser is created, and therefore not stored on disk
+_SKIP_ATTRS = {"file_path", "file_encoding", "parser_name", "data_available"}
+
+# Kinds of numpy arrays stored as HDF5 datasets, see _encode()
+_ARRAY_KINDS = "biufcUM"
+
+# Number of bytes read at a time when calculating checksums
+_CHECKSUM_BLOCK_SIZE = 1_048_576
+
+# Options for the cache, see set_cache()
+_OPTIONS: Dict[str, Any] = dict(maxsize=16, cache_dir=None, max_disk_size=1_000_000_000, checksum=False)
+
+# In-process cache, key: identity of entry, value: (fingerprint of file, parser)
+_MEMORY: "OrderedDict[str, Any]" = OrderedDict()
+_LOCK = threading.Lock()
+
+
+class CacheKey(NamedTuple):
+    """Identity of a parsed file and fingerprint of its contents, see cache_key()"""
+
+    ident: str
+    fingerprint: str
+
+
+def set_cache(
+    maxsize: int = 16,
+    cache_dir: Union[None, str, pathlib.Path] = None,
+    max_disk_size: int = 1_000_000_000,
+    checksum: bool = False,
+) -> None:
+    """Set options for the cache used by parse_file(use_cache=True)
+
+    Args:
+        maxsize:        Number of parsed files cached in memory.
+        cache_dir:      Directory of the on-disk store, None to only cache in memory.
+        max_disk_size:  Largest total size of the on-disk store in bytes.
+        checksum:       Identify changed files by a checksum of their contents instead of size and modification time.
+    """
+    if maxsize < 0 or max_disk_size < 0:
+        raise ValueError(f"Cache sizes must be non-negative, not {maxsize} and {max_disk_size}")
+
+    _OPTIONS.update(
+        maxsize=maxsize,
+        cache_dir=None if cache_dir is None else pathlib.Path(cache_dir),
+        max_disk_size=max_disk_size,
+        checksum=checksum,
+    )
+    with _LOCK:
+        _evict_memory()
+
+
+def clear_cache(disk: bool = False) -> None:
+    """Remove all parsed files from the cache
+
+    Args:
+        disk:  Also remove all files from the on-disk store.
+    """
+    with _LOCK:
+        _MEMORY.clear()
+    if disk and _OPTIONS["cache_dir"] is not None:
+        for cache_path in _OPTIONS["cache_dir"].glob("*.h5"):
+            cache_path.unlink()
+
+
+def cache_key(
+    parser_name: str, file_path: Union[str, pathlib.Path], parser_args: Dict[str, Any]
+) -> Optional[CacheKey]:
+    """Key identifying a parsed file in the cache
+
+    Args:
+        parser_name:  Name of parser.
+        file_path:    Path to the parsed file.
+        parser_args:  Input arguments to the parser, including the encoding.
+
+    Returns:
+        Key of the parsed file, None if the file does not exist or an argument has no stable representation.
+    """
+    file_path = pathlib.Path(file_path).resolve()
+    try:
+        stat = file_path.stat()
+    except OSError:
+        return None
+
+    if _OPTIONS["checksum"]:
+        checksum = hashlib.sha256()
+        with open(file_path, mode="rb") as fid:
+            for block in iter(lambda: fid.read(_CHECKSUM_BLOCK_SIZE), b""):
+                checksum.update(block)
+        fingerprint = f"{stat.st_size}-{checksum.hexdigest()}"
+    else:
+        fingerprint = f"{stat.st_size}-{stat.st_mtime_ns}"
+
+    args = sorted((k, _arg_repr(v)) for k, v in parser_args.items())
+    if any(r is None for _, r in args):
+        log.debug(f"Not caching {file_path}, as the arguments to {parser_name} can not be used as a key")
+        return None
+    ident = hashlib.sha256(repr((parser_name, str(file_path), args)).encode("utf-8")).hexdigest()
+    return CacheKey(ident, fingerprint)
+
+
+def get(key: CacheKey, create_parser: Callable[[], Any]) -> Optional[Any]:
+    """Get a parsed file from the cache
+
+    Args:
+        key:            Key of the parsed file, see cache_key().
+        create_parser:  Function creating an unparsed parser, used when the file is read from the on-disk store.
+
+    Returns:
+        Copy of the cached parser, None if the file is not cached.
+    """
+    with _LOCK:
+        fingerprint, parser = _MEMORY.get(key.ident, (None, None))
+        if fingerprint == key.fingerprint:
+            _MEMORY.move_to_end(key.ident)
+            return copy.deepcopy(parser)
+        _MEMORY.pop(key.ident, None)
+
+    attrs = _read_disk(key)
+    if attrs is None:
+        return None
+
+    parser = create_parser()
+    for name, value in attrs.items():
+        setattr(parser, name, value)
+    parser.data_available = True
+    _put_memory(key, parser)
+    return parser
+
+
+def put(key: CacheKey, parser: Any) -> None:
+    """Add a parsed file to the cache
+
+    Args:
+        key:     Key of the parsed file, see cache_key().
+        parser:  Parser that has parsed the file.
+    """
+    if not parser.data_available:
+        return
+    try:
+        _put_memory(key, parser)
+        _write_disk(key, parser)
+    except Exception as err:  # Caching should never stop parsing
+        log.warn(f"Could not cache {parser}: {err}")
+
+
+def _put_memory(key: CacheKey, parser: Any) -> None:
+    """Add a copy of a parser to the in-process cache, unless it can not be copied"""
+    if not _OPTIONS["maxsize"]:
+        return
+    try:
+        parser_copy = copy.deepcopy(parser)
+    except Exception as err:
+        log.debug(f"Not caching {parser} in memory: {err}")
+        return
+
+    with _LOCK:
+        _MEMORY[key.ident] = (key.fingerprint, parser_copy)
+        _MEMORY.move_to_end(key.ident)
+        _evict_memory()
+
+
+def _evict_memory() -> None:
+    """Remove the least recently used parsers from the in-process cache, must be called with _LOCK held"""
+    while len(_MEMORY) > _OPTIONS["maxsize"]:
+        _MEMORY.popitem(last=False)
+
+
+def _cache_path(key: CacheKey) -> Optional[pathlib.Path]:
+    """Path of a parsed file in the on-disk store, None if there is no on-disk store"""
+    cache_dir = _OPTIONS["cache_dir"]
+    return None if cache_dir is None else cache_dir / f"{key.ident}.h5"
+
+
+def _read_disk(key: CacheKey) -> Optional[Dict[str, Any]]:
+    """Read the attributes of a parser from the on-disk store, None if the file is not stored"""
+    cache_path = _cache_path(key)
+    if cache_path is None or not cache_path.exists():
+        return None
+
+    try:
+        with h5py.File(cache_path, mode="r") as h5_file:
+            if _h5utils.read_attr(h5_file, "fingerprint") != key.fingerprint:
+                attrs = None
+            else:
+                arrays = [_read_array(h5_file["arrays"][str(idx)]) for idx in range(len(h5_file["arrays"]))]
+                attrs = _decode(_h5utils.read_attr(h5_file, "attrs"), arrays)
+    except Exception as err:
+        log.debug(f"Could not read cached file {cache_path}: {err}")
+        attrs = None
+
+    if attrs is None:
+        cache_path.unlink(missing_ok=True)
+    else:
+        os.utime(cache_path)  # Mark as recently used, see _evict_disk()
+    return attrs
+
+
+def _write_disk(key: CacheKey, parser: Any) -> None:
+    """Store the attributes of a parser in the on-disk store
+
+    The parser is only stored if all its attributes can be stored exactly, so that reading it gives the same parser
+    as parsing the file again.
+    """
+    cache_path = _cache_path(key)
+    if cache_path is None:
+        return
+
+    arrays: List[np.ndarray] = list()
+    try:
+        attrs = {n: _encode(v, arrays) for n, v in vars(parser).items() if n not in _SKIP_ATTRS}
+    except (TypeError, RecursionError) as err:
+        log.debug(f"Not caching {parser} on disk: {err}")
+        return
+
+    try:
+        with files.replace_atomically(cache_path) as tmp_path:
+            with h5py.File(tmp_path, mode="w") as h5_file:
+                _h5utils.write_attr(h5_file, "fingerprint", key.fingerprint)
+                _h5utils.write_attr(h5_file, "attrs", json.dumps(attrs, separators=(",", ":")))
+                h5_arrays = h5_file.create_group("arrays")
+                for idx, array in enumerate(arrays):
+                    _write_array(h5_arrays, str(idx), array)
+    except OSError as err:
+        log.debug(f"Could not write cached file {cache_path}: {err}")
+        return
+
+    _evict_disk(cache_path.parent)
+
+
+def _evict_disk(cache_dir: pathlib.Path) -> None:
+    """Remove the least recently used files until the on-disk store is within its maximum size"""
+    cache_files = list()
+    for cache_path in cache_dir.glob("*.h5"):
+        try:
+            cache_files.append((cache_path.stat(), cache_path))
+        except OSError:  # Removed by another process
+            pass
+
+    total_size = sum(stat.st_size for stat, _ in cache_files)
+    for stat, cache_path in sorted(cache_files, key=lambda f: f[0].st_mtime_ns):
+        if total_size <= _OPTIONS["max_disk_size"]:
+            break
+        cache_path.unlink(missing_ok=True)
+        total_size -= stat.st_size
+
+
+def _arg_repr(value: Any) -> Optional[str]:
+    """Representation of a parser argument identifying its value, None if there is none
+
+    Numpy arrays are represented by their type, shape and a checksum of their values, as repr() only shows some of
+    the values of large arrays. Objects with the default repr() are only identified by their address, which is not
+    stable, and have no representation.
+    """
+    if isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            return None
+        checksum = hashlib.sha256(np.ascontiguousarray(value).tobytes()).hexdigest()
+        return f"ndarray({value.dtype.str}, {value.shape}, {checksum})"
+    if isinstance(value, (list, tuple, set, frozenset, dict)):
+        items = value.items() if isinstance(value, dict) else value
+        reprs = [_arg_repr(v) for v in items]
+        if any(r is None for r in reprs):
+            return None
+        reprs = sorted(reprs) if isinstance(value, (set, frozenset, dict)) else reprs
+        return f"{type(value).__name__}({', '.join(reprs)})"
+
+    value_repr = repr(value)
+    return None if " at 0x" in value_repr else value_repr
+
+
+def _write_array(h5_group: "h5py.Group", name: str, array: np.ndarray) -> None:
+    """Store a numpy array as a HDF5 dataset, see _read_array()"""
+    if array.dtype.kind == "U":
+        h5_dataset = h5_group.create_dataset(name, data=np.char.encode(array, "utf-8"))
+        h5_dataset.attrs.update(dtype="str", str_dtype=array.dtype.str)
+    elif array.dtype.kind == "M":
+        h5_group.create_dataset(name, data=array.view(np.int64)).attrs["dtype"] = str(array.dtype)
+    else:
+        h5_group.create_dataset(name, data=array)
+
+
+def _read_array(h5_dataset: "h5py.Dataset") -> np.ndarray:
+    """Read a numpy array stored by _write_array()"""
+    dtype = h5_dataset.attrs.get("dtype")
+    values = h5_dataset[()]
+    if dtype == "str":
+        return np.char.decode(values, "utf-8").astype(h5_dataset.attrs["str_dtype"])
+    if dtype is not None:
+        return values.view(dtype)
+    return values
+
+
+def _encode(value: Any, arrays: List[np.ndarray]) -> Any:
+    """Convert a value to types understood by JSON
+
+    Numpy arrays are added to arrays and replaced by their position in the list. Other types not understood by JSON
+    are replaced by tagged objects, see _decode(). Only values that are decoded to the same type are encoded, for
+    instance subclasses of the supported types raise a TypeError.
+    """
+    value_type = type(value)
+    if value is None or value_type in (bool, str, int, float):
+        return value
+    if value_type is np.ndarray:
+        if value.dtype.kind in _ARRAY_KINDS:
+            arrays.append(value)
+            return {"__array__": len(arrays) - 1}
+        if value.dtype.kind == "O":
+            return {"__objects__": [value.shape, [_encode(v, arrays) for v in value.ravel()]]}
+    if isinstance(value, np.generic) and value.dtype.kind in _ARRAY_KINDS:
+        arrays.append(np.asarray(value).reshape(1))
+        return {"__scalar__": len(arrays) - 1}
+    if value_type is datetime.datetime:
+        return {"__datetime__": value.isoformat()}
+    if value_type is datetime.date:
+        return {"__date__": value.isoformat()}
+    if value_type is type(pathlib.Path()):
+        return {"__path__": str(value)}
+    if value_type is list:
+        return [_encode(v, arrays) for v in value]
+    if value_type is tuple:
+        return {"__tuple__": [_encode(v, arrays) for v in value]}
+    if value_type is set:
+        return {"__set__": [_encode(v, arrays) for v in value]}
+    if value_type is frozenset:
+        return {"__frozenset__": [_encode(v, arrays) for v in value]}
+    if value_type is dict:
+        if all(isinstance(k, str) and not k.startswith("__") for k in value):
+            return {k: _encode(v, arrays) for k, v in value.items()}
+        return {"__dict__": [[_encode(k, arrays), _encode(v, arrays)] for k, v in value.items()]}
+    raise TypeError(f"Cannot store {value_type.__name__} in cache")
+
+
+def _decode(encoded: str, arrays: List[np.ndarray]) -> Any:
+    """Convert values encoded by _encode() back to their original types"""
+
+    def from_json(obj: Dict[str, Any]) -> Any:
+        if len(obj) != 1:
+            return obj
+        tag, value = next(iter(obj.items()))
+        if tag == "__array__":
+            return arrays[value]
+        if tag == "__scalar__":
+            return arrays[value][0]
+        if tag == "__objects__":
+            shape, values = value
+            objects = np.empty(len(values), dtype=object)
+            for idx, obj_value in enumerate(values):
+                objects[idx] = obj_value
+            return objects.reshape(shape)
+        if tag == "__datetime__":
+            return datetime.datetime.fromisoformat(value)
+        if tag == "__date__":
+            return datetime.date.fromisoformat(value)
+        if tag == "__path__":
+            return pathlib.Path(value)
+        if tag == "__tuple__":
+            return tuple(value)
+        if tag == "__set__":
+            return set(value)
+        if tag == "__frozenset__":
+            return frozenset(value)
+        if tag == "__dict__":
+            return {k: v for k, v in value}
+        return obj
+
+    return json.loads(encoded, object_hook=from_json)
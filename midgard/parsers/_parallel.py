@@ -0,0 +1,159 @@
+"""Parsing of several files in worker processes, used by parsers.parse_files
+
+Description:
+------------
+
+Each file is parsed by a worker process, which returns the parser with the parsed data to the main process. Large
+numpy arrays in the data are not pickled. Instead the worker copies them into shared memory blocks, and the main
+process copies them out of the blocks and removes the blocks. This avoids pickling big observation arrays and
+sending them through a pipe.
+
+Only plain numpy arrays of at least `SHARED_MIN_BYTES` bytes, stored directly or in nested dictionaries in the data
+of the parser, are transferred through shared memory. All other values are pickled as usual.
+
+The shared memory blocks are owned by the main process, which removes them. They are therefore not tracked by the
+worker processes, which would otherwise try to remove them again when exiting. The main process chooses a prefix for
+the names of the blocks of each file, and the worker numbers the blocks it creates in order. The main process can
+therefore remove the blocks also when the worker fails, or the parser can not be returned.
+"""
+
+# Standard library imports
+from concurrent import futures
+import functools
+import itertools
+from multiprocessing import resource_tracker, shared_memory
+import pathlib
+import sys
+from typing import Any, Callable, Dict, Iterator, NamedTuple, Optional, Tuple, Union
+
+# Third party imports
+import numpy as np
+
+# Midgard imports
+from midgard.dev import plugins
+from midgard.dev.timer import Timer
+
+# Smallest arrays transferred through shared memory, smaller arrays are cheaper to pickle
+SHARED_MIN_BYTES = 1_048_576
+
+
+class SharedArray(NamedTuple):
+    """Placeholder for an array in a shared memory block"""
+
+    name: str
+    shape: Tuple[int, ...]
+    dtype: np.dtype
+
+
+def parse(
+    parser_name: str,
+    file_path: Union[str, pathlib.Path],
+    encoding: Optional[str],
+    parser_args: Dict[str, Any],
+    block_prefix: Optional[str] = None,
+) -> Tuple[Any, float]:
+    """Parse a file, typically in a worker process
+
+    Args:
+        parser_name:   Name of parser.
+        file_path:     Path to file that should be parsed.
+        encoding:      Encoding in file that is parsed.
+        parser_args:   Input arguments to the parser.
+        block_prefix:  Prefix of the names of shared memory blocks large arrays are moved into, see `receive`. By
+                       default arrays are not moved into shared memory.
+
+    Returns:
+        Parser with the parsed data and the time used for parsing in seconds.
+    """
+    parser = plugins.call(
+        package_name=__package__, plugin_name=parser_name, file_path=file_path, encoding=encoding, **parser_args
+    )
+    time_elapsed = 0.0
+    if parser.data_available:
+        timer = Timer(logger=None)
+        timer.start()
+        parser.parse()
+        time_elapsed = timer.end()
+
+    if block_prefix is not None:
+        parser.data = _map_arrays(parser.data, functools.partial(_to_shared, names=_block_names(block_prefix)))
+    return parser, time_elapsed
+
+
+def receive(job: futures.Future, block_prefix: str) -> Tuple[Any, float]:
+    """Copy arrays moved into shared memory by `parse` back into the data of a parser
+
+    The shared memory blocks are removed, also if the job failed.
+
+    Args:
+        job:           Job running `parse` in a worker process.
+        block_prefix:  Prefix of the names of the shared memory blocks, given to `parse`.
+
+    Returns:
+        The parser, with all data in regular numpy arrays, and the time used for parsing.
+    """
+    try:
+        parser, time_elapsed = job.result()
+        parser.data = _map_arrays(parser.data, _from_shared)
+    finally:
+        for name in _block_names(block_prefix):
+            if not _unlink(name):
+                break
+    return parser, time_elapsed
+
+
+def _block_names(block_prefix: str) -> Iterator[str]:
+    """Names of the shared memory blocks with the given prefix, in the order they are created"""
+    return (f"{block_prefix}_{num}" for num in itertools.count())
+
+
+def _map_arrays(value: Any, func: Callable[[Any], Any]) -> Any:
+    """Apply a function to all values, recursing into dictionaries"""
+    if isinstance(value, dict):
+        return {k: _map_arrays(v, func) for k, v in value.items()}
+    return func(value)
+
+
+def _to_shared(value: Any, names: Iterator[str]) -> Any:
+    """Copy a large array into a new shared memory block, named by the next of the names"""
+    if type(value) is not np.ndarray or value.nbytes < SHARED_MIN_BYTES or value.dtype.hasobject:
+        return value
+
+    if sys.version_info >= (3, 13):
+        shm = shared_memory.SharedMemory(name=next(names), create=True, size=value.nbytes, track=False)
+    else:
+        shm = shared_memory.SharedMemory(name=next(names), create=True, size=value.nbytes)
+        resource_tracker.unregister(shm._name, "shared_memory")
+    try:
+        shared = np.ndarray(value.shape, dtype=value.dtype, buffer=shm.buf)
+        shared[...] = value
+        del shared  # The block can not be closed while an array uses its buffer
+    finally:
+        shm.close()
+    return SharedArray(shm.name, value.shape, value.dtype)
+
+
+def _from_shared(value: Any) -> Any:
+    """Copy an array out of a shared memory block"""
+    if not isinstance(value, SharedArray):
+        return value
+
+    shm = shared_memory.SharedMemory(name=value.name)
+    try:
+        shared = np.ndarray(value.shape, dtype=value.dtype, buffer=shm.buf)
+        array = shared.copy()
+        del shared
+    finally:
+        shm.close()
+    return array
+
+
+def _unlink(name: str) -> bool:
+    """Remove a shared memory block, return False if it does not exist"""
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return False
+    shm.close()
+    shm.unlink()
+    return True
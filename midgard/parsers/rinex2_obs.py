@@ -19,10 +19,11 @@ Reads data from files in the Rinex file format 2.11 (see :cite:`rinex2`).
 """
 
 # Standard library imports
+import copy
 from datetime import timedelta
 import dateutil.parser
 import itertools
-from typing import Any, Callable, Dict, Iterable, List, Tuple, Union
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 # External library imports
 import numpy as np
@@ -31,6 +32,7 @@ import numpy as np
 from midgard.data import dataset
 from midgard.dev import plugins
 from midgard.dev import log
+from midgard.files import files
 from midgard.gnss.gnss import obstype_to_freq
 from midgard.parsers import ChainParser, ParserDef
 from midgard.math.constant import constant
@@ -283,6 +285,95 @@ class Rinex2Parser(ChainParser):
 
         return itertools.chain([header_parser], itertools.repeat(obs_parser))
 
+    def read_data(self) -> None:
+        """Read data from RINEX observation file
+
+        The file is parsed line by line. Observation lines of epochs removed by the sampling rate are skipped without
+        being parsed.
+        """
+        with files.open(self.file_path, mode="rt", encoding=self.file_encoding) as fid:
+            self._read_header(fid)
+            for _ in self._read_epochs(fid, chunk_epochs=None):
+                pass
+
+    def iter_epochs(self, chunk_epochs: int = 3600) -> Iterator["Dataset"]:
+        """Parse RINEX observation file in chunks of epochs, yielding one Dataset for each chunk
+
+        Only the header and the observations of one chunk are kept in memory, so files of any length can be read.
+        Each chunk is postprocessed separately, and `self.data` holds the data of the last chunk read.
+
+        Args:
+            chunk_epochs:  Number of epochs in each chunk, after decimation by the sampling rate.
+
+        Returns:
+            Datasets with the observations of each chunk, see `as_dataset`.
+        """
+        if chunk_epochs < 1:
+            raise ValueError(f"Number of epochs in each chunk must be positive, not {chunk_epochs}")
+        if not self.data_available:
+            return
+
+        with files.open(self.file_path, mode="rt", encoding=self.file_encoding) as fid:
+            self._read_header(fid)
+            header_data, header_meta = copy.deepcopy(self.data), copy.deepcopy(self.meta)
+            for _ in self._read_epochs(fid, chunk_epochs):
+                if "time" in self.data:
+                    self.postprocess_data()
+                    yield self.as_dataset()
+                self.data, self.meta = copy.deepcopy(header_data), copy.deepcopy(header_meta)
+
+    def _read_header(self, fid: Iterable[str]) -> None:
+        """Parse the header of RINEX observation file line by line, stopping after the end of the header"""
+        header_parser = next(iter(self.setup_parser()))
+        cache = dict(line_num=0)
+        for line in fid:
+            cache["line_num"] += 1
+            self.parse_line(line.rstrip(), cache, header_parser)
+            if header_parser.end_marker(line.rstrip(), cache["line_num"], None):
+                break
+
+    def _read_epochs(self, fid: Iterable[str], chunk_epochs: Optional[int]) -> Iterator[None]:
+        """Parse RINEX observation records line by line, pausing after each chunk of epochs
+
+        The observations are added to `self.data`, which may be replaced while paused. Observation lines of epochs
+        removed by the sampling rate are skipped in bulk without being parsed.
+
+        Args:
+            fid:           Lines of the file following the header.
+            chunk_epochs:  Number of epochs in each chunk, None to only pause at the end of the file.
+        """
+        _, obs_parser = itertools.islice(self.setup_parser(), 2)
+        lines_per_sat = -(-self.meta.get("num_obstypes", 0) // 5)  # Each observation line holds 5 observations
+        cache: Dict[str, Any] = dict(line_num=0)
+        num_epochs = 0
+
+        # Iterate over all file lines together with the next line
+        file_lines = iter(fid)
+        next_line = next(file_lines, None)
+        while next_line is not None:
+            line, next_line = next_line, next(file_lines, None)
+            cache["line_num"] += 1
+            if "obs_sec" not in cache or cache["obs_sec"] is not None:
+                self.parse_line(line.rstrip(), cache, obs_parser)
+
+            # Skip the remaining lines of an epoch removed by the sampling rate in bulk. The number of lines is given by
+            # the number of satellites in the epoch line: continuation lines of the satellite list with 12 satellites
+            # in each line, and observation lines for each satellite
+            if cache["line_num"] == 1 and cache.get("obs_sec", 0) is None and "num_sat" in cache:
+                num_lines = (cache["num_sat"] - 1) // 12 + cache["num_sat"] * lines_per_sat
+                if num_lines > 0 and next_line is not None:
+                    next_line = next(itertools.islice(file_lines, num_lines - 1, None), None)
+
+            if next_line is None or obs_parser.end_marker(line.rstrip(), cache["line_num"], next_line):
+                num_epochs += cache.get("obs_sec") is not None
+                cache = dict(line_num=0)
+                if chunk_epochs is not None and num_epochs >= chunk_epochs:
+                    num_epochs = 0
+                    yield
+
+        if num_epochs or chunk_epochs is None:
+            yield
+
     #
     # HEADER PARSERS
     #
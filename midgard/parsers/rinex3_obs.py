@@ -20,10 +20,11 @@ Reads data from files in the RINEX file format version 3.03 (see :cite:`rinex3`)
 """
 
 # Standard library imports
+import copy
 from datetime import timedelta
 import dateutil.parser
 import itertools
-from typing import Any, Callable, Dict, Iterable, List, Tuple, Union
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple, Union
 
 # External library imports
 import numpy as np
@@ -32,6 +33,7 @@ import numpy as np
 from midgard.data import dataset
 from midgard.dev import plugins
 from midgard.dev import log
+from midgard.files import files
 from midgard.gnss.gnss import obstype_to_freq
 from midgard.parsers import ChainParser, ParserDef
 from midgard.math.constant import constant
@@ -40,6 +42,29 @@ from midgard.math.unit import Unit
 
 SYSTEM_TIME_OFFSET_TO_GPS_TIME = dict(BDT=14, GAL=0, IRN=0, QZS=0)
 
+# Fields of observation epoch lines
+#
+# ----+----1----+----2----+----3----+----4----+----5----+----6----+----7----+----8----+----9
+# > 2006 03 24 13 10 36.0000000  0  5      -0.123456789012
+EPOCH_FIELDS = {
+    "year": (2, 6),
+    "month": (7, 9),
+    "day": (10, 12),
+    "hour": (13, 15),
+    "minute": (16, 18),
+    "second": (18, 29),
+    "epoch_flag": (31, 32),
+    "num_sat": (32, 35),
+    "rcv_clk_offset": (41, 56),
+    "comment": (60, 80),
+}
+
+# Observation records are read in blocks of this many epochs, see Rinex3Parser.read_data()
+_BLOCK_EPOCHS = 3_600
+
+# Width of an observation in an observation line: F14.3 value, loss of lock indicator and signal strength
+_OBS_WIDTH = 16
+
 
 @plugins.register
 class Rinex3Parser(ChainParser):
@@ -92,9 +117,9 @@ class Rinex3Parser(ChainParser):
     # PARSERS
     #
     def setup_parser(self) -> Iterable[ParserDef]:
-        """Parsers defined for reading RINEX observation file line by line.
+        """Parser defined for reading the header of RINEX observation file line by line.
 
-           First the RINEX header information are read and afterwards the RINEX observation.
+           The RINEX observation records are read afterwards by `read_data`.
         """
         # Parser for RINEX header
         header_parser = ParserDef(
@@ -295,49 +320,98 @@ class Rinex3Parser(ChainParser):
             },
         )
 
-        # Parser for RINEX observation blocks
-
-        # ----+----1----+----2----+----3----+----4----+----5----+----6----+----7----+----8----+----9
-        # > 2006 03 24 13 10 36.0000000  0  5      -0.123456789012
-        # G06  23629347.915            .300 8         -.353 4  23629347.158          24.158
-        # G09  20891534.648           -.120 9         -.358 6  20891545.292          38.123
-        # E11          .324 8          .178 7
-        # S20  38137559.506      335849.135 9
-        obs_parser = ParserDef(
-            end_marker=lambda _l, _ln, next_line: next_line.startswith(">"),
-            label=lambda line, _ln: (
-                line[0:1].isalpha()  # Obs line start with sat. system identifier
-                and not line.startswith(">")  # Observation epoch line starts with '>'
-                and not line[60:61].isalpha()
-            ),  # Comment line
-            parser_def={
-                False: {
-                    "parser": self._parse_observation_epoch,
-                    "fields": {
-                        "year": (2, 6),
-                        "month": (7, 9),
-                        "day": (10, 12),
-                        "hour": (13, 15),
-                        "minute": (16, 18),
-                        "second": (18, 29),
-                        "epoch_flag": (31, 32),
-                        "num_sat": (32, 35),
-                        "rcv_clk_offset": (41, 56),
-                        "comment": (60, 80),
-                    },
-                },
-                True: {
-                    "parser": self._parse_observation,
-                    "strip": "\n",  # Remove only newline '\n' leading and trailing characters from line.
-                    "fields": {
-                        "sat": (0, 3),
-                        "obs": (3, None),  # 'None' indicates, that line is sliced until the end of line.
-                    },
-                },
-            },
-        )
+        return [header_parser]
 
-        return itertools.chain([header_parser], itertools.repeat(obs_parser))
+    def read_data(self) -> None:
+        """Read data from RINEX observation file
+
+        The header is parsed line by line. The observation records are read in blocks of epochs, which are decoded
+        column by column, see `_parse_observation_block`.
+        """
+        with files.open(self.file_path, mode="rt", encoding=self.file_encoding) as fid:
+            self._read_header(fid)
+            blocks = [self._parse_observation_block(*chunk) for chunk in self._iter_epoch_lines(fid, _BLOCK_EPOCHS)]
+        self._concatenate_observation_blocks(blocks)
+
+    def iter_epochs(self, chunk_epochs: int = 3600) -> Iterator["Dataset"]:
+        """Parse RINEX observation file in chunks of epochs, yielding one Dataset for each chunk
+
+        Only the header and the observations of one chunk are kept in memory, so files of any length can be read.
+        Each chunk is postprocessed separately, and `self.data` holds the data of the last chunk read.
+
+        Args:
+            chunk_epochs:  Number of epochs in each chunk, after decimation by the sampling rate.
+
+        Returns:
+            Datasets with the observations of each chunk, see `as_dataset`.
+        """
+        if chunk_epochs < 1:
+            raise ValueError(f"Number of epochs in each chunk must be positive, not {chunk_epochs}")
+        if not self.data_available:
+            return
+
+        with files.open(self.file_path, mode="rt", encoding=self.file_encoding) as fid:
+            self._read_header(fid)
+            header_data, header_meta = copy.deepcopy(self.data), copy.deepcopy(self.meta)
+            for lines, epochs in self._iter_epoch_lines(fid, chunk_epochs):
+                self.data, self.meta = copy.deepcopy(header_data), copy.deepcopy(header_meta)
+                self._concatenate_observation_blocks([self._parse_observation_block(lines, epochs)])
+                if "time" in self.data:
+                    self.postprocess_data()
+                    yield self.as_dataset()
+
+    def _read_header(self, fid: Iterable[str]) -> None:
+        """Parse the header of RINEX observation file line by line, stopping after the end of the header"""
+        (header_parser,) = self.setup_parser()
+        cache = dict(line_num=0)
+        for line in fid:
+            cache["line_num"] += 1
+            self.parse_line(line.rstrip(), cache, header_parser)
+            if header_parser.end_marker(line.rstrip(), cache["line_num"], None):
+                break
+
+    def _iter_epoch_lines(
+        self, fid: Iterable[str], chunk_epochs: int
+    ) -> Iterator[Tuple[List[str], List[Dict[str, Any]]]]:
+        """Gather the lines of RINEX observation records in chunks of epochs
+
+        Epoch lines are parsed to find the epochs removed by the sampling rate. The observation lines of these epochs,
+        one line for each satellite given by the epoch line, are skipped in bulk without being parsed. Only epochs
+        with observations, i.e. epoch flag 0 or 1, count towards the number of epochs in a chunk, while event records
+        with higher epoch flags are kept in the chunk they appear in.
+
+        Args:
+            fid:           Lines of the file following the header.
+            chunk_epochs:  Number of epochs in each chunk.
+
+        Returns:
+            Lines of each chunk, and the parsed epoch information of each epoch line in the chunk.
+        """
+        file_lines = iter(fid)
+        lines: List[str] = list()
+        epochs: List[Dict[str, Any]] = list()
+        num_epochs = 0
+        use_epoch = False
+        for line in file_lines:
+            if line.startswith(">"):
+                if num_epochs >= chunk_epochs:
+                    yield lines, epochs
+                    lines, epochs, num_epochs = list(), list(), 0
+                fields = _epoch_fields(line)
+                epoch: Dict[str, Any] = dict(obs_sec=None)
+                self._parse_observation_epoch(fields, epoch)
+                use_epoch = epoch["obs_sec"] is not None
+                num_epochs += use_epoch and epoch["epoch_flag"] in (0, 1)
+                if not use_epoch and "obs_time" in epoch and fields["num_sat"].isdigit():
+                    num_lines = int(fields["num_sat"])
+                    next(itertools.islice(file_lines, num_lines, num_lines), None)  # Skip lines without parsing them
+                if use_epoch:
+                    epochs.append(epoch)
+            if use_epoch:
+                lines.append(line)
+
+        if lines:
+            yield lines, epochs
 
     #
     # HEADER PARSERS
@@ -588,60 +662,88 @@ class Rinex3Parser(ChainParser):
             if cache["obs_sec"] % self.sampling_rate != 0:
                 cache["obs_sec"] = None  # Ignore epoch
 
-    def _parse_observation(self, line: Dict[str, str], cache: Dict[str, Any]) -> None:
-        """Parse observation record of RINEX file
+    def _parse_observation_block(self, lines: List[str], epochs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Parse a block of lines with RINEX observation records
+
+        The lines are copied into a fixed-width byte buffer, in which each observation type is a fixed range of
+        columns. The epoch lines are already parsed by `_iter_epoch_lines`, while the observations of all observation
+        lines are decoded column by column with numpy. Unused observation types of a satellite system are filled with NaN values, so
+        that all observation type fields have the same length.
+
+            ----+----1----+----2----+----3----+----4----+----5----+----6----+----7----+----8----+----9
+            > 2006 03 24 13 10 36.0000000  0  5      -0.123456789012
+            G06  23629347.915            .300 8         -.353 4  23629347.158          24.158
+            G09  20891534.648           -.120 9         -.358 6  20891545.292          38.123
+            E11          .324 8          .178 7
+            S20  38137559.506      335849.135 9
+
+        Args:
+            lines:   Lines of the block, starting with an epoch line.
+            epochs:  Epoch information of each epoch line in the block, see `_parse_observation_epoch`.
 
-        In addition the RINEX observation are rejected from satellites not given in configuration file.
+        Returns:
+            Observation data of the block, with the same structure as `self.data`.
         """
+        num_obstypes = max([len(t) for t in self.meta["obstypes"].values()], default=0)
+        width = max(61, 3 + _OBS_WIDTH * num_obstypes)
+        text = "".join(line.rstrip("\n").ljust(width)[:width] for line in lines)
+        buffer = np.frombuffer(text.encode("latin-1", errors="replace"), dtype=np.uint8).reshape(len(lines), width)
+
+        # Observation lines start with satellite system identifier, comment lines have text in column 60
+        is_epoch = buffer[:, 0] == ord(">")
+        is_obs = _is_alpha(buffer[:, 0]) & ~_is_alpha(buffer[:, 60])
+
+        # Observation lines before the first epoch line are ignored
+        epochs = [dict(obs_sec=None), *epochs]
+
         # Ignore epochs based on sampling rate
-        sec = cache["obs_sec"]
-        if sec is None:
-            return
+        epoch_idx = np.cumsum(is_epoch)
+        use_epoch = np.array([e["obs_sec"] is not None for e in epochs])
+        rows = np.flatnonzero(is_obs & use_epoch[epoch_idx])
+        epoch_idx = epoch_idx[rows]
+        obs_buffer = buffer[rows]
+        num_obs = len(rows)
+
+        satellites = np.ascontiguousarray(obs_buffer[:, :3]).view("S3")[:, 0].astype(str)
+        systems = np.ascontiguousarray(obs_buffer[:, :1]).view("S1")[:, 0].astype(str)
+        block = dict(
+            obs={t: np.full(num_obs, np.nan) for t in self.obstypes_all},
+            cycle_slip={t: np.full(num_obs, np.nan) for t in self.obstypes_all},
+            signal_strength={t: np.full(num_obs, np.nan) for t in self.obstypes_all},
+        )
 
-        # Fit length of observation line against definition (16 characters * number of observation types)
-        #
-        # NOTE: This is necessary, because missing observations are written as 0.0 or BLANK in RINEX format. Therefore
-        #       the last observation can be BLANK. In this case the length of observation line does not fit the
-        #       definition (16 characters * number of observation types), which is assumed by reading the observation
-        #       line in the following.
-        sys = line["sat"][0]
-        num_obstypes = len(self.meta["obstypes"][sys])
-        field_length = 16
-        line_length = field_length * num_obstypes
-        line["obs"] = line["obs"].ljust(line_length)
-
-        # Parse observation line in fields
-        for idx, obs_type in zip(range(0, line_length, field_length), self.meta["obstypes"][sys]):
-            value = line["obs"][idx : idx + field_length]
-            self.data["obs"][obs_type].append(_float(value[0:14]))
-            self.data["cycle_slip"][obs_type].append(_float(value[14:15]))
-            self.data["signal_strength"][obs_type].append(_float(value[15:16]))
-
-        # Fill unused observation types with NaN values
-        #
-        # NOTE: Each observation type is saved in a Dataset field. The observation type fields have the same length
-        #       to be consistent with the time, system or satellite Dataset field. The problem is that some observation
-        #       types are not observed for a certain satellite system, but these observation are included with NaN
-        #       values in the observation type field, which is done in the following.
-        unused_obstypes = set(self.obstypes_all) - set(self.meta["obstypes"][sys])
-        for obs_type in unused_obstypes:
-            self.data["obs"][obs_type].append(float("nan"))
-            self.data["cycle_slip"][obs_type].append(float("nan"))
-            self.data["signal_strength"][obs_type].append(float("nan"))
-
-        self.data.setdefault("time", list()).append(cache["obs_time"])
-        self.data.setdefault("epoch_flag", list()).append(cache["epoch_flag"])
-        self.data.setdefault("rcv_clk_offset", list()).append(cache["rcv_clk_offset"])
-
-        obs = {
-            "station": self.meta["marker_name"].lower(),  # vars['station'],
-            "system": sys,
-            "satellite": line["sat"],
-            "satnum": line["sat"][1:3],
+        # Parse observation lines in fields
+        for sys in np.unique(systems):
+            sys_idx = np.flatnonzero(systems == sys)
+            for idx, obs_type in enumerate(self.meta["obstypes"][sys]):
+                field = obs_buffer[sys_idx, 3 + idx * _OBS_WIDTH : 3 + (idx + 1) * _OBS_WIDTH]
+                block["obs"][obs_type][sys_idx] = _decode_floats(field[:, 0:14])
+                block["cycle_slip"][obs_type][sys_idx] = _decode_digits(field[:, 14])
+                block["signal_strength"][obs_type][sys_idx] = _decode_digits(field[:, 15])
+
+        block["time"] = np.array([e.get("obs_time", "") for e in epochs])[epoch_idx]
+        block["epoch_flag"] = np.array([e.get("epoch_flag", 0) for e in epochs])[epoch_idx]
+        block["rcv_clk_offset"] = np.array([e.get("rcv_clk_offset", np.nan) for e in epochs])[epoch_idx]
+        block["text"] = {
+            "station": np.full(num_obs, self.meta["marker_name"].lower()),
+            "system": systems,
+            "satellite": satellites,
+            "satnum": np.ascontiguousarray(obs_buffer[:, 1:3]).view("S2")[:, 0].astype(str),
         }
+        return block
 
-        for field, value in obs.items():
-            self.data.setdefault("text", dict()).setdefault(field, list()).append(value)
+    def _concatenate_observation_blocks(self, blocks: List[Dict[str, Any]]) -> None:
+        """Join observation data of all blocks read by `_parse_observation_block` into `self.data`"""
+        num_obs = sum(len(b["time"]) for b in blocks)
+        for name in ("obs", "cycle_slip", "signal_strength"):
+            for obs_type in self.data.get(name, dict()):
+                self.data[name][obs_type] = np.concatenate([np.zeros(0)] + [b[name][obs_type] for b in blocks])
+
+        if not num_obs:
+            return
+        for name in ("time", "epoch_flag", "rcv_clk_offset"):
+            self.data[name] = np.concatenate([b[name] for b in blocks])
+        self.data["text"] = {f: np.concatenate([b["text"][f] for b in blocks]) for f in blocks[0]["text"]}
 
     #
     # SETUP POSTPROCESSORS
@@ -689,7 +791,7 @@ class Rinex3Parser(ChainParser):
         remove_obstype = []  # List with observation types, which should be removed from Dataset.
         remove_obstype_sys = {}  # Dictionary with obstypes for each GNSS, should be removed from meta['obstypes'].
         for obstype, obs in self.data["obs"].items():
-            if not obs or np.all(np.isnan(obs)):
+            if not len(obs) or np.all(np.isnan(obs)):
                 remove_obstype.append(obstype)
             systems = set(self.data["text"]["system"])
             for sys in systems:
@@ -867,11 +969,13 @@ class Rinex3Parser(ChainParser):
         from datetime import datetime, timedelta
         rinexsecfrac_to_millisecond = 10000  #e.g. fractional seconds part 1000001 = 100.0001 ms
 
+        # Observations of the same epoch share the same time, so each epoch is only converted once
+        epochs, epoch_idx = np.unique(self.data["time"], return_inverse=True)
         date = []
-        for v in self.data["time"]:
+        for v in epochs:
             val, secfrac = v.split(".")
             date.append(datetime.strptime(val, "%Y-%m-%dT%H:%M:%S") + timedelta(milliseconds=int(secfrac)/rinexsecfrac_to_millisecond))
-        dset.add_time("time", val=date, scale=self.time_scale, fmt="datetime")
+        dset.add_time("time", val=np.array(date)[epoch_idx], scale=self.time_scale, fmt="datetime")
         dset.add_float("epoch_flag", val=np.array(self.data["epoch_flag"]))
         dset.add_float("rcv_clk_offset", val=np.array(self.data["rcv_clk_offset"]))
 
@@ -894,6 +998,81 @@ class Rinex3Parser(ChainParser):
         return dset
 
 
+def _epoch_fields(line: str) -> Dict[str, str]:
+    """Split observation epoch line into fields, see EPOCH_FIELDS"""
+    line = line.rstrip()
+    return {field: line[slice(*idx)].strip() for field, idx in EPOCH_FIELDS.items()}
+
+
+def _is_alpha(chars: np.ndarray) -> np.ndarray:
+    """Check which ASCII codes are letters"""
+    upper = chars & 0xDF  # Clear bit distinguishing lowercase from uppercase letters
+    return (upper >= ord("A")) & (upper <= ord("Z"))
+
+
+def _decode_digits(chars: np.ndarray) -> np.ndarray:
+    """Convert ASCII codes of single digits to float values
+
+    Whitespace and zero values are set to NaN, like in `_float`.
+
+    Args:
+        chars:  ASCII codes of one character for each value.
+
+    Returns:
+        Float values
+    """
+    digits = chars.astype(float) - ord("0")
+    return np.where((digits >= 1) & (digits <= 9), digits, np.nan)
+
+
+def _decode_floats(chars: np.ndarray) -> np.ndarray:
+    """Convert fixed-width ASCII fields to float values
+
+    The digits of each field are combined into an integer, which is divided by a power of ten given by the position
+    of the decimal point. Both numbers are exactly represented as floats, so the result is the same as `float(value)`.
+    Fields containing other characters than digits, a sign and a decimal point, for instance exponents, are converted
+    by `_float`. Whitespace, empty or zero values are set to NaN, like in `_float`.
+
+    Args:
+        chars:  ASCII codes with one row of characters for each value.
+
+    Returns:
+        Float values
+    """
+    num_values, width = chars.shape
+    is_digit = (chars >= ord("0")) & (chars <= ord("9"))
+    is_space = chars == ord(" ")
+    is_sign = (chars == ord("-")) | (chars == ord("+"))
+    is_point = chars == ord(".")
+
+    # Characters must be a contiguous run with an optional leading sign and at most one decimal point
+    not_space = ~is_space
+    first = np.argmax(not_space, axis=1)
+    last = width - 1 - np.argmax(not_space[:, ::-1], axis=1)
+    is_blank = ~not_space.any(axis=1)
+    rows = np.arange(num_values)
+    valid = (
+        np.all(is_digit | is_space | is_sign | is_point, axis=1)
+        & (not_space.sum(axis=1) == last - first + 1)
+        & (is_sign.sum(axis=1) == is_sign[rows, first])
+        & (is_point.sum(axis=1) <= 1)
+        & (is_digit.sum(axis=1) >= 1)
+    )
+
+    # Value is the integer of all digits divided by ten to the power of the number of decimals
+    digits_right = np.cumsum(is_digit[:, ::-1], axis=1)[:, ::-1] - is_digit
+    mantissa = np.sum(np.where(is_digit, chars - ord("0"), 0).astype(np.int64) * 10 ** digits_right, axis=1)
+    point = np.where(is_point.any(axis=1), np.argmax(is_point, axis=1), width)
+    num_decimals = np.sum(is_digit & (np.arange(width) > point[:, None]), axis=1)
+    values = mantissa / 10.0 ** num_decimals
+    values[chars[rows, first] == ord("-")] *= -1
+    values[is_blank | (values == 0)] = np.nan
+
+    for idx in np.flatnonzero(~valid & ~is_blank):
+        values[idx] = _float(chars[idx].tobytes().decode("latin-1"))
+    return values
+
+
 def _float(value: str) -> float:
     """Convert string to float value
 
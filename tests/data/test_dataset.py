@@ -12,6 +12,7 @@ import pytest
 from midgard.data import dataset
 from midgard.data import position
 from midgard.dev import exceptions
+from midgard.math import nputil
 
 
 @pytest.fixture
@@ -305,6 +306,51 @@ def test_subset_3(dset):
     dset.subset(idx)
     assert dset.num_obs == 0
 
+
+def test_subset_views_and_compact():
+    _dset = dataset.Dataset(num_obs=6)
+    numbers = np.arange(6.0)
+    _dset.add_float("numbers", val=numbers)
+    _dset.add_text("text", val=list("abcdef"))
+
+    # Slices and contiguous integer indices give views
+    _dset.subset(slice(1, 5))
+    assert _dset.num_obs == 4
+    assert np.shares_memory(_dset.numbers, numbers)
+    _dset.subset(np.array([1, 2]))
+    assert np.shares_memory(_dset.numbers, numbers)
+    assert np.all(_dset.numbers == [2, 3])
+    assert np.all(_dset.text == ["c", "d"])
+
+    # Compacting reuses the existing arrays
+    _dset = dataset.Dataset(num_obs=6)
+    _dset.add_float("numbers", val=np.arange(6.0))
+    _dset.add_text("text", val=list("abcdef"))
+    buffer = _dset.numbers
+    _dset.subset(np.array([True, False, True, False, True, True]), compact=True)
+    assert _dset.num_obs == 4
+    assert np.shares_memory(_dset.numbers, buffer)
+    assert np.all(_dset.numbers == [0, 2, 4, 5])
+    assert np.all(_dset.text == ["a", "c", "e", "f"])
+
+    # Unsorted indices are copied
+    _dset.subset(np.array([3, 0]), compact=True)
+    assert np.all(_dset.numbers == [5, 0])
+
+    # Indices past the end raise an error before any values are changed
+    _dset = dataset.Dataset(num_obs=5)
+    _dset.add_float("numbers", val=np.arange(5.0))
+    for compact in (False, True):
+        with pytest.raises(IndexError):
+            _dset.subset(np.array([4, 5, 6]), compact=compact)
+        assert _dset.num_obs == 5
+        assert np.all(_dset.numbers == np.arange(5.0))
+
+    values = np.arange(10.0)
+    with pytest.raises(IndexError):
+        nputil.compact(values, np.array([1, 2, 3, 10]), block_size=2)
+    assert np.all(values == np.arange(10.0))
+
 @pytest.mark.parametrize(
     "dset1, dset2",
     [
@@ -508,6 +554,293 @@ def test_read_write_3():
     os.remove(file_name)
 
 
+@pytest.mark.parametrize("codec, dictionary_text", (("none", False), ("none", True), ("lzf", False), ("gzip", True)))
+def test_read_write_codecs(dset_full, codec, dictionary_text):
+    """Test data equality and storage layout after writing with different codecs"""
+    import h5py
+
+    file_name = "test.hdf5"
+    dset_full.write(
+        file_name, codec=codec, field_codecs={"group.numbers": "none"}, chunk_rows=2, dictionary_text=dictionary_text
+    )
+    dset_new = dataset.Dataset.read(file_name)
+
+    assert np.char.equal(dset_full.text, dset_new.text).all()
+    assert np.char.equal(dset_full.group.text, dset_new.group.text).all()
+    assert np.equal(dset_full.numbers2.sigma, dset_new.numbers2.sigma).all()
+    assert np.equal(np.asarray(dset_full.site_pos), np.asarray(dset_new.site_pos)).all()
+    assert np.equal(dset_full.time.jd2, dset_new.time.jd2).all()
+    assert id(dset_new.site_delta.ref_pos) == id(dset_new.site_pos)
+
+    with h5py.File(file_name, mode="r") as h5_file:
+        assert h5_file["numbers/numbers"].compression == (None if codec == "none" else codec)
+        assert h5_file["numbers/numbers"].chunks == (None if codec == "none" else (2,))
+        assert h5_file["group/numbers/group.numbers"].compression is None
+        assert ("encoding" in h5_file["text"].attrs) == dictionary_text
+
+    # Codecs can be given for types of fields, overridden by codecs of individual fields, and text stored with a
+    # codec is dictionary encoded by default
+    dset_full.write(file_name, field_codecs={"float": "gzip", "text": "lzf", "group.numbers": "none"})
+    dset_new = dataset.Dataset.read(file_name)
+    assert np.char.equal(dset_full.text, dset_new.text).all()
+    assert np.equal(dset_full.numbers, dset_new.numbers).all()
+    with h5py.File(file_name, mode="r") as h5_file:
+        assert h5_file["numbers/numbers"].compression == "gzip"
+        assert h5_file["group/anothergroup/numbers/group.anothergroup.numbers"].compression == "gzip"
+        assert h5_file["group/numbers/group.numbers"].compression is None
+        assert h5_file["text/text"].compression == "lzf"
+        assert h5_file["text"].attrs["encoding"] == "dictionary"
+        assert h5_file["time/jd1"].compression is None
+
+    # By default fields are stored uncompressed and text as plain strings
+    dset_full.write(file_name)
+    with h5py.File(file_name, mode="r") as h5_file:
+        assert h5_file["numbers/numbers"].compression is None
+        assert h5_file["text/text"].dtype.kind == "S"
+        assert "encoding" not in h5_file["text"].attrs
+
+    os.remove(file_name)
+
+    with pytest.raises(ValueError):
+        dset_full.write(file_name, codec="unknown")
+
+
+@pytest.mark.parametrize(
+    "rows", (None, slice(1, 4), slice(None, None, -2), np.array([1, 0, 1, 1, 0], dtype=bool), [4, 0])
+)
+def test_read_fields_and_rows(dset_full, rows):
+    """Test reading only some fields and rows"""
+    file_name = "test.hdf5"
+    dset_full.write(file_name)
+    idx = slice(None) if rows is None else rows
+
+    dset_new = dataset.Dataset.read(file_name, fields=["site_delta", "group.numbers", "text"], rows=rows)
+    assert dset_new.fields == ["group", "group.numbers", "site_delta", "text"]
+    assert dset_new.num_obs == len(dset_full.numbers[idx])
+    assert np.equal(dset_new.group.numbers, dset_full.group.numbers[idx]).all()
+    assert np.char.equal(dset_new.text, dset_full.text[idx]).all()
+    assert np.equal(np.asarray(dset_new.site_delta.ref_pos), np.asarray(dset_full.site_pos)[idx]).all()
+
+    # Lazy datasets read fields when they are accessed, keeping references between fields
+    dset_lazy = dataset.Dataset.read(file_name, rows=rows, lazy=True)
+    assert dset_lazy.fields == dset_full.fields
+    assert "numbers" in dset_lazy._fields.pending
+    assert np.equal(dset_lazy.numbers, dset_full.numbers[idx]).all()
+    assert "numbers" not in dset_lazy._fields.pending
+    assert id(dset_lazy.site_delta.ref_pos) == id(dset_lazy.site_pos)
+    assert id(dset_lazy.group.site_pos.other) == id(dset_lazy.group.sat_pos)
+    dset_lazy.load()
+    assert not dset_lazy._fields.pending
+
+    # The file of a lazy dataset is closed when leaving a with block, or when the dataset is garbage collected
+    with dataset.Dataset.read(file_name, rows=rows, lazy=True) as dset_lazy:
+        h5_file = dset_lazy._h5_file
+        assert np.equal(dset_lazy.numbers, dset_full.numbers[idx]).all()
+    assert not h5_file
+    h5_file = dataset.Dataset.read(file_name, lazy=True)._h5_file
+    assert not h5_file
+
+    with pytest.raises(exceptions.FieldDoesNotExistError):
+        dataset.Dataset.read(file_name, fields=["not_a_field"])
+    os.remove(file_name)
+
+
+def test_read_mmap(dset_full):
+    """Test memory mapping float and bool fields, and subsets of contiguous rows being views"""
+    file_name = "test.hdf5"
+    dset_full.write(file_name, codec="none")
+
+    dset_new = dataset.Dataset.read(file_name, mmap=True)
+    numbers = dset_new.numbers
+    assert isinstance(numbers.base, np.memmap) and not numbers.flags.writeable
+    assert isinstance(dset_new.group.idx.base, np.memmap)
+    assert np.equal(numbers, dset_full.numbers).all()
+    assert np.equal(dset_new.idx, dset_full.idx).all()
+
+    dset_new.subset(np.array([0, 1, 1, 1, 0], dtype=bool))
+    assert np.shares_memory(dset_new.numbers, numbers)
+    assert np.equal(dset_new.numbers, dset_full.numbers[1:4]).all()
+    assert id(dset_new.site_delta.ref_pos) == id(dset_new.site_pos)
+
+    # Only selected rows are mapped
+    dset_new = dataset.Dataset.read(file_name, rows=slice(1, 3), mmap=True)
+    assert isinstance(dset_new.numbers.base, np.memmap) and len(dset_new.numbers.base) == 2
+    assert np.equal(dset_new.numbers, dset_full.numbers[1:3]).all()
+    dset_new = dataset.Dataset.read(file_name, rows=slice(1, None, 2), mmap=True)
+    assert isinstance(dset_new.numbers.base, np.memmap) and len(dset_new.numbers.base.base) == 3
+    assert np.equal(dset_new.numbers, dset_full.numbers[1::2]).all()
+
+    dset_large = dataset.Dataset(20)
+    dset_large.add_float("numbers", val=np.arange(20.0))
+    dset_large.write(file_name)
+    dset_new = dataset.Dataset.read(file_name, mmap=True)
+    dset_new.subset(slice(2, 4))
+    assert not dset_new.numbers.flags.owndata
+
+    # Subsets keeping a small part of the mapping are only copied when compacting
+    dset_new.subset(slice(0, 1), compact=True)
+    assert dset_new.numbers.flags.owndata
+    assert np.equal(dset_new.numbers, [2]).all()
+    dset_new = dataset.Dataset.read(file_name, mmap=True)
+    dset_new.subset(slice(2, 5), compact=True)
+    assert not dset_new.numbers.flags.owndata
+
+    # Compressed fields can not be mapped, and are read as usual
+    dset_full.write(file_name, codec="gzip")
+    dset_new = dataset.Dataset.read(file_name, mmap=True)
+    assert dset_new.numbers.flags.owndata
+
+    os.remove(file_name)
+
+
+@pytest.mark.parametrize("codec, dictionary_text", (("none", False), ("gzip", False), ("gzip", True)))
+def test_write_append(dset_full, codec, dictionary_text, monkeypatch):
+    """Test appending observations to a file, in place for resizable datasets and by rewriting the file otherwise"""
+    import h5py
+    from midgard.data import _h5utils
+
+    # Files written with mode "w" are stored contiguously, and rewritten with resizable datasets by the first append
+    file_name = "test.hdf5"
+    dset_full.write(file_name, codec=codec, dictionary_text=dictionary_text)
+
+    dset_more = dataset.Dataset(2)
+    dset_more.add_float("numbers", val=[6, 7])
+    dset_more.add_text("text", val=["bbb", "aaa"])
+    dset_more.meta.add("appended", True)
+    dset_more.vars["hour"] = 1
+    dset_more.write(file_name, mode="a")
+
+    dset_new = dataset.Dataset.read(file_name)
+    assert dset_new.num_obs == 7
+    assert np.equal(dset_new.numbers, [1, 2, 3, 4, 5, 6, 7]).all()
+    assert np.char.equal(dset_new.text, ["aaa"] * 5 + ["bbb", "aaa"]).all()
+    assert np.isnan(dset_new.numbers_1[5:]).all()
+    assert dset_new.meta["appended"] and dset_new.meta["dummy"] == "something"
+    assert dset_new.vars == {"hour": 1}
+
+    # Fields matching the file are appended in place, without reading the file
+    dset_new.subset(np.arange(7) >= 5)
+    with monkeypatch.context() as m:
+        m.setattr(dataset.Dataset, "read", None)
+        dset_new.write(file_name, mode="a")
+    dset_new = dataset.Dataset.read(file_name, rows=slice(7, None))
+    assert np.equal(dset_new.numbers, [6, 7]).all()
+    assert np.char.equal(dset_new.text, ["bbb", "aaa"]).all()
+    with h5py.File(file_name, mode="r") as h5_file:
+        assert h5_file["numbers/numbers"].compression == (None if codec == "none" else codec)
+        assert h5_file["numbers/numbers"].maxshape == (None,)
+        assert ("encoding" in h5_file["text"].attrs) == dictionary_text
+        assert h5_file.attrs["num_obs"] == 9
+
+    # Rows after num_obs are not read, and are overwritten by the next append
+    with h5py.File(file_name, mode="r+") as h5_file:
+        h5_file["numbers/numbers"].resize(12, axis=0)
+        h5_file["numbers/numbers"][9:] = -1
+    assert np.equal(dataset.Dataset.read(file_name).numbers[7:], [6, 7]).all()
+    dset_new.write(file_name, mode="a")
+    assert np.equal(dataset.Dataset.read(file_name, rows=slice(7, None)).numbers, [6, 7, 6, 7]).all()
+
+    # An append failing partway, after the rows and meta are written, leaves the file unchanged
+    write_attr = _h5utils.write_attr
+
+    def failing_write_attr(h5_group, name, value):
+        if h5_group.file.driver != "fileobj":  # Fail when writing to disk, not to the in-memory file of new rows
+            raise RuntimeError("Failing append")
+        write_attr(h5_group, name, value)
+
+    dset_more.meta.add("failed", True)
+    with monkeypatch.context() as m:
+        m.setattr(_h5utils, "write_attr", failing_write_attr)
+        with pytest.raises(RuntimeError):
+            dset_more.write(file_name, mode="a")
+    dset_new = dataset.Dataset.read(file_name)
+    assert dset_new.num_obs == 11
+    assert "failed" not in dset_new.meta and dset_new.meta["appended"]
+
+    os.remove(file_name)
+    assert not [f for f in os.listdir() if f.startswith(f".{file_name}")]
+
+
+def test_read_write_meta(dset_float):
+    """Test meta and vars with special values, large values and in the format used by earlier versions"""
+    import h5py
+
+    file_name = "test.hdf5"
+    events = [(f"2015-01-05T00:00:{i % 60:02d}.000", f"event {i}") for i in range(5000)]
+    dset_float.meta.add("special", {"nan": float("nan"), "inf": [float("inf"), -float("inf")], (1, 2): {3}})
+    dset_float.meta.add("events", events)
+    dset_float.vars["station"] = "osls"
+    dset_float.write(file_name)
+
+    dset_new = dataset.Dataset.read(file_name)
+    assert np.isnan(dset_new.meta["special"]["nan"])
+    assert dset_new.meta["special"]["inf"] == [float("inf"), -float("inf")]
+    assert dset_new.meta["special"][(1, 2)] == {3}
+    assert dset_new.meta["events"] == events
+    assert dset_new.vars == {"station": "osls"}
+
+    with h5py.File(file_name, mode="r+") as h5_file:
+        assert "events" not in h5_file["__meta__"].attrs
+        h5_file["__meta__"].attrs["special"] = "dict {'a': nan, 'b': [inf, -inf], (1, 2): {3}}"
+    dset_new = dataset.Dataset.read(file_name)
+    assert np.isnan(dset_new.meta["special"]["a"])
+    assert dset_new.meta["special"]["b"] == [float("inf"), -float("inf")]
+    assert dset_new.meta["special"][(1, 2)] == {3}
+
+    # Files written by newer major versions of Dataset are not read
+    with h5py.File(file_name, mode="r+") as h5_file:
+        assert h5_file.attrs["version"].startswith(f"Dataset v{dataset.__version__},")
+        h5_file.attrs["version"] = "Dataset v99.0, Midgard v99.0.0"
+    with pytest.raises(ValueError, match="Dataset v99.0"):
+        dataset.Dataset.read(file_name)
+
+    os.remove(file_name)
+
+
+def test_arrow(dset_full):
+    """Test converting a dataset to Arrow and Parquet and back"""
+    pa = pytest.importorskip("pyarrow")
+
+    dset_full.add_float("matrix", val=np.arange(20.0).reshape(5, 2, 2), unit="meter")
+    fields = ["idx", "numbers", "matrix", "sat_pos", "sat_posvel", "text", "time", "group.anothergroup.numbers"]
+    fields += ["numbers2", "site_delta", "site_posvel_delta"]
+    table = dset_full.to_arrow(fields=fields)
+    assert table.num_rows == dset_full.num_obs
+    assert table.schema.field("time").type.field("timestamp").type == pa.timestamp("us")
+    assert np.shares_memory(table.column("numbers").chunk(0).to_numpy(), dset_full.numbers)
+
+    with pytest.raises(TypeError):
+        dset_full.to_arrow(fields=["time_delta"])
+
+    # Fields that can not be converted are skipped when converting all fields
+    all_fields = dataset.Dataset.from_arrow(dset_full.to_arrow()).fields
+    assert "group.numbers2" in all_fields and "group.site_posvel_delta" in all_fields
+    assert "time_delta" not in all_fields
+
+    file_name = "test.parquet"
+    dset_full.to_parquet(file_name, fields=fields)
+    for dset_new in (dataset.Dataset.from_arrow(table), dataset.Dataset.read_parquet(file_name)):
+        assert set(dset_new.fields) == set(fields) | {"group", "group.anothergroup"}
+        assert np.equal(dset_new.matrix, dset_full.matrix).all()
+        assert dset_new.unit("matrix") == dset_full.unit("matrix")
+        assert np.equal(dset_new.idx, dset_full.idx).all()
+        assert np.equal(dset_new.text, dset_full.text).all()
+        assert np.equal(dset_new.sat_pos.val, dset_full.sat_pos.val).all()
+        assert dset_new.sat_posvel.system == dset_full.sat_posvel.system
+        assert np.equal(dset_new.time.jd1, dset_full.time.jd1).all()
+        assert np.equal(dset_new.time.jd2, dset_full.time.jd2).all()
+        assert dset_new.time.scale == dset_full.time.scale
+        assert np.equal(dset_new.group.anothergroup.numbers, dset_full.group.anothergroup.numbers).all()
+        assert np.equal(dset_new.numbers2, dset_full.numbers2).all()
+        assert np.equal(dset_new.numbers2.sigma, dset_full.numbers2.sigma).all()
+        assert np.equal(dset_new.site_delta.val, dset_full.site_delta.val).all()
+        assert np.equal(dset_new.site_delta.ref_pos.val, dset_full.site_delta.ref_pos.val).all()
+        assert np.equal(dset_new.site_posvel_delta.trs.val, dset_full.site_posvel_delta.trs.val).all()
+        assert dset_new.meta == dset_full.meta
+
+    os.remove(file_name)
+
+
 @pytest.mark.parametrize("dset", (dset_empty, dset_float, dset_full, dset_no_collection), indirect=True)
 def test_copy(dset):
     """Test data equality after copy"""
@@ -637,6 +970,42 @@ def test_unique():
     assert np.equal(_dset.unique("group.numbers"), np.arange(0, 10)).all()
 
 
+def test_index():
+    _dset = dataset.Dataset(8)
+    _dset.add_text("satellite", ["G02", "G01", "E11", "G01", "G02", "G01", "E11", "G02"])
+    _dset.add_float("numbers", [1, 2, np.nan, 2, 1, 3, 3, np.nan])
+    _dset.add_time("time", [58000] * 4 + [58001] * 4, fmt="mjd", scale="utc")
+
+    expected = {
+        "unique": _dset.unique("satellite"),
+        "unique_unsorted": _dset.unique("satellite", sort=False),
+        "unique_filtered": _dset.unique("numbers", satellite="G02"),
+        "filter": _dset.filter(satellite="G01", numbers=2),
+        "count": _dset.count("satellite", time=58000),
+    }
+
+    _dset.create_index("satellite", "numbers", "time")
+    assert np.char.equal(_dset.unique("satellite"), expected["unique"]).all()
+    assert np.char.equal(_dset.unique("satellite", sort=False), expected["unique_unsorted"]).all()
+    assert np.array_equal(_dset.unique("numbers", satellite="G02"), expected["unique_filtered"], equal_nan=True)
+    assert np.equal(_dset.filter(satellite="G01", numbers=2), expected["filter"]).all()
+    assert _dset.count("satellite", time=58000) == expected["count"]
+    assert _dset.num(satellite="R01") == 0
+
+    groups = {sat: rows.tolist() for sat, rows in _dset.group_by("satellite")}
+    assert groups == {"E11": [2, 6], "G01": [1, 3, 5], "G02": [0, 4, 7]}
+    assert [v for v, _ in _dset.group_by("numbers", satellite="G01")] == [2, 3]
+
+    # Indexes are rebuilt after subset
+    _dset.subset(np.array([True, True, False, False, True, True, True, True]))
+    assert np.equal(_dset.filter(satellite="G01"), [False, True, False, True, False, False]).all()
+    assert _dset.count("satellite") == 3
+
+    _dset.add_float("matrix", np.ones((6, 2)))
+    with pytest.raises(ValueError):
+        _dset.create_index("matrix")
+
+
 def test_difference_1():
     _dset1 = dataset.Dataset(2)
     _dset1.add_float("numbers", [1, 2], unit="meter")
@@ -733,6 +1102,73 @@ def test_difference_3():
         _dset1.difference(_dset5)
 
 
+def test_join():
+    _dset1 = dataset.Dataset(4)
+    _dset1.add_time("t", [58000, 58000, 58001, 58002], scale="utc", fmt="mjd")
+    _dset1.add_text("station", ["osls", "zimm", "osls", "osls"])
+    _dset1.add_float("numbers", [1, 2, 3, 4], unit="meter")
+
+    _dset2 = dataset.Dataset(4)
+    _dset2.add_time("t", [58001, 58000, 58000, 58003], scale="utc", fmt="mjd")
+    _dset2.add_text("station", ["osls", "osls", "osls", "zimm"])
+    _dset2.add_float("numbers", [5, 6, 7, 8], unit="meter")
+    _dset2.add_bool("flag", [True, False, True, True])
+
+    _dset3 = _dset1.join(_dset2, on="t, station")
+    assert _dset3.num_obs == 3
+    assert np.equal(_dset3.numbers, [1, 1, 3]).all()
+    assert np.equal(_dset3.numbers_other, [6, 7, 5]).all()
+    assert np.equal(_dset3.flag, [False, True, True]).all()
+
+    _dset4 = _dset1.join(_dset2, on=["t", "station"], how="left")
+    assert np.equal(_dset4.numbers, [1, 1, 2, 3, 4]).all()
+    assert np.isnan(_dset4.numbers_other[[2, 4]]).all()
+
+    _dset5 = _dset1.join(_dset2, on="t, station", how="outer")
+    assert _dset5.num_obs == 6
+    assert np.char.equal(_dset5.station, ["osls", "osls", "zimm", "osls", "osls", "zimm"]).all()
+    assert np.equal(_dset5.t.mjd[-1], 58003)
+    assert np.isnan(_dset5.numbers[-1])
+
+    # Times in different scales are compared after converting them to the same scale
+    _dset6 = dataset.Dataset(4)
+    _dset6.add_time("t", _dset2.t.tai)
+    assert _dset1.join(_dset2, on="t").num_obs == _dset1.join(_dset6, on="t").num_obs == 5
+
+    # Observations without a match get empty times, also for times in other scales than utc
+    _dset7 = dataset.Dataset(2)
+    _dset7.add_text("station", ["osls", "nyal"])
+    _dset7.add_time("t_gps", [58000, 58001], scale="gps", fmt="mjd")
+    _dset8 = _dset1.join(_dset7, on="station", how="left")
+    assert _dset8.t_gps.scale == "gps"
+    assert np.equal(_dset8.t_gps.mjd[[0, 2, 3]], 58000).all()
+    assert _dset8.t_gps.datetime[1] == datetime.min
+    _dset9 = _dset7.join(_dset1, on="station", how="outer")
+    assert np.equal(_dset9.t_gps.mjd[:4], [58000, 58000, 58000, 58001]).all()
+    assert _dset9.t.datetime[3] == _dset9.t_gps.datetime[4] == datetime.min
+
+    # The result does not share values with the joined datasets
+    _dset8.numbers[:] = 0
+    assert np.equal(_dset1.numbers, [1, 2, 3, 4]).all()
+
+    with pytest.raises(ValueError):
+        _dset1.join(_dset2, on="t", how="cross")
+
+
+def test_merge_sorted():
+    _dset1 = dataset.Dataset(3)
+    _dset1.add_time("t", [58000, 58002, 58004], scale="utc", fmt="mjd")
+    _dset1.add_float("numbers", [1, 2, 3])
+
+    _dset2 = dataset.Dataset(3)
+    _dset2.add_time("t", [58001, 58002, 58003], scale="utc", fmt="mjd")
+    _dset2.add_float("numbers", [4, 5, 6])
+
+    _dset1.merge_with(_dset2, sort_by="t")
+    assert np.equal(_dset1.t.mjd, [58000, 58001, 58002, 58002, 58003, 58004]).all()
+    assert np.equal(_dset1.numbers, [1, 4, 2, 5, 6, 3]).all()
+
+
 def test_nested_collections():
     _dset = dataset.Dataset(2)
     _dset.add_float("group.group.tall", [5, 6])
@@ -791,6 +1227,36 @@ def test_functions(dset_full):
         dset_full.plot_values(field)
 
 
+def test_aggregate():
+    _dset = dataset.Dataset(6)
+    _dset.add_text("station", ["osls", "zimm", "osls", "zimm", "osls", "zimm"])
+    _dset.add_time("time", [58000] * 3 + [58001] * 3, fmt="mjd", scale="utc")
+    _dset.add_float("residual_1", [1, 2, 3, 4, 5, 6], unit="meter")
+    _dset.add_float("residual_2", [-1, -2, -3, -4, -5, -6], unit="meter")
+    _dset.add_position("pos", np.arange(18).reshape(6, 3), system="trs")
+
+    funcs = ("count", "mean", "rms", "std", "min", "max")
+    _agg = _dset.aggregate(by="station", fields=["residual", "pos"], funcs=funcs)
+    assert np.char.equal(_agg.station, ["osls", "zimm"]).all()
+    for i, station in enumerate(_agg.station):
+        idx = _dset.filter(station=station)
+        values = np.hstack([_dset.residual_1[idx], _dset.residual_2[idx]])
+        assert _agg.residual_count[i] == len(values)
+        assert np.isclose(_agg.residual_mean[i], np.mean(values))
+        assert np.isclose(_agg.residual_rms[i], np.sqrt(np.mean(values ** 2)))
+        assert np.isclose(_agg.residual_std[i], np.std(values))
+        assert _agg.residual_min[i] == np.min(values) and _agg.residual_max[i] == np.max(values)
+        assert np.allclose(_agg.pos_mean[i], np.mean(np.asarray(_dset.pos)[idx], axis=0))
+    assert _agg.unit("residual_mean") == ("meter",)
+
+    _agg = _dset.aggregate(by="time, station", fields="residual_1", funcs=["max"], station="osls")
+    assert np.equal(_agg.time.mjd, [58000, 58001]).all()
+    assert np.equal(_agg.residual_1_max, [3, 5]).all()
+
+    with pytest.raises(ValueError):
+        _dset.aggregate(by="station", fields="residual", funcs=["median"])
+
+
 def test_delete(dset_full):
     # Deletion of dataset "rows" is not allowed
     with pytest.raises(IndexError):
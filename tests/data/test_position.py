@@ -309,3 +309,99 @@ def test_cache():
     el3 = pos1.elevation
     # Value of other position is changed and elevation cache should have been reset
     assert not np.isclose(el2, el3)
+
+
+def test_to_system_blocks():
+    trs = np.random.random((10, 3)) * 6.3e6
+    pos = position.Position(trs, system="trs")
+    pos_blocks = position.Position(trs, system="trs")
+    assert np.array_equal(pos_blocks.to_system("llh", block_size=3), pos.llh)
+    assert pos_blocks.llh is pos_blocks.to_system("llh")
+
+    enu = np.random.random((10, 3))
+    posdelta = position.PositionDelta(enu, system="enu", ref_pos=pos)
+    posdelta_blocks = position.PositionDelta(enu, system="enu", ref_pos=pos_blocks)
+    delta_trs = posdelta_blocks.to_system("trs", block_size=4)
+    assert np.array_equal(delta_trs, posdelta.trs)
+    assert delta_trs.ref_pos is pos_blocks
+
+
+def test_parallel_conversions(monkeypatch):
+    from midgard.math import nputil
+
+    trs = np.random.random((50, 3)) * 6.3e6
+    other = np.random.random((50, 3)) * 2e7
+    pos, pos_other = position.Position(trs, system="trs"), position.Position(other, system="trs")
+    llh, azimuth, elevation = pos.llh, pos.azimuth_to(pos_other), pos.elevation_to(pos_other)
+
+    # Parallel results are identical to serial ones
+    monkeypatch.setattr(nputil, "_MIN_PARALLEL_ROWS", 1)
+    monkeypatch.setattr(nputil, "_WORKERS", 4)
+    pos, pos_other = position.Position(trs, system="trs"), position.Position(other, system="trs")
+    assert np.array_equal(pos.llh, llh)
+    assert np.array_equal(pos.azimuth_to(pos_other), azimuth)
+    assert np.array_equal(pos.elevation_to(pos_other), elevation)
+    assert np.array_equal(pos.elevation_to(pos_other[0]), position.Position(trs, system="trs").elevation_to(pos_other[0]))
+
+
+def test_look_angles():
+    pos = position.Position(np.random.random((5, 3)) * 6.3e6, system="trs")
+    other = position.Position(np.random.random((5, 3)) * 2e7, system="trs")
+    look_angles = pos.look_angles_to(other)
+    assert np.allclose(look_angles.azimuth, pos.azimuth_to(other))
+    assert np.allclose(look_angles.elevation, pos.elevation_to(other))
+    assert np.allclose(look_angles.zenith_distance, pos.zenith_distance_to(other))
+    assert np.allclose(look_angles.distance, pos.distance_to(other))
+    assert np.allclose(look_angles.direction, pos.direction_to(other))
+
+    # One other position is used for all positions
+    assert np.allclose(pos.look_angles_to(other[0]).elevation, pos.elevation_to(other[0]))
+
+    # Properties share one cached computation
+    pos.other = other
+    assert pos.azimuth is pos.look_angles.azimuth
+    assert np.allclose(pos.elevation, look_angles.elevation)
+
+
+def test_dependencies():
+    other = position.Position([7, -8, 5], system="trs")
+    positions = [position.Position([1, 2, i], system="trs") for i in range(3)]
+    for pos in positions:
+        pos.other = other
+    assert len(other._dependent_objs) == 3
+
+    # Dependencies are removed when changing attributes and when dependent objects are garbage collected
+    positions[0].other = None
+    del positions[1]
+    assert list(other._dependent_objs.values()) == [positions[-1]]
+
+    # Changing values invalidates the cache of dependent objects
+    elevation = positions[-1].elevation
+    other[0] = 0
+    assert not np.isclose(positions[-1].elevation, elevation)
+
+
+def test_parallel_conversions_shared_other(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    import sys
+    from midgard.math import nputil
+
+    llh = np.column_stack((np.linspace(-1.5, 1.5, 40), np.linspace(-3, 3, 40), np.linspace(0, 1000, 40)))
+    other_llh = llh[::-1] + [0, 0, 2e7]
+    expected = position.Position(llh, system="llh").elevation_to(position.Position(other_llh, system="llh"))
+
+    # Threads converting blocks and threads of their own all use the same other array, converting it to TRS
+    monkeypatch.setattr(nputil, "_MIN_PARALLEL_ROWS", 1)
+    monkeypatch.setattr(nputil, "_WORKERS", 4)
+    switch_interval = sys.getswitchinterval()
+    try:
+        sys.setswitchinterval(1e-6)
+        for _ in range(10):
+            other = position.Position(other_llh, system="llh")
+            pos = position.Position(llh, system="llh", other=other)
+            with ThreadPoolExecutor(8) as executor:
+                results = list(executor.map(lambda _: pos.elevation_to(other), range(16)))
+            assert all(np.array_equal(result, expected) for result in results)
+            assert np.array_equal(pos.elevation, expected)
+    finally:
+        sys.setswitchinterval(switch_interval)
@@ -263,3 +263,140 @@ def test_math_s():
 
     # Test12 timedelta < timedelta -> Bool
     assert (_td1 < _td2) == True
+
+
+def test_properties_match_datetime():
+    """Calendar properties are calculated from jd1/jd2 and should match the datetime format exactly"""
+    jd1 = np.array([2_451_544.5, 2_457_204.5, 2_457_204.5, 2_400_000.5, 2_488_069.5])
+    jd2 = np.array([0.0, 0.999_999_999_999, 0.5 / 86_400e6, 0.25, 0.751_234_567_89])
+    t = time.Time(jd1, val2=jd2, scale="utc", fmt="jd")
+
+    datetimes = t.datetime
+    assert np.array_equal(t.year, [d.year for d in datetimes])
+    assert np.array_equal(t.month, [d.month for d in datetimes])
+    assert np.array_equal(t.day, [d.day for d in datetimes])
+    assert np.array_equal(t.hour, [d.hour for d in datetimes])
+    assert np.array_equal(t.minute, [d.minute for d in datetimes])
+    assert np.array_equal(t.second, [d.second for d in datetimes])
+    assert np.array_equal(t.doy, [d.timetuple().tm_yday for d in datetimes])
+    assert np.array_equal(t.sec_of_day, [d.hour * 3600 + d.minute * 60 + d.second for d in datetimes])
+    assert t.doy.dtype.kind == "i"
+
+
+@pytest.mark.parametrize(
+    "fmt, val",
+    (
+        ("isot", ["2015-06-30T23:59:59.123456", "2016-12-31T00:00:00.000000"]),
+        ("iso", ["2015-06-30 23:59:59.123456", "2016-12-31 00:00:00.000000"]),
+        ("yday", ["2015:181:23:59:59.123456", "2016:366:00:00:00.000000"]),
+        ("date", ["2015-06-30", "2016-12-31"]),
+        ("yydddsssss", ["15:181:86399", "16:366:00000"]),
+        ("yyyydddsssss", ["2015:181:86399", "2016:366:00000"]),
+    ),
+)
+def test_text_formats_roundtrip(fmt, val):
+    t = time.Time(val, scale="utc", fmt=fmt)
+    assert np.array_equal(getattr(t, fmt), val)
+    assert getattr(time.Time(val[0], scale="utc", fmt=fmt), fmt) == val[0]
+
+
+def test_text_formats_beyond_microseconds():
+    t = time.Time(["2015-06-30T23:59:59.123456789", "2015-06-30T23:59:59"], scale="utc", fmt="isot")
+    assert np.allclose(t.jd2 * 86400 - 86399, [0.123456789, 0], atol=1e-9, rtol=0)
+    assert t.isot[0] == "2015-06-30T23:59:59.123457"
+
+    # Text not following the fixed width template is parsed one string at a time
+    t = time.Time(["2015-6-3T1:2:3"], scale="utc", fmt="isot")
+    assert t.isot[0] == "2015-06-03T01:02:03.000000"
+    with pytest.raises(ValueError):
+        time.Time(["2015-02-30T00:00:00"], scale="utc", fmt="isot")
+
+
+def test_delta_tai_utc():
+    from midgard.data._time import delta_tai_utc
+
+    # Epochs within one leap second interval, across a leap second and as a scalar
+    t_same = time.Time([2_457_204.0, 2_457_204.25], scale="utc", fmt="jd")
+    t_across = time.Time([2_457_204.0, 2_457_205.0], scale="utc", fmt="jd")
+    t_scalar = time.Time(2_457_205.0, scale="utc", fmt="jd")
+    assert np.allclose(delta_tai_utc(t_same) * 86400, [35, 35])
+    assert np.allclose(delta_tai_utc(t_across) * 86400, [35, 36])
+    assert np.isclose(delta_tai_utc(t_scalar) * 86400, 36)
+
+    # TAI to UTC is the inverse
+    assert np.allclose(delta_tai_utc(t_across.tai) * 86400, [-35, -36])
+
+
+def test_conversion_cache():
+    t = time.Time([2_457_204.0, 2_457_205.0], scale="utc", fmt="jd")
+    gps, isot = t.gps, t.isot
+    info_before = time.Time.cache_info()
+    assert t.gps is gps
+    assert t.isot is isot
+    info_after = time.Time.cache_info()
+    assert info_after.misses == info_before.misses
+    assert info_after.hits - info_before.hits == 2
+
+    # Clearing the cache gives new conversions
+    gps = t.gps
+    t.clear_cache()
+    assert t.gps is not gps
+    assert t.gps == gps
+
+
+def test_conversion_cache_memory_limit():
+    max_bytes = time.Time.cache_info().max_bytes
+    try:
+        time.Time.set_cache_size(0)
+        t = time.Time([2_457_204.0, 2_457_205.0], scale="utc", fmt="jd")
+        assert t.gps is not t.gps
+        assert time.Time.cache_info().nbytes == 0
+    finally:
+        time.Time.set_cache_size(max_bytes)
+
+
+def test_conversion_cache_threads():
+    from concurrent.futures import ThreadPoolExecutor
+    import sys
+
+    max_bytes, switch_interval = time.Time.cache_info().max_bytes, sys.getswitchinterval()
+    t_jd = np.linspace(2_457_204.0, 2_457_205.0, 100)
+    t = time.Time(t_jd, scale="utc", fmt="jd")
+    expected = {(scale, fmt): getattr(getattr(t, scale), fmt) for scale in ("tai", "gps") for fmt in ("isot", "mjd")}
+    try:
+        # A small cache evicts values while other threads convert the same time array
+        time.Time.set_cache_size(4_000)
+        sys.setswitchinterval(1e-6)
+        for _ in range(20):
+            t = time.Time(t_jd, scale="utc", fmt="jd")
+            with ThreadPoolExecutor(8) as executor:
+                results = list(executor.map(lambda key: getattr(getattr(t, key[0]), key[1]), list(expected) * 8))
+            assert all(np.array_equal(result, expected[key]) for result, key in zip(results, list(expected) * 8))
+            info = time.Time.cache_info()
+            assert 0 <= info.nbytes <= info.max_bytes
+    finally:
+        time.Time.set_cache_size(max_bytes)
+        sys.setswitchinterval(switch_interval)
+
+
+def test_subset_and_copy_share_buffers():
+    import copy
+
+    t_jd = time.Time(np.linspace(2_457_204.0, 2_457_205.0, 10), scale="utc", fmt="jd")
+    t = time.Time(t_jd.isot, scale="utc", fmt="isot")
+    t_slice = t.subset(slice(2, 5), memo={})
+    assert np.shares_memory(t_slice, t) and np.shares_memory(t_slice.jd1, t.jd1)
+    assert np.array_equal(t_slice.isot, t.isot[2:5])
+
+    idx = np.arange(10) % 3 == 0
+    t_mask = t.subset(idx, memo={})
+    assert np.array_equal(t_mask.isot, t.isot[idx])
+    assert np.array_equal(t_mask.jd2, t.jd2[idx])
+
+    for t_copy in (copy.copy(t), copy.deepcopy(t)):
+        assert np.shares_memory(t_copy, t)
+        assert t_copy == t and t_copy is not t
+
+    # Slicing must not leak the sliced Julian dates into later views of the original array
+    t[0:2]
+    assert len(t.view(type(t)).jd1) == 10
@@ -0,0 +1,31 @@
+""" Tests for the math.rotation module"""
+
+# Third party imports
+import numpy as np
+
+# Midgard imports
+from midgard.math import rotation
+
+
+def test_enu2trs_trs2enu_inverse():
+    lat, lon = np.array([0.1, -1.2, 1.5]), np.array([-3.0, 0.4, 2.2])
+    enu2trs, trs2enu = rotation.enu2trs(lat, lon), rotation.trs2enu(lat, lon)
+    assert np.allclose(enu2trs @ trs2enu, np.eye(3))
+    assert np.array_equal(rotation.enu2trs(lat, lon, block_size=2), enu2trs)
+
+
+def test_enu2trs_trs2enu_cache():
+    lat, lon = np.array([0.1, -1.2, 1.5]), np.array([-3.0, 0.4, 2.2])
+
+    # Writeable arrays may change, and are never cached
+    assert rotation.enu2trs(lat, lon, cache=True) is not rotation.enu2trs(lat, lon, cache=True)
+
+    # Read-only arrays are cached on identity, and scalars on value
+    lat.flags.writeable = lon.flags.writeable = False
+    enu2trs, trs2enu = rotation.enu2trs(lat, lon, cache=True), rotation.trs2enu(lat, lon, cache=True)
+    assert rotation.enu2trs(lat, lon, cache=True) is enu2trs
+    assert rotation.trs2enu(lat, lon, cache=True) is trs2enu
+    assert rotation.enu2trs(lat, lon.copy(), cache=True) is not enu2trs
+    assert np.array_equal(rotation.enu2trs(lat, lon), enu2trs)
+    assert rotation.trs2enu(0.1, -3.0, cache=True) is rotation.trs2enu(0.1, -3.0, cache=True)
+    assert np.array_equal(rotation.trs2enu(0.1, -3.0, cache=True), trs2enu[0])
@@ -0,0 +1,42 @@
+""" Tests for the math.transformation module"""
+
+# Third party imports
+import numpy as np
+
+# Midgard imports
+from midgard.math import transformation
+from midgard.math.ellipsoid import GRS80
+
+
+def test_trs2llh_llh2trs_roundtrip():
+    trs = np.array([[3_172_870.7, 604_208.3, 5_481_574.2], [0, 0, GRS80.b], [GRS80.a, 0, 0]])
+    llh = transformation.trs2llh(trs)
+    assert np.allclose(llh[1], [np.pi / 2, 0, 0], atol=1e-9)
+    assert np.allclose(transformation.llh2trs(llh), trs, atol=1e-6)
+
+
+def test_trs2llh_cache():
+    trs = np.array([[3_172_870.7, 604_208.3, 5_481_574.2], [2_102_940.3, 721_569.4, 5_958_192.1]])
+
+    # Writeable arrays may change, and are never cached
+    assert transformation.trs2llh(trs, cache=True) is not transformation.trs2llh(trs, cache=True)
+
+    # Read-only arrays are cached on identity
+    trs.flags.writeable = False
+    llh = transformation.trs2llh(trs, cache=True)
+    assert transformation.trs2llh(trs, cache=True) is llh
+    assert transformation.trs2llh(trs) is not llh
+    assert np.array_equal(transformation.trs2llh(trs), llh)
+
+
+def test_trs2llh_llh2trs_blocks():
+    trs = np.random.random((10, 3)) * 6.3e6
+    llh = transformation.trs2llh(trs)
+    assert np.array_equal(transformation.trs2llh(trs, block_size=3), llh)
+    assert np.array_equal(transformation.llh2trs(llh, block_size=4), transformation.llh2trs(llh))
+
+    # Converting into an out-array, including the input array itself
+    out = np.empty(trs.shape)
+    assert transformation.trs2llh(trs, out=out, block_size=3) is out
+    assert np.array_equal(out, llh)
+    assert np.array_equal(transformation.trs2llh(trs, out=trs), llh)
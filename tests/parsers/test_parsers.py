@@ -26,6 +26,26 @@ def get_parser(parser_name, example_path = None):
     return parsers.parse_file(parser_name, example_path)
 
 
+def assert_same(value, other):
+    """Assert that two values have the same types and values, recursing into containers"""
+    assert type(value) is type(other)
+    if isinstance(value, dict):
+        assert list(value) == list(other)
+        for key in value:
+            assert_same(value[key], other[key])
+    elif isinstance(value, (list, tuple)):
+        assert len(value) == len(other)
+        for item, other_item in zip(value, other):
+            assert_same(item, other_item)
+    elif hasattr(value, "jd1"):
+        assert np.array_equal(value.jd1, other.jd1) and np.array_equal(value.jd2, other.jd2)
+    elif isinstance(value, np.ndarray):
+        assert value.dtype == other.dtype
+        assert np.array_equal(value, other, equal_nan=value.dtype.kind == "f")
+    else:
+        assert value == other or (value != value and other != other)
+
+
 @pytest.fixture
 def tmpfile(tmpdir):
     """A temporary file that can be read"""
@@ -50,16 +70,132 @@ def test_list_of_parsers():
 #     assert isinstance(parser, Parser)
 
 
-@pytest.mark.skip(reason="Caching not yet implemented")
-def test_caching_parser():
+def test_caching_parser(tmp_path):
     """Test that caching results from parser works"""
-    assert False
+    example_path = pathlib.Path(__file__).parent / "example_files" / "antex"
+    file_path = tmp_path / "antex"
+    file_path.write_bytes(example_path.read_bytes())
+    parsers.set_cache(cache_dir=tmp_path / "cache")
+    try:
+        parser = parsers.parse_file("antex", file_path, use_cache=True)
+        cached = parsers.parse_file("antex", file_path, use_cache=True)
+        assert cached is not parser
+        assert cached.as_dict().keys() == parser.as_dict().keys()
+        assert cached.data is not parser.data
+
+        # Read from the on-disk store
+        parsers.clear_cache()
+        stored = parsers.parse_file("antex", file_path, use_cache=True)
+        assert stored.as_dict().keys() == parser.as_dict().keys()
+        assert datetime(1992, 11, 22) in stored.as_dict()["G01"]
+        assert len(list((tmp_path / "cache").glob("*.h5"))) == 1
+
+        # Changed files are parsed again
+        file_path.write_text("")
+        assert parsers.parse_file("antex", file_path, use_cache=True).as_dict() == dict()
+    finally:
+        parsers.clear_cache(disk=True)
+        parsers.set_cache()
+
+
+def test_cache_key_arguments():
+    """Test that cache keys identify array arguments by all their values, and are not made for unstable arguments"""
+    from midgard.parsers import _cache
+
+    file_path = pathlib.Path(__file__).parent / "example_files" / "antex"
+    values = np.arange(10_000.0)
+    changed = values.copy()
+    changed[5_000] = -1
+    assert repr(values) == repr(changed)
+
+    key = _cache.cache_key("antex", file_path, dict(values=values, names={"a", "b"}))
+    assert key == _cache.cache_key("antex", file_path, dict(values=values.copy(), names={"b", "a"}))
+    assert key != _cache.cache_key("antex", file_path, dict(values=changed, names={"a", "b"}))
+    assert key != _cache.cache_key("antex", file_path, dict(values=values.astype(np.float32), names={"a", "b"}))
+    assert _cache.cache_key("antex", file_path, dict(values=[values, object()])) is None
+
+
+def test_caching_parser_on_disk(tmp_path):
+    """Test that parsers read from the on-disk cache are the same as freshly parsed ones"""
+    example_dir = pathlib.Path(__file__).parent / "example_files"
+    parsers.set_cache(cache_dir=tmp_path / "cache")
+    try:
+        for parser_name in ("antex", "rinex3_obs", "rinex3_nav"):
+            fresh = get_parser(parser_name)
+            parsers.parse_file(parser_name, example_dir / parser_name, use_cache=True)
+            parsers.clear_cache()
+            cached = parsers.parse_file(parser_name, example_dir / parser_name, use_cache=True)
+            assert_same(cached.data, fresh.data)
+            assert_same(cached.meta, fresh.meta)
+
+        # Parsers with TimeArrays are only cached in memory
+        assert len(list((tmp_path / "cache").glob("*.h5"))) == 2
+    finally:
+        parsers.clear_cache(disk=True)
+        parsers.set_cache()
 
 
-@pytest.mark.skip(reason="Caching not yet implemented")
 def test_non_caching_parser():
     """Test that calling parser without caching results works"""
-    assert False
+    parser = get_parser("antex")
+    assert get_parser("antex") is not parser
+    assert get_parser("antex").as_dict().keys() == parser.as_dict().keys()
+
+
+def test_parse_files():
+    """Test that parsing several files in parallel returns parsers in order, and errors for failing files"""
+    example_dir = pathlib.Path(__file__).parent / "example_files"
+    file_paths = [example_dir / "rinex3_obs", example_dir, example_dir / "rinex3_obs"]
+    results = parsers.parse_files("rinex3_obs", file_paths, workers=2)
+    assert results[0].as_dict().keys() == get_parser("rinex3_obs").as_dict().keys()
+    assert isinstance(results[1], Exception)
+    assert results[2].as_dict().keys() == results[0].as_dict().keys()
+
+    dsets = parsers.parse_files("rinex2_obs", [example_dir / "rinex2_obs"] * 2, workers=2, as_dataset=True)
+    assert [dset.num_obs for dset in dsets] == [get_parser("rinex2_obs").as_dataset().num_obs] * 2
+
+
+def test_parse_files_shared_memory_cleanup(monkeypatch):
+    """Test that shared memory blocks are removed when handing over a parser fails"""
+    from concurrent import futures
+    from multiprocessing import shared_memory
+    from midgard.parsers import _parallel
+
+    def assert_removed(names):
+        for name in names:
+            with pytest.raises(FileNotFoundError):
+                shared_memory.SharedMemory(name=name)
+
+    def shared_names(parser):
+        names = list()
+        _parallel._map_arrays(
+            parser.data, lambda v: names.append(v.name) if isinstance(v, _parallel.SharedArray) else v
+        )
+        return names
+
+    monkeypatch.setattr(_parallel, "SHARED_MIN_BYTES", 1)
+    example_file = pathlib.Path(__file__).parent / "example_files" / "rinex3_obs"
+
+    # Failing to return the parser from the worker after blocks are created
+    parser, _ = _parallel.parse("rinex3_obs", example_file, None, dict(), block_prefix="psm_test_failed")
+    names = shared_names(parser)
+    job = futures.Future()
+    job.set_exception(TypeError("can not pickle parser"))
+    with pytest.raises(TypeError):
+        _parallel.receive(job, "psm_test_failed")
+    assert names == [f"psm_test_failed_{num}" for num in range(len(names))]
+    assert_removed(names)
+
+    # Failing in the main process while copying arrays out of the blocks
+    parser, time_elapsed = _parallel.parse("rinex3_obs", example_file, None, dict(), block_prefix="psm_test_missing")
+    names = shared_names(parser)
+    parser.data = {"missing": _parallel.SharedArray("missing_block", (1,), np.dtype(float)), **parser.data}
+    job = futures.Future()
+    job.set_result((parser, time_elapsed))
+    with pytest.raises(FileNotFoundError):
+        _parallel.receive(job, "psm_test_missing")
+    assert names
+    assert_removed(names)
 
 
 def test_parser_gnss_android_raw_data():
@@ -332,6 +468,45 @@ def test_parser_rinex3_nav():
     assert "G" in parser["system"]
 
 
+def test_parser_rinex3_obs():
+    """Test that parsing rinex3_obs gives expected output"""
+    parser = get_parser("rinex3_obs").as_dict()
+
+    assert len(parser["time"]) == 120
+    assert parser["time"][0] == "2018-02-01T00:00:00.0000000"
+    assert parser["text"]["satellite"][0] == "C05"
+    assert parser["obs"]["C6X"][0] == 40600783.887
+    assert parser["obs"]["L6X"][0] == 171795225.792
+    assert parser["signal_strength"]["L6X"][0] == 6
+    assert np.isnan(parser["cycle_slip"]["L6X"][0])
+    assert np.isnan(parser["obs"]["C1C"][0])  # Observation type not used by BeiDou
+
+
+def test_iter_epochs(tmp_path):
+    """Test that parsing observation files in chunks of epochs gives expected output"""
+    example_dir = pathlib.Path(__file__).parent / "example_files"
+    dsets = list(parsers.iter_epochs("rinex2_obs", example_dir / "rinex2_obs", chunk_epochs=100))
+    assert [dset.num_obs for dset in dsets] == [2015, 2077, 127]
+
+    dsets = parsers.iter_epochs("rinex2_obs", example_dir / "rinex2_obs", chunk_epochs=100, sampling_rate=60)
+    assert sum(dset.num_obs for dset in dsets) == 2110
+
+    dsets = list(parsers.iter_epochs("rinex3_obs", example_dir / "rinex3_obs", chunk_epochs=3))
+    assert [dset.num_obs for dset in dsets] == [89, 31]
+    assert dsets[1].satellite[0] == get_parser("rinex3_obs").as_dataset().satellite[89]
+
+    dsets = list(parsers.iter_epochs("rinex3_obs", example_dir / "rinex3_obs", chunk_epochs=1, sampling_rate=600))
+    assert [dset.num_obs for dset in dsets] == [30, 30]
+
+    # Event records do not count as epochs
+    lines = (example_dir / "rinex3_obs").read_text().splitlines(keepends=True)
+    event = ["> 2018  2  1  0  2 30.0000000  4  1\n", f"{'ANTENNA MOVED':<60}COMMENT\n"]
+    file_path = tmp_path / "rinex3_obs"
+    file_path.write_text("".join(lines[:63] + event + lines[63:]))
+    dsets = list(parsers.iter_epochs("rinex3_obs", file_path, chunk_epochs=3))
+    assert [dset.num_obs for dset in dsets] == [89, 31]
+
+
 @pytest.mark.skip(reason="New Rinex3 parser not yet implemented")
 def test_parser_wip_rinex3_obs():
     """Test that parsing rinex3_obs gives expected output"""